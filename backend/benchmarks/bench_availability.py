@@ -0,0 +1,68 @@
+import argparse
+import random
+import time
+from datetime import date, timedelta
+
+import numpy as np
+
+from backend.benchmarks import synthetic
+from backend.scripts.availability import AvailabilityCalendar
+from backend.scripts.reservation_index import ReservationIndex
+
+# "Which listings are free for these dates" across the whole catalog: the
+# bitmap calendar against checking each listing's intervals in a loop.
+# Run with: python -m backend.benchmarks.bench_availability
+
+
+def percentile(samples, q):
+    return float(np.percentile(samples, q)) * 1000
+
+
+def run(scale, queries):
+    tables = synthetic.generate(scale)
+    listing_ids = [row["id"] for row in tables["listings"]]
+    today = date.today()
+
+    start = time.perf_counter()
+    calendar = AvailabilityCalendar.from_requests(tables["requests"], today)
+    build_ms = (time.perf_counter() - start) * 1000
+    index = ReservationIndex.from_requests(tables["requests"])
+
+    rng = random.Random(scale)
+    ranges = []
+    for _ in range(queries):
+        first = today + timedelta(days=rng.randint(0, 90))
+        ranges.append((first, first + timedelta(days=rng.randint(0, 7))))
+
+    loop, vectorized = [], []
+    for first, last in ranges:
+        t0 = time.perf_counter()
+        expected = [i for i in listing_ids if not index.conflicts(i, first, last)]
+        t1 = time.perf_counter()
+        booked = calendar.booked_ids(first, last)
+        available = [i for i in listing_ids if i not in booked]
+        t2 = time.perf_counter()
+        assert available == expected
+        loop.append(t1 - t0)
+        vectorized.append(t2 - t1)
+
+    for name, samples in (("intervals", loop), ("calendar", vectorized)):
+        print(f"{scale:>8} {name:>10} {percentile(samples, 50):8.2f} {percentile(samples, 95):8.2f} "
+              f"{percentile(samples, 99):8.2f}")
+    print(f"{'':>8} calendar: {len(calendar)} rows, {calendar.bits.nbytes / 2**20:.1f} MB, built in {build_ms:.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark date-range availability queries")
+    parser.add_argument("--scales", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--queries", type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"queries={args.queries} (times in ms, including building the available id list)")
+    print(f"{'listings':>8} {'method':>10} {'p50':>8} {'p95':>8} {'p99':>8}")
+    for scale in args.scales:
+        run(scale, args.queries)
+
+
+if __name__ == "__main__":
+    main()
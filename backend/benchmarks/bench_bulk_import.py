@@ -0,0 +1,120 @@
+import argparse
+import asyncio
+import io
+import json
+import random
+import time
+from types import SimpleNamespace
+
+import backend.scripts.bulk_import as bulk_import
+
+# Rows/sec of the bulk importer against a stand-in database that charges a fixed
+# latency per round trip, compared with creating the same listings one at a time
+# (resolve tags, look up tag ids, insert: three round trips per row).
+# Run with: python -m backend.benchmarks.bench_bulk_import
+
+
+class StubQuery:
+    def __init__(self, db, table):
+        self.db = db
+        self.table = table
+        self.rows = None
+        self.values = set()
+
+    def select(self, *columns):
+        return self
+
+    def in_(self, column, values):
+        self.values = set(values)
+        return self
+
+    def insert(self, rows):
+        self.rows = rows if isinstance(rows, list) else [rows]
+        return self
+
+    async def execute(self):
+        self.db.round_trips += 1
+        await asyncio.sleep(self.db.latency)
+        if self.rows is None:
+            return SimpleNamespace(data=[{"id": self.db.tag_ids[name], "name": name} for name in self.values])
+        inserted = []
+        for row in self.rows:
+            self.db.next_id += 1
+            inserted.append({**row, "id": self.db.next_id})
+        return SimpleNamespace(data=inserted)
+
+
+class StubDatabase:
+    def __init__(self, latency, tags):
+        self.latency = latency
+        self.round_trips = 0
+        self.next_id = 0
+        self.tag_ids = {name: i for i, name in enumerate(tags, start=1)}
+
+    def table(self, name):
+        return StubQuery(self, name)
+
+
+def make_rows(count, tags, seed=0):
+    rng = random.Random(seed)
+    for i in range(count):
+        yield json.dumps({
+            "title": f"Item {i}", "description": "Bulk imported item", "quantity": "1",
+            "price": rng.randint(5, 100), "location": rng.choice(["Toronto", "Barrie", "Ottawa"]),
+            "user": 1, "tags": rng.sample(tags, 3),
+        }) + "\n"
+
+
+async def run_bulk(db, lines, chunk_size):
+    async def resolve_tags(names):
+        await StubQuery(db, "tags").execute()  # the tag name select in resolve_tags
+        return {name: name for name in names}
+
+    async def get_db():
+        return db
+
+    bulk_import.resolve_tags = resolve_tags
+    bulk_import.get_async_supabase = get_db
+    return await bulk_import.import_listings(io.StringIO("".join(lines)), "jsonl", chunk_size)
+
+
+async def run_per_row(db, lines):
+    for line in lines:
+        row = json.loads(line)
+        await StubQuery(db, "tags").execute()  # verify_and_add_tags
+        tag_ids = (await StubQuery(db, "tags").select("id, name").in_("name", row["tags"]).execute()).data
+        row["tags"] = [tag["id"] for tag in tag_ids]
+        await StubQuery(db, "listings").insert(row).execute()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark bulk listing import")
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--chunk-size", type=int, default=bulk_import.BULK_CHUNK_SIZE)
+    parser.add_argument("--latency-ms", type=float, default=5.0, help="simulated database round trip")
+    args = parser.parse_args()
+
+    tags = [f"tag {i}" for i in range(200)]
+    lines = list(make_rows(args.rows, tags))
+    latency = args.latency_ms / 1000
+
+    print(f"rows={args.rows} chunk={args.chunk_size} latency={args.latency_ms}ms")
+    print(f"{'mode':>8} {'seconds':>8} {'rows/s':>10} {'round trips':>12}")
+
+    # Keep the per-row run short; its cost is linear in the row count
+    sample = lines[:min(len(lines), 500)]
+    db = StubDatabase(latency, tags)
+    start = time.perf_counter()
+    asyncio.run(run_per_row(db, sample))
+    seconds = time.perf_counter() - start
+    print(f"{'per-row':>8} {seconds:8.2f} {len(sample) / seconds:10.0f} {db.round_trips:12}")
+
+    db = StubDatabase(latency, tags)
+    start = time.perf_counter()
+    report = asyncio.run(run_bulk(db, lines, args.chunk_size))
+    seconds = time.perf_counter() - start
+    print(f"{'bulk':>8} {seconds:8.2f} {report['inserted'] / seconds:10.0f} {db.round_trips:12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+from datetime import date
+
+import numpy as np
+
+from backend.benchmarks import synthetic
+from backend.scripts.catalog_snapshot import SNAPSHOT_TABLES, build_arrays, write_snapshot, CatalogSnapshot
+from backend.scripts.reservation_index import ReservationIndex
+from backend.scripts.listing_cards import build_listing_card
+
+# Memory of the catalog across worker processes: each worker holding its own
+# rows (what catalog_cache does per worker) against every worker mapping the
+# shared snapshot file. Memory is the growth in PSS (shared pages are split
+# between the processes mapping them) after loading and building all cards
+# once. Also times building the read_root cards both ways. Linux only.
+# Run with: python -m backend.benchmarks.bench_catalog_snapshot
+
+
+def pss_kb() -> int:
+    with open("/proc/self/smaps_rollup") as f:
+        return next(int(line.split()[1]) for line in f if line.startswith("Pss:"))
+
+
+def worker(mode, scale, path, ready, go, results):
+    tables = synthetic.generate(scale) if mode == "rows" else None
+    today = date.today()
+    before = pss_kb()
+    if mode == "rows":
+        # Rows as they arrive from Supabase, plus the per-worker reservation index
+        import orjson
+        listings = orjson.loads(orjson.dumps(tables["listings"]))
+        tags = orjson.loads(orjson.dumps(tables["tags"]))
+        reservations = ReservationIndex.from_requests(orjson.loads(orjson.dumps(tables["requests"])))
+        del tables
+        tag_lookup = {tag["id"]: tag["name"] for tag in tags}
+
+        def cards():
+            return [build_listing_card(row, tag_lookup, reservations.availability(row["id"], today)) for row in listings]
+    else:
+        snapshot = CatalogSnapshot(path)
+
+        def cards():
+            return snapshot.listing_cards(today)
+
+    cards()
+    ready.put(None)
+    go.wait()  # measure once every worker has loaded, so shared pages are split between all of them
+    grown = pss_kb() - before
+    start = time.perf_counter()
+    for _ in range(5):
+        cards()
+    results.put((grown, (time.perf_counter() - start) / 5))
+
+
+def run(mode, scale, workers, path):
+    ctx = multiprocessing.get_context("fork")
+    ready, results, go = ctx.Queue(), ctx.Queue(), ctx.Event()
+    processes = [ctx.Process(target=worker, args=(mode, scale, path, ready, go, results)) for _ in range(workers)]
+    for p in processes:
+        p.start()
+    for _ in processes:
+        ready.get()
+    go.set()
+    measured = [results.get() for _ in processes]
+    for p in processes:
+        p.join()
+    total_mb = sum(kb for kb, _ in measured) / 1024
+    build_ms = 1000 * float(np.median([seconds for _, seconds in measured]))
+    print(f"{scale:>8} {workers:>7} {mode:>8} {total_mb:10.1f} {total_mb / workers:10.1f} {build_ms:10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the shared catalog snapshot against per-worker rows")
+    parser.add_argument("--scales", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4])
+    args = parser.parse_args()
+
+    print(f"{'listings':>8} {'workers':>7} {'mode':>8} {'total MB':>10} {'MB/worker':>10} {'cards ms':>10}")
+    for scale in args.scales:
+        tables = synthetic.generate(scale)
+        path = os.path.join(tempfile.mkdtemp(prefix="bench-snapshot-"), "catalog.snapshot")
+        start = time.perf_counter()
+        write_snapshot(path, build_arrays(tables["listings"], tables["tags"], tables["requests"], date.today()),
+                       {"fetched_at": dict.fromkeys(SNAPSHOT_TABLES, time.time()), "origin": date.today().isoformat(),
+                        "calendar_days": 730})
+        print(f"{'':>8} snapshot: {os.path.getsize(path) / 2**20:.1f} MB written in "
+              f"{1000 * (time.perf_counter() - start):.0f} ms")
+        for workers in args.workers:
+            for mode in ("rows", "snapshot"):
+                run(mode, scale, workers, path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+import argparse
+import asyncio
+import random
+import time
+
+import numpy as np
+
+from backend.benchmarks import synthetic
+from backend.benchmarks.stubs import FakeOpenAI
+from backend.scripts import openai_client, tag_verification
+from backend.scripts.embedding_batcher import EmbeddingBatcher
+
+# Single-text embedding calls arriving at a steady random rate (distinct texts,
+# so nothing is coalesced), sent one per request vs micro-batched with
+# different windows. Reports upstream calls, caller latency and the batch
+# size / queueing delay numbers the batcher exposes. Unbatched throughput is
+# capped by OPENAI_MAX_CONCURRENCY in-flight calls.
+#
+# Then tag-verification traffic: concurrent get_embeddings calls for a few
+# tags each (overlapping between uploads), one embeddings.create per call as
+# before vs through get_embeddings, where texts are coalesced and batched.
+# Run with: python -m backend.benchmarks.bench_embedding_batcher
+
+
+async def run(label, batcher, fake, texts, rate, rng):
+    fake.embedding_calls = 0
+    latencies = []
+
+    async def call(text):
+        start = time.perf_counter()
+        await batcher.embed(text, "text-embedding-3-small")
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    tasks = []
+    for text in texts:
+        tasks.append(asyncio.create_task(call(text)))
+        await asyncio.sleep(rng.expovariate(rate))
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+
+    stats = batcher.stats()
+    delay = stats["queue_delay_ms"].get("p95", 0.0)
+    print(f"{label:>10} {fake.embedding_calls:>6} {stats['mean_batch_size']:>6} "
+          f"{np.percentile(latencies, 50) * 1000:8.1f} {np.percentile(latencies, 95) * 1000:8.1f} "
+          f"{delay:9.2f} {len(texts) / elapsed:8.0f}")
+    return stats
+
+
+async def run_lists(label, embed, fake, tag_lists, rate, rng):
+    fake.embedding_calls = 0
+    latencies = []
+
+    async def call(tags):
+        start = time.perf_counter()
+        await embed(tags)
+        latencies.append(time.perf_counter() - start)
+
+    tasks = []
+    for tags in tag_lists:
+        tasks.append(asyncio.create_task(call(tags)))
+        await asyncio.sleep(rng.expovariate(rate))
+    await asyncio.gather(*tasks)
+    print(f"{label:>10} {fake.embedding_calls:>6} "
+          f"{np.percentile(latencies, 50) * 1000:8.1f} {np.percentile(latencies, 95) * 1000:8.1f}")
+
+
+async def direct_embeddings(texts):
+    # What get_embeddings did before going through get_embedding: one call per caller
+    response = await openai_client.create_embeddings(texts, "text-embedding-3-small")
+    return [item.embedding for item in response.data]
+
+
+async def main_async(args):
+    fake = FakeOpenAI(synthetic.tag_vocabulary(), embedding_latency=args.latency_ms / 1000)
+    openai_client._client = fake
+    texts = [f"text {i}" for i in range(args.calls)]
+
+    print(f"calls={args.calls} rate={args.rate}/s upstream latency={args.latency_ms} ms")
+    print(f"{'window':>10} {'calls':>6} {'batch':>6} {'p50 ms':>8} {'p95 ms':>8} {'delay p95':>9} {'texts/s':>8}")
+    await run("unbatched", EmbeddingBatcher(max_batch=1), fake, texts, args.rate, random.Random(0))
+    for window in args.windows:
+        stats = await run(f"{window:g} ms", EmbeddingBatcher(window_ms=window, max_batch=args.max_batch),
+                          fake, texts, args.rate, random.Random(0))
+        print(f"{'':>10} batch sizes: {stats['batch_sizes']}")
+
+    rng = random.Random(1)
+    vocabulary = synthetic.tag_vocabulary()
+    tag_lists = [rng.sample(vocabulary, args.tags_per_call) for _ in range(args.calls // args.tags_per_call)]
+    print(f"\nget_embeddings calls={len(tag_lists)} of {args.tags_per_call} tags from {len(vocabulary)}")
+    print(f"{'window':>10} {'calls':>6} {'p50 ms':>8} {'p95 ms':>8}")
+    await run_lists("direct", direct_embeddings, fake, tag_lists, args.rate / args.tags_per_call, random.Random(0))
+    for window in args.windows:
+        tag_verification.embedding_batcher = EmbeddingBatcher(window_ms=window, max_batch=args.max_batch)
+        await run_lists(f"{window:g} ms", tag_verification.get_embeddings, fake, tag_lists,
+                        args.rate / args.tags_per_call, random.Random(0))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark micro-batching of embedding calls")
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--rate", type=float, default=1000, help="calls per second")
+    parser.add_argument("--latency-ms", type=float, default=80, help="fake embeddings.create latency")
+    parser.add_argument("--windows", type=float, nargs="+", default=[0, 2, 5, 10, 20])
+    parser.add_argument("--max-batch", type=int, default=256)
+    parser.add_argument("--tags-per-call", type=int, default=5)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
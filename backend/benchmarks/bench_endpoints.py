@@ -0,0 +1,132 @@
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+import numpy as np
+
+# Endpoint latency and throughput against the in-memory Supabase and fake
+# OpenAI clients in stubs.py, over synthetic data at several scales. Requests
+# go through the full ASGI app (routing, validation, serialization).
+# Run with: python -m backend.benchmarks.bench_endpoints --scales 1000 10000
+
+# Keep the embedding store and other on-disk caches out of backend/.cache
+_cache_dir = tempfile.mkdtemp(prefix="bench-endpoints-")
+os.environ["TAG_EMBEDDINGS_PATH"] = os.path.join(_cache_dir, "tag_embeddings.npz")
+os.environ["LISTING_INDEX_PATH"] = os.path.join(_cache_dir, "listing_embeddings.npz")
+os.environ["UPLOAD_DEDUP_DB"] = os.path.join(_cache_dir, "upload_dedup.sqlite3")
+os.environ.pop("SEARCH_CACHE_DB", None)
+os.environ.pop("CATALOG_SNAPSHOT_PATH", None)
+
+import httpx
+
+from backend.main import app
+from backend.benchmarks import synthetic
+from backend.benchmarks.stubs import AsyncStubSupabase, FakeOpenAI, StubDatabase, StubSupabase
+from backend.scripts import async_db, openai_client, tag_verification
+from backend.scripts.catalog_cache import catalog_cache
+from backend.scripts.metrics import instrument_supabase
+
+
+def verify_tags_body(rng: random.Random, vocabulary: list[str]) -> dict:
+    # Mostly existing tags, plus a variant that has to be embedded and matched
+    tags = rng.sample(vocabulary, 2) + [f"{rng.choice(vocabulary)} {rng.choice(['new', 'used', 'large'])}"]
+    return {"json": {"tags": tags}}
+
+
+# name, method, path, request kwargs factory, clear the catalog cache before each request
+ENDPOINTS = [
+    ("read_root", "GET", "/", None, False),
+    ("read_root (uncached)", "GET", "/", None, True),
+    ("get_profile", "GET", "/profile", None, False),
+    ("verify_and_add_tags", "POST", "/tags/verify", verify_tags_body, False),
+]
+
+
+def install(scale: int, db_latency: float, chat_latency: float, embedding_latency: float) -> StubDatabase:
+    """Points the shared clients at fresh stubs loaded with synthetic data."""
+    db = StubDatabase(synthetic.generate(scale), db_latency)
+    async_db._client = instrument_supabase(AsyncStubSupabase(db), is_async=True)
+    async_db._sync_client = instrument_supabase(StubSupabase(db), is_async=False)
+    openai_client._client = FakeOpenAI(synthetic.tag_vocabulary(), chat_latency, embedding_latency)
+    tag_verification._tag_matcher = None
+    catalog_cache.clear()
+    return db
+
+
+def percentile(samples, q):
+    return float(np.percentile(samples, q)) * 1000
+
+
+async def measure(client, endpoint, requests, concurrency, rng, vocabulary):
+    name, method, path, make_kwargs, uncached = endpoint
+    errors = 0
+
+    async def call():
+        nonlocal errors
+        if uncached:
+            catalog_cache.clear()
+        kwargs = make_kwargs(rng, vocabulary) if make_kwargs else {}
+        start = time.perf_counter()
+        response = await client.request(method, path, **kwargs)
+        elapsed = time.perf_counter() - start
+        body = response.json()
+        if response.status_code != 200 or (isinstance(body, dict) and "error" in body):
+            errors += 1
+        return elapsed
+
+    await call()  # warm up caches and lazily built indexes
+
+    # Latency: one request at a time
+    samples = [await call() for _ in range(requests)]
+
+    # Throughput: `concurrency` requests in flight
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def limited():
+        async with semaphore:
+            await call()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(limited() for _ in range(requests)))
+    throughput = requests / (time.perf_counter() - start)
+
+    print(f"{name:>22} {percentile(samples, 50):8.2f} {percentile(samples, 95):8.2f} "
+          f"{percentile(samples, 99):8.2f} {throughput:10.0f} {errors:7}")
+
+
+async def run(args):
+    transport = httpx.ASGITransport(app=app)
+    vocabulary = synthetic.tag_vocabulary()
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for scale in args.scales:
+            db = install(scale, args.db_latency_ms / 1000, args.chat_latency_ms / 1000,
+                         args.embedding_latency_ms / 1000)
+            print(f"\nlistings={scale} users={len(db.tables['users'])} requests={len(db.tables['requests'])}")
+            print(f"{'endpoint':>22} {'p50':>8} {'p95':>8} {'p99':>8} {'req/s':>10} {'errors':>7}")
+            for endpoint in ENDPOINTS:
+                if args.only and endpoint[0].split()[0] not in args.only:
+                    continue
+                await measure(client, endpoint, args.requests, args.concurrency, random.Random(scale), vocabulary)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark endpoints against offline Supabase/OpenAI stand-ins")
+    parser.add_argument("--scales", type=int, nargs="+", default=[1_000, 10_000])
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--db-latency-ms", type=float, default=2.0, help="per Supabase round trip")
+    parser.add_argument("--chat-latency-ms", type=float, default=200.0)
+    parser.add_argument("--embedding-latency-ms", type=float, default=50.0)
+    parser.add_argument("--only", nargs="+", help="endpoint names to run, e.g. read_root get_profile")
+    args = parser.parse_args()
+
+    print(f"db={args.db_latency_ms}ms chat={args.chat_latency_ms}ms embeddings={args.embedding_latency_ms}ms "
+          f"requests={args.requests} concurrency={args.concurrency} (times in ms)")
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+import argparse
+import random
+import time
+
+import numpy as np
+
+from backend.benchmarks import synthetic
+from backend.scripts.gazetteer import gazetteer
+from backend.scripts.geo_index import ListingGeoIndex, haversine_km
+
+# "Listings within r km of a place, nearest first": the grid index against
+# computing the distance to every listing's stored coordinates and sorting.
+# Run with: python -m backend.benchmarks.bench_geo_index
+
+
+def percentile(samples, q):
+    return float(np.percentile(samples, q)) * 1000
+
+
+def run(scale, queries, radius_km):
+    listings = synthetic.generate(scale)["listings"]
+
+    start = time.perf_counter()
+    index = ListingGeoIndex()
+    index.rebuild(listings)
+    build_ms = (time.perf_counter() - start) * 1000
+    coords = list(index.coords.items())
+
+    rng = random.Random(scale)
+    places = [gazetteer.geocode(name) for name in ("Toronto", "Barrie", "Kingston", "Hamilton", "Ottawa", "Muskoka")]
+    centres = [rng.choice(places) for _ in range(queries)]
+
+    scan, grid = [], []
+    for place in centres:
+        lat, lng = place.latitude, place.longitude
+        t0 = time.perf_counter()
+        expected = []
+        for listing_id, point in coords:
+            distance = haversine_km(lat, lng, *point)
+            if distance <= radius_km:
+                expected.append((listing_id, distance))
+        expected.sort(key=lambda hit: (hit[1], hit[0]))
+        t1 = time.perf_counter()
+        found = index.within_radius(lat, lng, radius_km)
+        t2 = time.perf_counter()
+        assert found == expected
+        scan.append(t1 - t0)
+        grid.append(t2 - t1)
+
+    for name, samples in (("scan", scan), ("grid", grid)):
+        print(f"{scale:>8} {name:>6} {percentile(samples, 50):8.2f} {percentile(samples, 95):8.2f} "
+              f"{percentile(samples, 99):8.2f}")
+    print(f"{'':>8} index: {len(index)} geocoded listings in {len(index.cells)} cells, built in {build_ms:.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark radius queries over listing locations")
+    parser.add_argument("--scales", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--radius-km", type=float, default=50)
+    args = parser.parse_args()
+
+    print(f"queries={args.queries} radius={args.radius_km} km (times in ms, distance-sorted (id, km) list)")
+    print(f"{'listings':>8} {'method':>6} {'p50':>8} {'p95':>8} {'p99':>8}")
+    for scale in args.scales:
+        run(scale, args.queries, args.radius_km)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+import argparse
+import time
+import numpy as np
+
+from backend.scripts.listing_index import ListingVectorIndex
+
+# Latency of top-k queries against the listing vector index.
+# Run with: python -m backend.benchmarks.bench_listing_index
+
+
+def percentile(samples, q):
+    return float(np.percentile(samples, q)) * 1000
+
+
+def run(size, dim, k, queries, filtered):
+    rng = np.random.default_rng(size)
+    index = ListingVectorIndex(path="", dim=dim)
+
+    start = time.perf_counter()
+    index.add(list(range(1, size + 1)), rng.standard_normal((size, dim), dtype=np.float32), persist=False)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    # Simulate the search endpoint restricting results to current listings
+    allowed = range(1, size + 1) if filtered else None
+    samples = []
+    for query in rng.standard_normal((queries, dim), dtype=np.float32):
+        start = time.perf_counter()
+        index.query(query, k=k, allowed_ids=allowed)
+        samples.append(time.perf_counter() - start)
+
+    mb = index.matrix.nbytes / 2**20
+    print(f"{size:>8} {mb:8.0f} {build_ms:10.1f} {percentile(samples, 50):8.2f} "
+          f"{percentile(samples, 95):8.2f} {percentile(samples, 99):8.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark listing vector index queries")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--k", type=int, default=20)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--filtered", action="store_true", help="pass allowed_ids like /search/listings does")
+    args = parser.parse_args()
+
+    print(f"dim={args.dim} k={args.k} queries={args.queries} filtered={args.filtered} (times in ms)")
+    print(f"{'listings':>8} {'MB':>8} {'build':>10} {'p50':>8} {'p95':>8} {'p99':>8}")
+    for size in args.sizes:
+        run(size, args.dim, args.k, args.queries, args.filtered)
+
+
+if __name__ == "__main__":
+    main()
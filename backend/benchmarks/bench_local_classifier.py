@@ -0,0 +1,72 @@
+import argparse
+import random
+import time
+
+import numpy as np
+
+from backend.benchmarks import synthetic
+from backend.scripts.local_classifier import LocalSearchClassifier
+
+# Hit rate and latency of the local /search/analyze fast path on a mix of
+# search prompts: bare tags, tags with a place, and free-form requests that
+# should be left to the LLM. A hit is correct if it found the place and, for
+# each tag in the prompt, that tag or a variant of it ("tent" / "tent rental").
+# Run with: python -m backend.benchmarks.bench_local_classifier
+
+PLACES = ["Toronto", "Barrie", "Kingston", "Muskoka", "Ottawa", "Waterloo, ON"]
+TEMPLATES = [
+    ("{tag}", True),
+    ("{tag}s", True),
+    ("{tag} rental in {place}", True),
+    ("need a {tag} and a {other} near {place}", True),
+    ("looking to rent a {tag} for the weekend", False),
+    ("going on a trip up north with friends, what should I bring", False),
+    ("something fun to do with the kids in {place}", False),
+]
+
+
+def make_prompts(vocabulary, count, rng):
+    prompts = []
+    for _ in range(count):
+        template, simple = rng.choice(TEMPLATES)
+        tag, other, place = rng.choice(vocabulary), rng.choice(vocabulary), rng.choice(PLACES)
+        expected = [tag, other] if "{other}" in template else [tag]
+        prompts.append((template.format(tag=tag, other=other, place=place), simple, expected,
+                        place.split(",")[0] if "{place}" in template else "unknown"))
+    return prompts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the local search prompt classifier")
+    parser.add_argument("--prompts", type=int, default=5000)
+    parser.add_argument("--tags", type=int, default=200)
+    args = parser.parse_args()
+
+    vocabulary = synthetic.tag_vocabulary(args.tags)
+    classifier = LocalSearchClassifier()
+    prompts = make_prompts(vocabulary, args.prompts, random.Random(0))
+
+    times, correct, wrong, simple_hits, simple_total = [], 0, 0, 0, 0
+    for prompt, simple, expected, place in prompts:
+        start = time.perf_counter()
+        result = classifier.classify(prompt, vocabulary)
+        times.append(time.perf_counter() - start)
+        simple_total += simple
+        if result is None:
+            continue
+        simple_hits += simple
+        found = {tag.split()[0] for tag in result["tags"]}
+        if all(tag.split()[0] in found for tag in expected) and result["location"] == place:
+            correct += 1
+        else:
+            wrong += 1
+
+    stats = classifier.stats()
+    print(f"prompts={args.prompts} vocabulary={len(vocabulary)} tags")
+    print(f"hit rate {stats['hit_rate']:.1%} (simple prompts {simple_hits / simple_total:.1%}), "
+          f"{correct} correct / {wrong} wrong hits")
+    print(f"classify p50 {np.percentile(times, 50) * 1e6:.0f} us, p99 {np.percentile(times, 99) * 1e6:.0f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+# Cold start of a worker: time to import backend.main and latency of the first
+# request, each measured in a fresh interpreter. Needs the usual .env (the
+# first request talks to Supabase).
+# Run with: python -m backend.benchmarks.bench_startup --path /tags
+
+CHILD = """
+import json, sys, time
+start = time.perf_counter()
+import backend.main
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+client = TestClient(backend.main.app, raise_server_exceptions=False)
+request_start = time.perf_counter()
+status = client.request(sys.argv[2], sys.argv[1]).status_code
+done = time.perf_counter()
+print(json.dumps({
+    "import_ms": 1000 * (imported - start),
+    "first_request_ms": 1000 * (done - request_start),
+    "status": status,
+    "loaded": [name for name in ("numpy", "openai", "PIL") if name in sys.modules],
+}))
+"""
+
+
+def measure(path, method):
+    output = subprocess.run(
+        [sys.executable, "-W", "ignore", "-c", CHILD, path, method],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure import time and first-request latency")
+    parser.add_argument("--path", default="/tags")
+    parser.add_argument("--method", default="GET")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    runs = [measure(args.path, args.method) for _ in range(args.runs)]
+    imports = [run["import_ms"] for run in runs]
+    requests = [run["first_request_ms"] for run in runs]
+
+    print(f"{args.method} {args.path}, {args.runs} fresh processes (times in ms)")
+    print(f"{'':>14} {'median':>8} {'min':>8} {'max':>8}")
+    for name, samples in (("import", imports), ("first request", requests)):
+        print(f"{name:>14} {statistics.median(samples):8.1f} {min(samples):8.1f} {max(samples):8.1f}")
+    print(f"status codes: {sorted({run['status'] for run in runs})}")
+    print(f"heavy modules loaded after the first request: {runs[-1]['loaded'] or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
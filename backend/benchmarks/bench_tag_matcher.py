@@ -0,0 +1,72 @@
+import argparse
+import time
+import numpy as np
+
+from backend.scripts.tag_matcher import NearestTagMatcher
+
+# Compares the vectorized nearest-tag matcher against the old per-tag
+# cosine_similarity loop. Run with: python -m backend.benchmarks.bench_tag_matcher
+
+
+def cosine_similarity(v1, v2):
+    return np.dot(v1, v2) / (np.linalg.norm(v1) * np.linalg.norm(v2))
+
+
+def legacy_best_match(query, names, vectors):
+    """The original per-tag loop from verify_and_add_tags."""
+    max_similarity = 0
+    most_similar_tag = None
+    for name, vector in zip(names, vectors):
+        similarity = cosine_similarity(query, vector)
+        if similarity > max_similarity:
+            max_similarity = similarity
+            most_similar_tag = name
+    return most_similar_tag, max_similarity
+
+
+def timed(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def run(size, dim, batch, k, repeat, legacy_limit):
+    rng = np.random.default_rng(size)
+    names = [f"tag-{i}" for i in range(size)]
+    vectors = rng.standard_normal((size, dim), dtype=np.float32)
+    queries = rng.standard_normal((batch, dim), dtype=np.float32)
+
+    build_ms = timed(lambda: NearestTagMatcher(names, vectors), 1)
+    matcher = NearestTagMatcher(names, vectors)
+    query_ms = timed(lambda: matcher.query(queries, k=k), repeat)
+
+    legacy_ms = None
+    if size <= legacy_limit:
+        legacy_ms = timed(lambda: [legacy_best_match(q, names, vectors) for q in queries], 1)
+
+    legacy = f"{legacy_ms:10.1f}" if legacy_ms is not None else f"{'skipped':>10}"
+    print(f"{size:>8} {build_ms:10.1f} {query_ms:10.2f} {legacy}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark nearest-tag matching")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--batch", type=int, default=5, help="candidate tags per verification call")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--legacy-limit", type=int, default=10_000,
+                        help="largest vocabulary to run the legacy loop on")
+    args = parser.parse_args()
+
+    print(f"dim={args.dim} batch={args.batch} k={args.k} (times in ms)")
+    print(f"{'tags':>8} {'build':>10} {'query':>10} {'legacy':>10}")
+    for size in args.sizes:
+        run(size, args.dim, args.batch, args.k, args.repeat, args.legacy_limit)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+import asyncio
+import hashlib
+import json
+import time
+from datetime import datetime
+from functools import lru_cache
+from types import SimpleNamespace
+from typing import Optional
+
+import numpy as np
+
+from backend.scripts.tag_embeddings import EMBEDDING_DIM
+
+# In-memory stand-ins for the Supabase and OpenAI clients so the endpoints can
+# be benchmarked offline. Both charge a configurable latency per call to mimic
+# network round trips and count how many calls were made.
+
+
+class StubQuery:
+    """The subset of the PostgREST query builder used by the backend."""
+
+    def __init__(self, db: "StubDatabase", table: str):
+        self.db = db
+        self.table = table
+        self.columns: Optional[list[str]] = None
+        self.filters = []
+        self.lookup: Optional[tuple] = None  # (column, values) answered from a hash index
+        self.rows_to_insert: Optional[list] = None
+        self.order_by: Optional[str] = None
+        self.row_limit: Optional[int] = None
+
+    def select(self, columns: str = "*"):
+        if columns.strip() != "*":
+            self.columns = [column.strip() for column in columns.split(",")]
+        return self
+
+    def _filter(self, column, test):
+        self.filters.append(lambda row: row.get(column) is not None and test(row[column]))
+        return self
+
+    def eq(self, column, value):
+        return self.in_(column, [value])
+
+    def in_(self, column, values):
+        values = set(values)
+        if self.lookup is None:
+            self.lookup = (column, values)
+            return self
+        return self._filter(column, lambda v: v in values)
+
+    def gt(self, column, value):
+        return self._filter(column, lambda v: v > value)
+
+    def lt(self, column, value):
+        return self._filter(column, lambda v: v < value)
+
+    def gte(self, column, value):
+        return self._filter(column, lambda v: v >= value)
+
+    def lte(self, column, value):
+        return self._filter(column, lambda v: v <= value)
+
+    def contains(self, column, values):
+        return self._filter(column, lambda v: set(values) <= set(v))
+
+    def ilike(self, column, pattern):
+        needle = pattern.strip("%").casefold()
+        return self._filter(column, lambda v: needle in str(v).casefold())
+
+    def order(self, column, desc=False):
+        self.order_by = column
+        return self
+
+    def limit(self, count):
+        self.row_limit = count
+        return self
+
+    def insert(self, rows):
+        self.rows_to_insert = rows if isinstance(rows, list) else [rows]
+        return self
+
+    def _run(self):
+        self.db.calls += 1
+        rows = self.db.tables.setdefault(self.table, [])
+        if self.rows_to_insert is not None:
+            self.db.drop_indexes(self.table)
+            inserted = []
+            for row in self.rows_to_insert:
+                self.db.next_ids[self.table] = self.db.next_ids.get(self.table, len(rows)) + 1
+                row = {"id": self.db.next_ids[self.table], "created_at": datetime.now().isoformat(), **row}
+                rows.append(row)
+                inserted.append(dict(row))
+            return SimpleNamespace(data=inserted)
+
+        if self.lookup is not None:
+            column, values = self.lookup
+            index = self.db.index(self.table, column)
+            rows = [row for value in values for row in index.get(value, [])]
+            if len(values) > 1:
+                rows.sort(key=lambda row: row["id"])
+        result = [row for row in rows if all(test(row) for test in self.filters)]
+        if self.order_by:
+            result.sort(key=lambda row: row[self.order_by])
+        if self.row_limit is not None:
+            result = result[:self.row_limit]
+        if self.columns:
+            result = [{column: row.get(column) for column in self.columns} for row in result]
+        else:
+            result = [dict(row) for row in result]
+        return SimpleNamespace(data=result)
+
+    def execute(self):
+        if self.db.latency:
+            time.sleep(self.db.latency)
+        return self._run()
+
+
+class AsyncStubQuery(StubQuery):
+    async def execute(self):
+        if self.db.latency:
+            await asyncio.sleep(self.db.latency)
+        return self._run()
+
+
+class StubBucket:
+    def __init__(self, db: "StubDatabase", name: str):
+        self.db = db
+        self.name = name
+
+    async def upload(self, file, path, file_options=None):
+        if self.db.latency:
+            await asyncio.sleep(self.db.latency)
+        self.db.objects[f"{self.name}/{path}"] = len(file)
+        return SimpleNamespace(path=path)
+
+    async def get_public_url(self, path):
+        return f"https://stub.supabase.co/storage/v1/object/public/{self.name}/{path}"
+
+
+class StubDatabase:
+    """Tables as lists of row dicts, shared by the sync and async stub clients."""
+
+    def __init__(self, tables: dict, latency: float = 0.0):
+        self.tables = tables
+        self.latency = latency
+        self.calls = 0
+        self.next_ids = {name: max((row["id"] for row in rows), default=0) for name, rows in tables.items()}
+        self.objects = {}
+        self._indexes = {}
+
+    def index(self, table: str, column: str) -> dict:
+        """Hash index value -> rows for equality lookups, built on first use like a database index."""
+        key = (table, column)
+        if key not in self._indexes:
+            index = {}
+            for row in self.tables.get(table, []):
+                index.setdefault(row.get(column), []).append(row)
+            self._indexes[key] = index
+        return self._indexes[key]
+
+    def drop_indexes(self, table: str):
+        for key in [key for key in self._indexes if key[0] == table]:
+            del self._indexes[key]
+
+
+class StubSupabase:
+    """Stands in for the sync supabase Client."""
+
+    def __init__(self, db: StubDatabase):
+        self.db = db
+
+    def table(self, name: str) -> StubQuery:
+        return StubQuery(self.db, name)
+
+
+class AsyncStubSupabase:
+    """Stands in for the async supabase AClient, including storage uploads."""
+
+    def __init__(self, db: StubDatabase):
+        self.db = db
+        self.storage = SimpleNamespace(from_=lambda bucket: StubBucket(db, bucket))
+
+    def table(self, name: str) -> AsyncStubQuery:
+        return AsyncStubQuery(self.db, name)
+
+
+@lru_cache(maxsize=50_000)
+def _word_vector(word: str) -> np.ndarray:
+    seed = int.from_bytes(hashlib.md5(word.encode()).digest()[:8], "little")
+    return np.random.default_rng(seed).standard_normal(EMBEDDING_DIM).astype(np.float32)
+
+
+def fake_embedding(text: str) -> list[float]:
+    """Deterministic embedding: the sum of per-word random vectors, so texts sharing words are similar."""
+    words = text.casefold().split() or [""]
+    return sum(_word_vector(word) for word in words).tolist()
+
+
+class FakeOpenAI:
+    """
+    Deterministic stand-in for AsyncOpenAI's chat.completions and embeddings.
+    Chat replies are JSON with the keys both photo_tags and search_tags read,
+    with tags picked from `vocabulary` by hashing the prompt.
+    """
+
+    def __init__(self, vocabulary: list[str], chat_latency: float = 0.0, embedding_latency: float = 0.0):
+        self.vocabulary = vocabulary or ["item"]
+        self.chat_latency = chat_latency
+        self.embedding_latency = embedding_latency
+        self.chat_calls = 0
+        self.embedding_calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._chat))
+        self.embeddings = SimpleNamespace(create=self._embed)
+
+    async def _chat(self, model, messages, **kwargs):
+        self.chat_calls += 1
+        if self.chat_latency:
+            await asyncio.sleep(self.chat_latency)
+        content = messages[-1]["content"]
+        if isinstance(content, list):
+            content = " ".join(part.get("text", "") for part in content)
+        seed = int(hashlib.md5(content.encode()).hexdigest(), 16)
+        tags = [self.vocabulary[(seed >> (8 * i)) % len(self.vocabulary)] for i in range(3)]
+        reply = {
+            "title": " ".join(tags).title(),
+            "description": f"Something for {', '.join(tags)}.",
+            "tags": tags,
+            "location": "unknown",
+        }
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=json.dumps(reply)))])
+
+    async def _embed(self, input, model):
+        self.embedding_calls += 1
+        if self.embedding_latency:
+            await asyncio.sleep(self.embedding_latency)
+        texts = [input] if isinstance(input, str) else input
+        return SimpleNamespace(data=[
+            SimpleNamespace(index=i, embedding=fake_embedding(text)) for i, text in enumerate(texts)
+        ])
@@ -0,0 +1,70 @@
+import random
+from datetime import date, datetime, timedelta
+
+# Synthetic tags, users, listings and requests shaped like the Supabase tables.
+# `scale` is the number of listings; the other tables grow with it.
+
+TAG_WORDS = [
+    "kayak", "canoe", "paddle", "tent", "camping", "hiking", "ski", "snowboard",
+    "bike", "helmet", "drill", "ladder", "saw", "camera", "tripod", "speaker",
+    "projector", "grill", "cooler", "fishing", "golf", "tennis", "surfboard", "wetsuit",
+    "stroller", "car seat", "lawn mower", "pressure washer", "generator", "sleeping bag",
+]
+TAG_QUALIFIERS = ["", "gear", "kit", "set", "rental", "outdoor", "winter", "summer", "pro", "kids"]
+LOCATIONS = ["Toronto", "Barrie", "Ottawa", "Kingston", "Hamilton", "Waterloo, ON", "London, ON", "Muskoka"]
+FIRST_NAMES = ["Alex", "Sam", "Jordan", "Taylor", "Morgan", "Casey", "Riley", "Jamie"]
+LAST_NAMES = ["Smith", "Chen", "Patel", "Nguyen", "Brown", "Martin", "Singh", "Lee"]
+
+
+def tag_vocabulary(count: int = 200) -> list[str]:
+    names = [f"{word} {qualifier}".strip() for qualifier in TAG_QUALIFIERS for word in TAG_WORDS]
+    return names[:count]
+
+
+def generate(scale: int, seed: int = 0, today: date = None) -> dict:
+    """Returns {table name: rows}. User 1 (the hardcoded profile user) always has listings and requests."""
+    rng = random.Random(seed)
+    today = today or date.today()
+    created_at = datetime.combine(today, datetime.min.time()).isoformat()
+
+    tags = [{"id": i, "name": name, "created_at": created_at}
+            for i, name in enumerate(tag_vocabulary(), start=1)]
+    users = [{"id": i, "fname": rng.choice(FIRST_NAMES), "lname": rng.choice(LAST_NAMES)}
+             for i in range(1, max(10, scale // 10) + 1)]
+
+    listings = []
+    for i in range(1, scale + 1):
+        listing_tags = rng.sample(tags, rng.randint(1, 4))
+        listings.append({
+            "id": i,
+            "created_at": created_at,
+            "title": f"{listing_tags[0]['name'].title()} #{i}",
+            "description": "Well kept, " + ", ".join(tag["name"] for tag in listing_tags) + ".",
+            "quantity": str(rng.randint(1, 3)),
+            "price": rng.randint(5, 150),
+            "picture": f"public/{i}.jpg",
+            "location": rng.choice(LOCATIONS),
+            # Every 20th listing belongs to user 1 so the profile page has items
+            "user": 1 if i % 20 == 0 else rng.randint(2, len(users)),
+            "tags": [tag["id"] for tag in listing_tags],
+            "rating": round(rng.uniform(3, 5), 1),
+            "num_reviews": rng.randint(0, 50),
+        })
+
+    requests = []
+    for i in range(1, 2 * scale + 1):
+        start = today + timedelta(days=rng.randint(-60, 90))
+        end = start + timedelta(days=rng.randint(1, 7))
+        requests.append({
+            "id": i,
+            "created_at": created_at,
+            "item": rng.randint(1, scale),
+            # ~5% of requests are made by user 1
+            "requested_user": 1 if rng.random() < 0.05 else rng.randint(2, len(users)),
+            "start_date": start.isoformat(),
+            "end_date": end.isoformat(),
+            "message": None,
+            "approve": rng.choice([0, 1]),
+        })
+
+    return {"tags": tags, "users": users, "listings": listings, "requests": requests}
@@ -1,11 +1,10 @@
 import os
 import sys
 from dotenv import load_dotenv
-from fastapi import FastAPI, File, UploadFile, HTTPException
+from fastapi import BackgroundTasks, FastAPI, File, UploadFile, HTTPException
 from pydantic import BaseModel
-from supabase import create_client, Client
-from typing import List
-import uuid
+from typing import List, Optional
+import orjson
 
 # This setup block must be at the very top of the file
 # 1. Add the project root to the python path to allow absolute imports
@@ -17,30 +16,55 @@ load_dotenv(dotenv_path=dotenv_path)
 
 
 # Now that the path and env vars are set, we can import our modules
-from backend.scripts.tag_verification import verify_and_add_tags
-from backend.scripts.photo_tags import generate_details_from_image_bytes
+from backend.scripts.tag_verification import verify_and_add_tags, get_embedding
 from backend.scripts.search_tags import classify_search_prompt
-from backend.schemas import ListingCreate, Listing, SearchPrompt, SearchResult
-
-# Initialize Supabase client using the loaded environment variables
-SUPABASE_URL=os.getenv("SUPABASE_URL")
-SUPABASE_KEY=os.getenv("SUPABASE_KEY")
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
-from fastapi import HTTPException, Request
+from backend.scripts.catalog_cache import catalog_cache
+from backend.scripts.listing_cards import (
+    SUPABASE_BUCKET_URL, build_listing_card, ListingDetail, ListedItem, NearbyListingCard, Profile, Rental,
+    RequestCard, ScoredListingCard,
+)
+from backend.scripts.projections import (
+    TAG_COLUMNS, USER_COLUMNS, LISTING_CARD_COLUMNS, LISTING_DETAIL_COLUMNS,
+    PROFILE_LISTING_COLUMNS, PROFILE_REQUEST_COLUMNS, RESERVATION_COLUMNS,
+)
+from backend.scripts.reservation_index import ReservationIndex, parse_date
+from backend.scripts.batch_loader import BatchLoader
+from backend.scripts.prompt_cache import search_cache
+from backend.scripts.tag_index import listing_tag_index
+from backend.scripts.gazetteer import gazetteer
+from backend.scripts.geo_index import listing_geo_index
+from backend.scripts.upload_dedup import upload_dedup, content_hash
+from backend.scripts.image_preprocess import read_upload_limited, UploadTooLarge
+from backend.scripts.detail_jobs import detail_jobs, generate_listing_details, QueueFull
+from backend.scripts.async_db import get_supabase, get_async_supabase, close_async_supabase, fetch
+from backend.scripts.bulk_import import import_upload
+from backend.scripts.metrics import METRICS_ENABLED, TimingMiddleware, metrics
+from backend.scripts import single_flight
+from backend.scripts.embedding_batcher import embedding_batcher
+from backend.scripts.local_classifier import local_classifier
+from backend.schemas import ListingCreate, Listing, SearchPrompt, SearchResult, ListingSearch, ListingFilter
+
+from fastapi import Query, Request
+from fastapi.responses import JSONResponse, ORJSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from supabase.client import create_client, Client 
-import os
-from dotenv import load_dotenv
-from datetime import datetime, timedelta
-from pydantic import BaseModel
+from datetime import date, datetime
 import random
+import time
+import asyncio
+
+# Supabase and OpenAI clients are created on first use (see async_db and
+# openai_client), so importing this module doesn't open any connections.
 
-load_dotenv()
-url = os.getenv("SUPABASE_URL")
-key = os.getenv("SUPABASE_KEY")
-supabase: Client = create_client(url, key)
+# orjson is much faster than the standard json module for the large card lists
+app = FastAPI(default_response_class=ORJSONResponse)
 
-app = FastAPI()
+@app.on_event("shutdown")
+async def shutdown():
+    await embedding_batcher.drain()
+    await close_async_supabase()
+    listing_index_module = sys.modules.get("backend.scripts.listing_index")
+    if listing_index_module is not None:  # only imported once search or indexing has run
+        await listing_index_module.listing_index.flush()
 
 app.add_middleware(
     CORSMiddleware,
@@ -50,7 +74,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-SUPABASE_BUCKET_URL = "https://ftwuonnxcfpinajqnacp.supabase.co/storage/v1/object/public/listings//"
+# Outermost, so the recorded duration includes the other middleware
+if METRICS_ENABLED:
+    app.add_middleware(TimingMiddleware)
+
+# Catalog snapshot shared by all workers through a memory-mapped file; opt-in
+# since it's only worth it with several workers (and it needs numpy at startup)
+catalog_snapshot = None
+if os.getenv("CATALOG_SNAPSHOT_PATH"):
+    from backend.scripts.catalog_snapshot import catalog_snapshot
 
 class UserCreate(BaseModel):
     first_name: str
@@ -59,105 +91,329 @@ class UserCreate(BaseModel):
 class TagsVerify(BaseModel):
     tags: List[str]
 
+def fetch_table(table: str, columns: str) -> list:
+    """Reads the given columns of a whole table through the catalog cache."""
+    return catalog_cache.get(table, columns, lambda: get_supabase().table(table).select(columns).execute().data)
+
+def get_reservation_index() -> ReservationIndex:
+    """Interval index over all requests, rebuilt whenever the requests table changes."""
+    return catalog_cache.get(
+        "requests", "index", lambda: ReservationIndex.from_requests(fetch_table("requests", RESERVATION_COLUMNS))
+    )
+
+async def afetch_table(table: str, columns: str) -> list:
+    """Async version of fetch_table, sharing the same cache entries."""
+    db = await get_async_supabase()
+    return await catalog_cache.aget(table, columns, lambda: fetch(db.table(table).select(columns)))
+
+async def aget_reservation_index() -> ReservationIndex:
+    """Async version of get_reservation_index."""
+    async def load():
+        return ReservationIndex.from_requests(await afetch_table("requests", RESERVATION_COLUMNS))
+    return await catalog_cache.aget("requests", "index", load)
+
+def availability_range(available_from: Optional[date], available_to: Optional[date]) -> Optional[tuple]:
+    """The requested (start, end) dates, or None if not filtering by availability. One date means that day."""
+    if available_from is None and available_to is None:
+        return None
+    start, end = available_from or available_to, available_to or available_from
+    if end < start:
+        raise HTTPException(status_code=400, detail="available_to must not be before available_from")
+    return start, end
+
+async def aget_snapshot(*tables: str):
+    """
+    The shared catalog snapshot if enabled and its copy of each of `tables`
+    ("listings", "tags", "requests") is current for this worker, else None
+    (read them from Supabase).
+    """
+    return await catalog_snapshot.aget(tables) if catalog_snapshot is not None else None
+
+async def asnapshot_reservations(snapshot):
+    """Availability from the snapshot, or from this worker's reservation index if it wrote reservations since."""
+    return snapshot if catalog_snapshot.is_current(snapshot, "requests") else await aget_reservation_index()
+
+async def atag_lookup() -> dict:
+    """Tag id -> name."""
+    snapshot = await aget_snapshot("tags")
+    if snapshot is not None:
+        return snapshot.tag_lookup()
+    return {tag["id"]: tag["name"] for tag in await afetch_table("tags", TAG_COLUMNS)}
+
+async def abooked_listing_ids(date_range: Optional[tuple]) -> set:
+    """Ids of listings with an approved booking during date_range, from the availability calendar."""
+    if date_range is None:
+        return set()
+    snapshot = await aget_snapshot("requests")
+    if snapshot is not None:
+        return snapshot.calendar().booked_ids(*date_range)
+    async def load():
+        from backend.scripts.availability import AvailabilityCalendar  # numpy, loaded on first use
+        return AvailabilityCalendar.from_requests(await afetch_table("requests", RESERVATION_COLUMNS))
+    calendar = await catalog_cache.aget("requests", "calendar", load)
+    return calendar.booked_ids(*date_range)
+
+async def aget_geo_index():
+    """The spatial index over listing coordinates, rebuilt periodically to pick up listings created by other workers."""
+    if listing_geo_index.is_stale():
+        listing_geo_index.rebuild(await afetch_table("listings", LISTING_CARD_COLUMNS))
+    return listing_geo_index
+
 @app.get("/")
-def read_root():
+async def read_root(available_from: Optional[date] = None, available_to: Optional[date] = None):
+    """All listing cards; with available_from/available_to, only listings free for those dates."""
     today = datetime.today().date()
-    listings = supabase.table("listings").select("*").execute().data
-    tags = supabase.table("tags").select("*").execute().data
-    requests = supabase.table("requests").select("*").execute().data
-    items = [requests["item"] for requests in requests]
+    date_range = availability_range(available_from, available_to)
+    snapshot = await aget_snapshot("listings", "tags")
+    if snapshot is not None:
+        reservations = await asnapshot_reservations(snapshot)
+        return ORJSONResponse(snapshot.listing_cards(today, await abooked_listing_ids(date_range), reservations))
+
+    listings, tags, reservations, booked = await asyncio.gather(
+        afetch_table("listings", LISTING_CARD_COLUMNS),
+        afetch_table("tags", TAG_COLUMNS),
+        aget_reservation_index(),
+        abooked_listing_ids(date_range),
+    )
+    if booked:
+        listings = [row for row in listings if row["id"] not in booked]
 
     # Create a mapping of tag ID to name for fast lookup
     tag_lookup = {tag["id"]: tag["name"] for tag in tags}
 
-    # Group requests by item ID for fast lookup
-    from collections import defaultdict
-    request_map = defaultdict(list)
-    for request in requests:
-        request_map[request["item"]].append(request)
-
     # Build the result
-    result = []
-    for row in listings:
-        # Resolve tag names
-        tag_names = [tag_lookup.get(tag_id, "Unknown") for tag_id in row["tags"]]
-
-        availability = today.strftime('%B %d')  # default availability
-
-        # Check if the listing is in use during a request
-        for request in request_map.get(row["id"], []):
-            start = datetime.strptime(request["start_date"], '%Y-%m-%d').date() - timedelta(days=1)
-            end = datetime.strptime(request["end_date"], '%Y-%m-%d').date() + timedelta(days=1)
-            if start <= today <= end:
-                new_avail = end + timedelta(days=1)
-                availability = new_avail.strftime('%B %d')
-                break  # no need to check further requests
-        result.append({
-            "id": row["id"],
-            "title": row["title"],
-            "description": row["description"],
-            "price": row["price"],
-            "location": row["location"],
-            "tags": tag_names,
-            "image_url": f"{SUPABASE_BUCKET_URL}{row['picture']}",
-            "availability": availability,
-            "rating": row.get("rating", 0),
-            "num_reviews": row.get("num_reviews", 0)
-        })
-    return result
+    return ORJSONResponse(
+        [build_listing_card(row, tag_lookup, reservations.availability(row["id"], today)) for row in listings]
+    )
 
-@app.get("/listings/{listing_id}")
-def get_listing_by_id(listing_id: int):
+FEED_MAX_LIMIT = 100
+
+@app.get("/listings/feed")
+def get_listing_feed(
+    cursor: Optional[int] = None,
+    limit: int = Query(20, ge=1, le=FEED_MAX_LIMIT),
+    tag: Optional[List[str]] = Query(None),
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    location: Optional[str] = None,
+    stream: bool = False,
+):
+    """
+    Paginated listing feed ordered by id. Pass the returned `next_cursor` back as
+    `cursor` to get the next page. Filters are applied in the Supabase query.
+    With `stream=true` the page is sent as NDJSON: one card per line, then a
+    final line holding `next_cursor`.
+    """
     today = datetime.today().date()
+    tag_lookup = {t["id"]: t["name"] for t in fetch_table("tags", TAG_COLUMNS)}
+
+    tag_ids = {name: tag_id for tag_id, name in tag_lookup.items()}
+
+    rows = []
+    # An unknown tag can't match anything, so skip the query entirely
+    if not tag or all(name in tag_ids for name in tag):
+        query = get_supabase().table("listings").select(LISTING_CARD_COLUMNS).order("id")
+        if cursor is not None:
+            query = query.gt("id", cursor)
+        if tag:
+            query = query.contains("tags", [tag_ids[name] for name in tag])
+        if min_price is not None:
+            query = query.gte("price", min_price)
+        if max_price is not None:
+            query = query.lte("price", max_price)
+        if location:
+            query = query.ilike("location", f"%{location}%")
+        # Fetch one extra row to know whether there is another page
+        rows = query.limit(limit + 1).execute().data
+
+    next_cursor = rows[limit - 1]["id"] if len(rows) > limit else None
+    rows = rows[:limit]
+
+    reservations = get_reservation_index()
+
+    def cards():
+        for row in rows:
+            yield build_listing_card(row, tag_lookup, reservations.availability(row["id"], today))
+
+    if stream:
+        def ndjson():
+            for card in cards():
+                yield orjson.dumps(card) + b"\n"
+            yield orjson.dumps({"next_cursor": next_cursor}) + b"\n"
+        return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+    return ORJSONResponse({"items": list(cards()), "next_cursor": next_cursor})
+
+@app.post("/listings/filter")
+async def filter_listings(filter_data: ListingFilter):
+    """
+    Listings matching the given tag names (all or any of them) and location,
+    answered from the inverted tag index. Takes the tags and location returned
+    by /search/analyze as-is; a location of 'unknown' is ignored. With
+    radius_km, the location is geocoded and matches are listings within that
+    distance, nearest first. With available_from/available_to, listings booked
+    on any of those days are left out.
+    """
+    today = datetime.today().date()
+    date_range = availability_range(filter_data.available_from, filter_data.available_to)
+    tag_lookup, reservations, booked = await asyncio.gather(
+        atag_lookup(), aget_reservation_index(), abooked_listing_ids(date_range)
+    )
+    # Rebuilt periodically to pick up listings created by other workers
+    if listing_tag_index.is_stale():
+        listing_tag_index.rebuild(await afetch_table("listings", LISTING_CARD_COLUMNS))
+
+    tag_ids = {name: tag_id for tag_id, name in tag_lookup.items()}
+    known = [tag_ids[name] for name in filter_data.tags if name in tag_ids]
+    if filter_data.mode == "and" and len(known) < len(filter_data.tags):
+        listing_ids = []  # a tag nobody uses can't be matched
+    elif filter_data.tags and not known:
+        listing_ids = []
+    else:
+        location = filter_data.location
+        if location and location.strip().lower() == "unknown":
+            location = None
+        place = gazetteer.geocode(location) if filter_data.radius_km else None
+        if place is None:
+            listing_ids = listing_tag_index.lookup(known, filter_data.mode, location)
+        else:
+            nearby = (await aget_geo_index()).within_radius(place.latitude, place.longitude, filter_data.radius_km)
+            if known:
+                matching = set(listing_tag_index.lookup(known, filter_data.mode))
+                listing_ids = [listing_id for listing_id, _ in nearby if listing_id in matching]
+            else:
+                listing_ids = [listing_id for listing_id, _ in nearby if listing_id in listing_tag_index.rows]
+    if booked:
+        listing_ids = [listing_id for listing_id in listing_ids if listing_id not in booked]
+
+    return ORJSONResponse({
+        "total": len(listing_ids),
+        "items": [
+            build_listing_card(listing_tag_index.rows[listing_id], tag_lookup, reservations.availability(listing_id, today))
+            for listing_id in listing_ids[:filter_data.limit]
+        ],
+    })
+
+NEARBY_MAX_RADIUS_KM = 500
+
+def nearby_response(hits: list, center: dict, limit: int, tag_lookup: dict, reservations: ReservationIndex,
+                    booked: set) -> ORJSONResponse:
+    """Distance-sorted cards for (listing id, distance) hits from the spatial index."""
+    today = datetime.today().date()
+    if booked:
+        hits = [hit for hit in hits if hit[0] not in booked]
+    rows = listing_geo_index.rows
+    return ORJSONResponse({
+        "center": center,
+        "total": len(hits),
+        "items": [
+            build_listing_card(rows[listing_id], tag_lookup, reservations.availability(listing_id, today),
+                               NearbyListingCard, distance_km=round(distance, 2))
+            for listing_id, distance in hits[:limit]
+        ],
+    })
+
+@app.get("/listings/nearby")
+async def get_nearby_listings(
+    near: Optional[str] = None,
+    lat: Optional[float] = Query(None, ge=-90, le=90),
+    lng: Optional[float] = Query(None, ge=-180, le=180),
+    radius_km: float = Query(25, gt=0, le=NEARBY_MAX_RADIUS_KM),
+    limit: int = Query(50, ge=1, le=500),
+    available_from: Optional[date] = None,
+    available_to: Optional[date] = None,
+):
+    """
+    Listings within radius_km of a point, nearest first. The point is either
+    lat/lng or a place name in `near` (e.g. the location from /search/analyze),
+    geocoded against the bundled gazetteer.
+    """
+    if lat is not None and lng is not None:
+        center = {"name": None, "latitude": lat, "longitude": lng}
+    elif near:
+        place = gazetteer.geocode(near)
+        if place is None:
+            raise HTTPException(status_code=400, detail=f"Unknown location: {near}")
+        center = {"name": place.name, "latitude": place.latitude, "longitude": place.longitude}
+    else:
+        raise HTTPException(status_code=400, detail="Pass either near or both lat and lng")
+
+    date_range = availability_range(available_from, available_to)
+    index, tag_lookup, reservations, booked = await asyncio.gather(
+        aget_geo_index(), atag_lookup(), aget_reservation_index(), abooked_listing_ids(date_range)
+    )
+    hits = index.within_radius(center["latitude"], center["longitude"], radius_km)
+    return nearby_response(hits, center, limit, tag_lookup, reservations, booked)
+
+@app.get("/listings/within")
+async def get_listings_within(
+    min_lat: float = Query(..., ge=-90, le=90),
+    min_lng: float = Query(..., ge=-180, le=180),
+    max_lat: float = Query(..., ge=-90, le=90),
+    max_lng: float = Query(..., ge=-180, le=180),
+    limit: int = Query(50, ge=1, le=500),
+    available_from: Optional[date] = None,
+    available_to: Optional[date] = None,
+):
+    """Listings inside a bounding box (e.g. the visible map area), nearest the box centre first."""
+    if max_lat < min_lat or max_lng < min_lng:
+        raise HTTPException(status_code=400, detail="max_lat/max_lng must not be below min_lat/min_lng")
+
+    date_range = availability_range(available_from, available_to)
+    index, tag_lookup, reservations, booked = await asyncio.gather(
+        aget_geo_index(), atag_lookup(), aget_reservation_index(), abooked_listing_ids(date_range)
+    )
+    hits = index.within_bbox(min_lat, min_lng, max_lat, max_lng)
+    center = {"name": None, "latitude": (min_lat + max_lat) / 2, "longitude": (min_lng + max_lng) / 2}
+    return nearby_response(hits, center, limit, tag_lookup, reservations, booked)
 
-    # Fetch specific listing
-    listings = supabase.table("listings").select("*").eq("id", listing_id).execute().data
-    if not listings:
-        raise HTTPException(status_code=404, detail="Listing not found")
-    listing = listings[0]
-
-    # Fetch all tags and requests (for name resolution and availability)
-    tags = supabase.table("tags").select("*").execute().data
-    requests = supabase.table("requests").select("*").eq("item", listing_id).execute().data
+@app.get("/listings/{listing_id}")
+async def get_listing_by_id(listing_id: int):
+    today = datetime.today().date()
+    db = await get_async_supabase()
+
+    snapshot = await aget_snapshot("listings", "tags")
+    listing = snapshot.listing_row(listing_id) if snapshot is not None else None
+    if listing is not None:
+        # The snapshot answers tag names and usually availability too
+        tag_lookup, reservations = snapshot.tag_lookup(), await asnapshot_reservations(snapshot)
+    else:
+        # Fetch the listing, plus all tags and reservations (for name resolution and availability)
+        listings, tag_lookup, reservations = await asyncio.gather(
+            catalog_cache.aget(
+                "listings", ("id", listing_id),
+                lambda: fetch(db.table("listings").select(LISTING_DETAIL_COLUMNS).eq("id", listing_id))
+            ),
+            atag_lookup(),
+            aget_reservation_index(),
+        )
+        if not listings:
+            raise HTTPException(status_code=404, detail="Listing not found")
+        listing = listings[0]
 
-    # Build tag lookup
-    tag_lookup = {tag["id"]: tag["name"] for tag in tags}
     tag_names = [tag_lookup.get(tag_id, "Unknown") for tag_id in listing["tags"]]
 
     # Calculate availability
-    availability = today.strftime('%B %d')
-    for request in requests:
-        start = datetime.strptime(request["start_date"], '%Y-%m-%d').date() - timedelta(days=1)
-        end = datetime.strptime(request["end_date"], '%Y-%m-%d').date() + timedelta(days=1)
-        if start <= today <= end:
-            availability = (end + timedelta(days=1)).strftime('%B %d')
-            break
-    user = supabase.table("users").select("*").eq("id", listing["user"]).execute().data[0]
-    requests = (
-        supabase.table("requests")
-        .select("*")
-        .eq("approve", 1)
-        .eq("item", listing_id)
-        .execute()
-        .data
-    )
-    unavailable_dates = []
-    for request in requests:
-        unavailable_dates.append({ "start": request["start_date"], "end": request["end_date"] })
-    return {
-        "id": listing["id"],
-        "title": listing["title"],
-        "description": listing["description"],
-        "price": listing["price"],
-        "location": listing["location"],
-        "tags": tag_names,
-        "image_url": f"{SUPABASE_BUCKET_URL}{listing['picture']}",
-        "availability": availability,
-        "user": user["fname"] + " " + user["lname"],
-        "rating": listing.get("rating", 0),
-        "num_reviews": listing.get("num_reviews", 0),
-        "unavailable_dates": unavailable_dates
-    }
+    availability = reservations.availability(listing_id, today)
+    user = (await catalog_cache.aget(
+        "users", ("id", listing["user"]),
+        lambda: fetch(db.table("users").select(USER_COLUMNS).eq("id", listing["user"]))
+    ))[0]
+    unavailable_dates = reservations.approved_ranges(listing_id)
+    return ORJSONResponse(ListingDetail(
+        id=listing["id"],
+        title=listing["title"],
+        description=listing["description"],
+        price=listing["price"],
+        location=listing["location"],
+        tags=tag_names,
+        image_url=f"{SUPABASE_BUCKET_URL}{listing['picture']}",
+        availability=availability,
+        rating=listing.get("rating", 0),
+        num_reviews=listing.get("num_reviews", 0),
+        user=user["fname"] + " " + user["lname"],
+        unavailable_dates=unavailable_dates,
+    ))
 
 class ReservationRequest(BaseModel):
     item: int
@@ -168,8 +424,19 @@ class ReservationRequest(BaseModel):
 
 @app.post("/requests")
 def create_reservation(reservation: ReservationRequest):
+    try:
+        start = parse_date(reservation.start_date)
+        end = parse_date(reservation.end_date)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Dates must be in YYYY-MM-DD format")
+    if end < start:
+        raise HTTPException(status_code=400, detail="end_date must not be before start_date")
+
+    if get_reservation_index().conflicts(reservation.item, start, end):
+        raise HTTPException(status_code=409, detail="Item is already booked for some of these dates")
+
     # Insert reservation into the 'requests' table
-    response = supabase.table("requests").insert({
+    response = get_supabase().table("requests").insert({
         "item": reservation.item,
         "requested_user": 1,
         "start_date": reservation.start_date,
@@ -177,6 +444,7 @@ def create_reservation(reservation: ReservationRequest):
         "message": reservation.message,
         "approve": 0  # default to not approved yet
     }).execute()
+    catalog_cache.invalidate("requests")
 
     # if response.status_code != 201:
     #     raise HTTPException(status_code=400, detail="Failed to create reservation")
@@ -184,147 +452,117 @@ def create_reservation(reservation: ReservationRequest):
     return {"message": "Reservation request submitted successfully"}
 
 @app.get("/profile")
-def get_profile():
+async def get_profile():
     user_id = 1
-    user = supabase.table("users").select("*").eq("id", user_id).execute().data[0]
-    data = {}
-    data["name"] = user["fname"] + " " + user["lname"]
-
-    upcoming_rentals = []
     today_str = datetime.today().strftime("%Y-%m-%d")
-    requests = supabase.table("requests")\
-        .select("*")\
-        .eq("requested_user", user_id)\
-        .gt("start_date", today_str)\
-        .eq("approve", 1)\
-        .execute()\
-        .data
-    
-    for request in requests:
-        item = supabase.table("listings").select("*").eq("id", request["item"]).execute().data[0]
-        owner = supabase.table("users").select("*").eq("id", item["user"]).execute().data[0]
-        curr = {
-            "id": request["id"],
-            "item": item["title"],
-            "start_date": request["start_date"],
-            "end_date": request["end_date"],
-            "renter": owner["fname"] + " " + owner["lname"],
-            "price": item["price"],
-            "status": "Confirmed",
-        }
-        upcoming_rentals.append(curr)
-    
-    data["upcoming_rentals"] = upcoming_rentals
-
-    past_rentals = []
-    requests = supabase.table("requests")\
-        .select("*")\
-        .eq("requested_user", user_id)\
-        .lt("start_date", today_str)\
-        .eq("approve", 1)\
-        .execute()\
-        .data
-    for request in requests:
-        item = supabase.table("listings").select("*").eq("id", request["item"]).execute().data[0]
-        owner = supabase.table("users").select("*").eq("id", item["user"]).execute().data[0]
-        curr = {
-            "id": request["id"],
-            "item": item["title"],
-            "start_date": request["start_date"],
-            "end_date": request["end_date"],
-            "renter": owner["fname"] + " " + owner["lname"],
-            "price": item["price"],
-            "status": "Rented",
-        }
-        past_rentals.append(curr)
-    
-    data["past_rentals"] = past_rentals
+    db = await get_async_supabase()
+
+    # Rows are gathered per section first, then every listing and user they
+    # reference is fetched with a single in_() query per table
+    listings = BatchLoader(db, "listings", columns=PROFILE_LISTING_COLUMNS)
+    users = BatchLoader(db, "users", columns=USER_COLUMNS)
+    users.want(user_id)
+
+    # The user's own requests (split into sections below), their own listings and the tags
+    my_requests, my_listings, tags = await asyncio.gather(
+        fetch(db.table("requests").select(PROFILE_REQUEST_COLUMNS).eq("requested_user", user_id)),
+        fetch(db.table("listings").select(PROFILE_LISTING_COLUMNS).eq("user", user_id)),
+        afetch_table("tags", TAG_COLUMNS),
+    )
+    approved = [r for r in my_requests if r["approve"] == 1]
+    upcoming_requests = [r for r in approved if r["start_date"] > today_str]
+    past_requests = [r for r in approved if r["start_date"] < today_str]
+    open_requests = [r for r in my_requests if r["approve"] == 0]
+    listings.prime(my_listings)
+    listings.want(*(r["item"] for r in my_requests))
+
+    # Pending requests for the user's listings, fetched alongside the listing batch
+    async def load_pending():
+        item_ids = [item["id"] for item in my_listings]
+        if not item_ids:
+            return []
+        return await fetch(db.table("requests").select(PROFILE_REQUEST_COLUMNS).eq("approve", 0).in_("item", item_ids))
+
+    pending, _ = await asyncio.gather(load_pending(), listings.load())
+    users.want(*(r["requested_user"] for r in pending))
+    users.want(*(listings.get(r["item"])["user"] for r in approved))
+    await users.load()
+
+    user = users.get(user_id)
+
+    def rental(request, status):
+        item = listings.get(request["item"])
+        owner = users.get(item["user"])
+        return Rental(
+            id=request["id"],
+            item=item["title"],
+            start_date=request["start_date"],
+            end_date=request["end_date"],
+            renter=owner["fname"] + " " + owner["lname"],
+            price=item["price"],
+            status=status,
+        )
 
     listed_items = []
-    requests = supabase.table("listings")\
-        .select("*")\
-        .eq("user", user_id)\
-        .execute()\
-        .data
-    tags = supabase.table("tags").select("*").execute().data
     tag_lookup = {tag["id"]: tag["name"] for tag in tags}
-    for request in requests:
-
-        curr = {
-            "id": request["id"],
-            "name": request["title"],
-            "category": tag_lookup.get(request["tags"][0], "Unknown"),
-            "price": request["price"],
-            "status": 'active',
-            "views": random.randint(150, 300),
-            "bookings": random.randint(5, 15),
-        }
-        listed_items.append(curr)
-    
-    data["listed_items"] = listed_items
+    for item in my_listings:
+        listed_items.append(ListedItem(
+            id=item["id"],
+            name=item["title"],
+            category=tag_lookup.get(item["tags"][0], "Unknown"),
+            price=item["price"],
+            status='active',
+            views=random.randint(150, 300),
+            bookings=random.randint(5, 15),
+        ))
 
     your_requests = []
-    requests = supabase.table("requests")\
-        .select("*")\
-        .eq("requested_user", user_id)\
-        .eq("approve", 0)\
-        .execute()\
-        .data
-    items = supabase.table("listings").select("*").execute().data
-    items_lookup = {item["id"]: item for item in items}
-    for request in requests:
-
-        curr = {
-            "id": request["id"],
-            "image": "https://ftwuonnxcfpinajqnacp.supabase.co/storage/v1/object/public/listings//" + items_lookup[request["item"]]["picture"],
-            "title": items_lookup[request["item"]]["title"],
-            "user": items_lookup[request["item"]]["user"],
-            "start_date": request["start_date"],
-            "end_date": request["end_date"],
-            "message": request["message"],
-        }
-        your_requests.append(curr)
-    
-    data["your_requests"] = your_requests
+    for request in open_requests:
+        item = listings.get(request["item"])
+        your_requests.append(RequestCard(
+            id=request["id"],
+            image=SUPABASE_BUCKET_URL + item["picture"],
+            title=item["title"],
+            user=item["user"],
+            start_date=request["start_date"],
+            end_date=request["end_date"],
+            message=request["message"],
+        ))
 
     pending_requests = []
-    item_list = supabase.table("listings").select("*").eq("user", 1).execute().data
-    item_ids = [item["id"] for item in item_list]
-
-    requests = supabase.table("requests")\
-        .select("*")\
-        .eq("approve", 0)\
-        .in_("item", item_ids)\
-        .execute()\
-        .data
-    users = supabase.table("users").select("*").execute().data
-    users_lookup = {user["id"]: user for user in users}
-    for request in requests:
-
-        curr = {
-            "id": request["id"],
-            "image": "https://ftwuonnxcfpinajqnacp.supabase.co/storage/v1/object/public/listings//" + items_lookup[request["item"]]["picture"],
-            "title": items_lookup[request["item"]]["title"],
-            "user": users_lookup[request["requested_user"]]["fname"] + " " + users_lookup[request["requested_user"]]["lname"],
-            "start_date": request["start_date"],
-            "end_date": request["end_date"],
-            "message": request["message"],
-        }
-        pending_requests.append(curr)
-    
-    data["pending_requests"] = pending_requests
-
-    return data
+    for request in pending:
+        item = listings.get(request["item"])
+        requester = users.get(request["requested_user"])
+        pending_requests.append(RequestCard(
+            id=request["id"],
+            image=SUPABASE_BUCKET_URL + item["picture"],
+            title=item["title"],
+            user=requester["fname"] + " " + requester["lname"],
+            start_date=request["start_date"],
+            end_date=request["end_date"],
+            message=request["message"],
+        ))
+
+    return ORJSONResponse(Profile(
+        name=user["fname"] + " " + user["lname"],
+        upcoming_rentals=[rental(request, "Confirmed") for request in upcoming_requests],
+        past_rentals=[rental(request, "Rented") for request in past_requests],
+        listed_items=listed_items,
+        your_requests=your_requests,
+        pending_requests=pending_requests,
+    ))
 
 @app.get("/users")
 def get_users():
-    return supabase.table("users").select("*").execute().data
+    # Every column, as before: clients may rely on fields the app itself doesn't read
+    return fetch_table("users", "*")
 @app.post("/users")
 def add_user(user: UserCreate):
-    response = supabase.table("users").insert({
+    response = get_supabase().table("users").insert({
         "fname": user.first_name,
         "lname": user.last_name
     }).execute()
+    catalog_cache.invalidate("users")
 
     if not response.data:  # Insert failed, no data returned
         return {"error": "Failed to insert user."}
@@ -332,9 +570,9 @@ def add_user(user: UserCreate):
     return {"message": "User added successfully", "data": response.data}
 
 @app.post("/tags/verify")
-def verify_tags_endpoint(tags_data: TagsVerify):
+async def verify_tags_endpoint(tags_data: TagsVerify):
     try:
-        verify_and_add_tags(tags_data.tags)
+        await verify_and_add_tags(tags_data.tags)
         return {"message": "Tags verified and added successfully."}
     except Exception as e:
         return {"error": f"Failed to verify tags: {str(e)}"}
@@ -342,76 +580,87 @@ def verify_tags_endpoint(tags_data: TagsVerify):
 @app.get("/tags")
 def get_tags():
     try:
-        response = supabase.table("tags").select("name").execute()
-        if not response.data:
+        rows = fetch_table("tags", TAG_COLUMNS)
+        if not rows:
             return {"tags": []}
         
-        tags = [item['name'] for item in response.data]
+        tags = [item['name'] for item in rows]
         return {"tags": tags}
     except Exception as e:
         return {"error": f"Failed to fetch tags: {str(e)}"}
 
 @app.post("/listings/generate-details")
-async def generate_details_from_upload(file: UploadFile = File(...)):
+async def generate_details_from_upload(file: UploadFile = File(...), background: bool = False):
     """
     Accepts an image upload, generates details and tags, verifies the tags,
     uploads the image to storage, and returns the details.
+    With `background=true` the work is queued and a job id is returned
+    immediately; poll /listings/generate-details/jobs/{job_id} for the result.
     """
     try:
-        image_bytes = await file.read()
-        
-        # 1. Generate description and tags from image
-        details = generate_details_from_image_bytes(image_bytes)
-        title = details.get("title", "Generated Item")
-        description = details.get("description", "No description generated.")
-        initial_tags = details.get("tags", [])
-
-        # 2. Verify and clean the tags
-        verified_tags = verify_and_add_tags(initial_tags)
-
-        # 3. Upload image to Supabase Storage
-        bucket_name = "listings"
-        # Sanitize filename to prevent path traversal issues, although UUID is safer
-        safe_filename = file.filename.replace("..", "").replace("/", "")
-        # Use a simpler path for the DB
-        image_path = f"public/{uuid.uuid4()}-{safe_filename}"
-        
-        # Reset file pointer before upload
-        await file.seek(0)
-        
-        supabase.storage.from_(bucket_name).upload(
-            file=image_bytes,
-            path=image_path,
-            file_options={"content-type": file.content_type}
-        )
-
-        # 4. Get public URL for the uploaded image
-        image_url = supabase.storage.from_(bucket_name).get_public_url(image_path)
-        
-        return {
-            "title": title,
-            "description": description,
-            "tags": verified_tags,
-            "photo_url": image_url, # For frontend display
-            "photo_path": image_path  # For frontend to send back when creating listing
-        }
+        image_bytes = await read_upload_limited(file)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+    # The same photo uploaded again reuses its earlier details and storage object
+    digest = content_hash(image_bytes)
+    previous = upload_dedup.lookup(digest)
+    if previous is not None:
+        return {**previous, "deduplicated": True}
+
+    if background:
+        try:
+            job = await detail_jobs.submit(image_bytes, file.filename, file.content_type, digest)
+        except QueueFull as e:
+            raise HTTPException(status_code=503, detail=f"Too many images are being processed: {e}")
+        return JSONResponse(status_code=202, content={
+            "job_id": job.id,
+            "status": job.status,
+            "status_url": f"/listings/generate-details/jobs/{job.id}",
+        })
 
+    try:
+        return await generate_listing_details(image_bytes, file.filename, file.content_type, digest)
     except Exception as e:
         return {"error": f"Failed to process image: {str(e)}"}
 
+@app.get("/listings/generate-details/jobs")
+async def get_detail_job_stats():
+    """Queue depth, worker usage and per-stage timings of the detail pipeline."""
+    return await detail_jobs.stats()
+
+@app.get("/listings/generate-details/jobs/{job_id}")
+async def get_detail_job(job_id: str):
+    """Status of a background job; answered by any worker, since jobs are kept in SQLite."""
+    job = await detail_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+
+async def index_listing_for_search(listing: dict):
+    from backend.scripts.listing_index import index_listings  # numpy, loaded on first use
+    try:
+        await index_listings([listing])
+    except Exception as e:
+        # The next search indexes anything that was missed
+        print(f"Failed to index listing {listing['id']} for search: {e}")
 
 @app.post("/listings", response_model=Listing)
-def create_listing(listing_data: ListingCreate):
+async def create_listing(listing_data: ListingCreate, background_tasks: BackgroundTasks):
     """
     Creates a new listing in the database.
     Handles converting tag names (str) to tag IDs (int).
     """
+    # Async so the tag and geo index updates below run on the event loop, where
+    # the filter and nearby handlers read them, rather than in the threadpool
+    db = await get_async_supabase()
     try:
         # 1. Convert tag names to tag IDs
         tag_names = listing_data.tags
         
         # Fetch all tags from DB that match the names provided
-        tags_response = supabase.table("tags").select("id, name").in_("name", tag_names).execute()
+        tags_response = await db.table("tags").select("id, name").in_("name", tag_names).execute()
         
         if not tags_response.data and tag_names:
             # This case is unlikely if tags come from our verification step, but good to have
@@ -425,28 +674,62 @@ def create_listing(listing_data: ListingCreate):
         listing_dict['tags'] = tag_ids # Replace string tags with int IDs
 
         # 3. Insert the new listing into the database
-        insert_response = supabase.table("listings").insert(listing_dict).execute()
+        insert_response = await db.table("listings").insert(listing_dict).execute()
+        catalog_cache.invalidate("listings")
 
         if not insert_response.data:
             raise HTTPException(status_code=500, detail="Failed to create listing in database.")
 
         # 4. Return the newly created listing data
         created_listing = insert_response.data[0]
+        listing_tag_index.add_listing(created_listing)
+        listing_geo_index.add_listing(created_listing)
+        # Embed the new listing for search after the response is sent
+        background_tasks.add_task(index_listing_for_search, created_listing)
         return created_listing
 
     except Exception as e:
         # Catch potential exceptions from DB or logic
         raise HTTPException(status_code=500, detail=f"An error occurred: {str(e)}")
 
+@app.post("/listings/bulk")
+async def bulk_import_listings(file: UploadFile = File(...), format: Optional[str] = Query(None, pattern="^(csv|jsonl)$")):
+    """
+    Imports many listings from a CSV or JSONL upload (format taken from the file
+    extension unless given). Returns counts and per-row errors; rows that fail
+    validation or insertion don't stop the rest. New listings are embedded for
+    search by the next search request. A file that isn't UTF-8 is rejected with
+    400, or stops the import at that point if earlier chunks were inserted.
+    """
+    try:
+        return await import_upload(file, format)
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="File must be UTF-8 encoded")
+
+async def analyze_prompt(prompt: str) -> dict:
+    """
+    Runs classify_search_prompt, answering repeated phrasings from the cache and
+    prompts that are just tag names and a place from the local classifier.
+    """
+    result = search_cache.get(prompt)
+    if result is None:
+        result = local_classifier.classify(prompt, list((await atag_lookup()).values()))
+        if result is None:
+            start = time.perf_counter()
+            result = await classify_search_prompt(prompt)
+            local_classifier.record_fallback(time.perf_counter() - start)
+            await search_cache.aset(prompt, result)
+    return result
+
 @app.post("/search/analyze", response_model=SearchResult)
-def analyze_search_prompt(search_data: SearchPrompt):
+async def analyze_search_prompt(search_data: SearchPrompt):
     """
     Analyzes a user's search prompt and returns relevant tags, description, and location.
     This endpoint calls the search_tags.py functionality to process natural language queries.
     """
     try:
         # Call the search_tags function to analyze the prompt
-        result = classify_search_prompt(search_data.prompt)
+        result = await analyze_prompt(search_data.prompt)
         
         return SearchResult(
             tags=result.get("tags", []),
@@ -457,4 +740,81 @@ def analyze_search_prompt(search_data: SearchPrompt):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to analyze search prompt: {str(e)}")
 
+@app.post("/search/listings")
+async def search_listings(search_data: ListingSearch):
+    """
+    Semantic listing search: analyzes the prompt, embeds the analysis and
+    returns the closest listings from the vector index as ranked cards,
+    optionally only those free between available_from and available_to.
+    """
+    from backend.scripts.listing_index import listing_index, index_in_background  # numpy, loaded on first use
+    date_range = availability_range(search_data.available_from, search_data.available_to)
+    try:
+        analysis = await analyze_prompt(search_data.prompt)
+        listings, tag_lookup, reservations, booked = await asyncio.gather(
+            afetch_table("listings", LISTING_CARD_COLUMNS),
+            atag_lookup(),
+            aget_reservation_index(),
+            abooked_listing_ids(date_range),
+        )
+        # Normally a no-op: listings are indexed when they are created
+        index_in_background(listings)
+
+        query_text = " ".join([analysis.get("description", "")] + analysis.get("tags", [])).strip()
+        query_vector = await get_embedding(query_text or search_data.prompt)
+        rows_by_id = {row["id"]: row for row in listings if row["id"] not in booked}
+        matches = listing_index.query(query_vector, k=search_data.limit, allowed_ids=rows_by_id.keys())
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to search listings: {str(e)}")
 
+    today = datetime.today().date()
+    items = [
+        build_listing_card(rows_by_id[listing_id], tag_lookup, reservations.availability(listing_id, today),
+                           ScoredListingCard, score=round(score, 4))
+        for listing_id, score in matches
+    ]
+    return ORJSONResponse({
+        "tags": analysis.get("tags", []),
+        "description": analysis.get("description", ""),
+        "location": analysis.get("location", "unknown"),
+        "items": items,
+    })
+
+@app.get("/listings/generate-details/dedup")
+def get_upload_dedup_stats():
+    """Hit/miss counts for content-hash deduplication of uploads."""
+    return upload_dedup.stats()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """Request and upstream call latency histograms in Prometheus text format."""
+    if not METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/openai/single-flight")
+def get_single_flight_stats():
+    """Per function: upstream calls made and concurrent identical calls that shared one."""
+    return single_flight.stats()
+
+@app.get("/openai/embedding-batches")
+def get_embedding_batch_stats():
+    """Batch size distribution and queueing delay of batched embedding calls."""
+    return embedding_batcher.stats()
+
+@app.get("/search/fast-path")
+def get_search_fast_path_stats():
+    """How often /search/analyze was answered by the local classifier, and the LLM time that saved."""
+    return local_classifier.stats()
+
+@app.get("/catalog/snapshot")
+def get_catalog_snapshot_stats():
+    """Size, age and refresh count of the shared catalog snapshot in this worker."""
+    if catalog_snapshot is None:
+        return {"enabled": False}
+    return catalog_snapshot.stats()
+
+@app.get("/search/cache")
+def get_search_cache_stats():
+    """Hit/miss counts for the /search/analyze prompt cache."""
+    return search_cache.stats()
@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import List, Optional
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
 from datetime import datetime, date
 
 class Tag(BaseModel):
@@ -63,3 +63,21 @@ class SearchResult(BaseModel):
     tags: List[str]
     description: str
     location: str
+
+class ListingSearch(BaseModel):
+    prompt: str
+    limit: int = Field(20, ge=1, le=100)
+    # Only listings with no approved booking in [available_from, available_to]
+    available_from: Optional[date] = None
+    available_to: Optional[date] = None
+
+# Tag/location filter; accepts the tags and location returned by /search/analyze
+class ListingFilter(BaseModel):
+    tags: List[str] = []
+    location: Optional[str] = None
+    mode: Literal["and", "or"] = "or"
+    limit: int = Field(50, ge=1, le=500)
+    available_from: Optional[date] = None
+    available_to: Optional[date] = None
+    # With a radius, location is geocoded and listings within radius_km of it match
+    radius_km: Optional[float] = Field(None, gt=0, le=500)
@@ -0,0 +1,60 @@
+import asyncio
+import os
+import threading
+from typing import Optional
+from gotrue import AsyncMemoryStorage
+from supabase import acreate_client, create_client, AClient, AClientOptions, Client
+
+from backend.scripts.metrics import instrument_supabase
+
+# Shared Supabase clients. Both are created on first use rather than at import
+# so a worker starts without touching the network. The async client serves the
+# read-heavy endpoints: one client per worker reuses its HTTP connection pool,
+# and independent queries can be awaited together with asyncio.gather.
+# Queries on both clients are timed per table (see metrics.py).
+
+POSTGREST_TIMEOUT_SECONDS = float(os.getenv("SUPABASE_TIMEOUT", "10"))
+
+_client: Optional[AClient] = None
+_client_lock = asyncio.Lock()
+_sync_client: Optional[Client] = None
+_sync_client_lock = threading.Lock()
+
+
+def get_supabase() -> Client:
+    """Returns the shared sync Supabase client, creating it on first use."""
+    global _sync_client
+    if _sync_client is None:
+        with _sync_client_lock:
+            if _sync_client is None:
+                _sync_client = instrument_supabase(
+                    create_client(os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY")), is_async=False
+                )
+    return _sync_client
+
+
+async def get_async_supabase() -> AClient:
+    """Returns the shared async Supabase client, creating it on first use."""
+    global _client
+    if _client is None:
+        async with _client_lock:
+            if _client is None:
+                _client = instrument_supabase(await acreate_client(
+                    os.getenv("SUPABASE_URL"),
+                    os.getenv("SUPABASE_KEY"),
+                    AClientOptions(storage=AsyncMemoryStorage(), postgrest_client_timeout=POSTGREST_TIMEOUT_SECONDS),
+                ), is_async=True)
+    return _client
+
+
+async def close_async_supabase():
+    """Closes the pooled connections of the shared client (on app shutdown)."""
+    global _client
+    if _client is not None and _client._postgrest is not None:
+        await _client._postgrest.aclose()
+    _client = None
+
+
+async def fetch(query) -> list:
+    """Executes a query builder from the async client and returns its rows."""
+    return (await query.execute()).data
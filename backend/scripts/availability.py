@@ -0,0 +1,88 @@
+import os
+from datetime import date
+from typing import Optional
+
+import numpy as np
+
+# Booked days of every listing as a bitmap: one row per listing with approved
+# bookings, one bit per day from `origin` for `days` days (8 days per byte).
+# "Which listings are booked on any day of [start, end]" is a single AND + any
+# over the byte columns covering the range, for the whole catalog at once.
+# Listings without a row have no bookings.
+
+CALENDAR_HORIZON_DAYS = int(os.getenv("CALENDAR_HORIZON_DAYS", "730"))
+
+
+class AvailabilityCalendar:
+    def __init__(self, origin: date, days: int = CALENDAR_HORIZON_DAYS):
+        self.origin = np.datetime64(origin, "D")
+        self.days = days
+        self.listing_ids = np.empty(0, dtype=np.int64)
+        self.bits = np.zeros((0, (days + 7) // 8), dtype=np.uint8)
+
+    def __len__(self) -> int:
+        return len(self.listing_ids)
+
+    @classmethod
+    def from_requests(cls, requests: list, origin: Optional[date] = None,
+                      days: int = CALENDAR_HORIZON_DAYS) -> "AvailabilityCalendar":
+        """Builds the calendar from `requests` rows; only approved requests book days."""
+        calendar = cls(origin or date.today(), days)
+        approved = [r for r in requests if r.get("approve") == 1]
+        if not approved:
+            return calendar
+
+        items = np.fromiter((r["item"] for r in approved), dtype=np.int64, count=len(approved))
+        starts = (np.array([r["start_date"] for r in approved], dtype="datetime64[D]") - calendar.origin).astype(np.int64)
+        ends = (np.array([r["end_date"] for r in approved], dtype="datetime64[D]") - calendar.origin).astype(np.int64)
+
+        # Clip to the horizon and drop bookings entirely outside it
+        starts = np.maximum(starts, 0)
+        ends = np.minimum(ends, days - 1)
+        keep = starts <= ends
+        items, starts, ends = items[keep], starts[keep], ends[keep]
+
+        calendar.listing_ids, rows = np.unique(items, return_inverse=True)
+        calendar.bits = np.zeros((len(calendar.listing_ids), calendar.bits.shape[1]), dtype=np.uint8)
+
+        # Expand every booking into (row, day) pairs and set those bits
+        lengths = ends - starts + 1
+        offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        booked_rows = np.repeat(rows, lengths)
+        booked_days = np.repeat(starts, lengths) + offsets
+        np.bitwise_or.at(calendar.bits, (booked_rows, booked_days >> 3),
+                         np.left_shift(1, booked_days & 7).astype(np.uint8))
+        return calendar
+
+    def _range_mask(self, start: date, end: date) -> Optional[tuple[slice, np.ndarray]]:
+        """Byte columns covering [start, end] and the bit mask for them; None if outside the horizon."""
+        lo = max(int((np.datetime64(start, "D") - self.origin).astype(np.int64)), 0)
+        hi = min(int((np.datetime64(end, "D") - self.origin).astype(np.int64)), self.days - 1)
+        if lo > hi:
+            return None
+        wanted = np.zeros(self.days, dtype=bool)
+        wanted[lo:hi + 1] = True
+        columns = slice(lo >> 3, (hi >> 3) + 1)
+        return columns, np.packbits(wanted, bitorder="little")[columns]
+
+    def booked_mask(self, start: date, end: date) -> np.ndarray:
+        """Boolean per calendar row: booked on at least one day of [start, end]."""
+        found = self._range_mask(start, end)
+        if found is None or not len(self):
+            return np.zeros(len(self), dtype=bool)
+        columns, mask = found
+        return np.bitwise_and(self.bits[:, columns], mask).any(axis=1)
+
+    def booked_ids(self, start: date, end: date) -> set[int]:
+        """Ids of listings with an approved booking on any day of [start, end]."""
+        return set(self.listing_ids[self.booked_mask(start, end)].tolist())
+
+    def is_available(self, listing_id: int, start: date, end: date) -> bool:
+        row = np.searchsorted(self.listing_ids, listing_id)
+        if row == len(self) or self.listing_ids[row] != listing_id:
+            return True
+        found = self._range_mask(start, end)
+        if found is None:
+            return True
+        columns, mask = found
+        return not np.bitwise_and(self.bits[row, columns], mask).any()
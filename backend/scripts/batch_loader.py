@@ -0,0 +1,49 @@
+# Request-scoped batching loader: collect the ids a response needs, then fetch
+# them with one `in_()` query per table instead of one query per row.
+
+
+class BatchLoader:
+    """
+    Loads rows of one table by key through the async Supabase client. Ids passed
+    to `want` are queued and fetched together on the next `load`; rows already
+    loaded are memoized, so a loader should live only as long as the request
+    that created it.
+    """
+
+    def __init__(self, supabase, table: str, key: str = "id", columns: str = "*"):
+        self.supabase = supabase
+        self.table = table
+        self.key = key
+        self.columns = columns
+        self.queries = 0
+        self._rows: dict = {}
+        self._missing: set = set()
+        self._pending: set = set()
+
+    def want(self, *ids):
+        """Queues ids to be fetched in the next batch."""
+        for id_ in ids:
+            if id_ is not None and id_ not in self._rows and id_ not in self._missing:
+                self._pending.add(id_)
+
+    def prime(self, rows: list):
+        """Adds rows fetched elsewhere so they don't need to be queried again."""
+        for row in rows:
+            self._rows[row[self.key]] = row
+            self._pending.discard(row[self.key])
+
+    async def load(self, *ids) -> dict:
+        """Fetches every queued id (plus `ids`) in one query and returns key -> row for `ids`."""
+        self.want(*ids)
+        if self._pending:
+            batch = list(self._pending)
+            self._pending.clear()
+            rows = (await self.supabase.table(self.table).select(self.columns).in_(self.key, batch).execute()).data
+            self.queries += 1
+            self.prime(rows)
+            self._missing.update(id_ for id_ in batch if id_ not in self._rows)
+        return {id_: self._rows[id_] for id_ in ids if id_ in self._rows}
+
+    def get(self, id_):
+        """Returns an already loaded row, or None if it wasn't loaded or doesn't exist."""
+        return self._rows.get(id_)
@@ -0,0 +1,220 @@
+import argparse
+import asyncio
+import csv
+import io
+import json
+import os
+import sys
+import time
+from itertools import count, islice
+from typing import Iterable, Iterator, Optional
+
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from pydantic import ValidationError
+
+from backend.schemas import ListingCreate
+from backend.scripts.async_db import get_async_supabase
+from backend.scripts.catalog_cache import catalog_cache
+from backend.scripts.tag_index import listing_tag_index
+from backend.scripts.geo_index import listing_geo_index
+from backend.scripts.tag_verification import resolve_tags
+
+# Bulk listing import from CSV or JSONL. Rows are streamed in chunks; tag names
+# for a chunk are resolved with one resolve_tags call (names already resolved
+# in earlier chunks are reused), and each chunk is one multi-row insert.
+# Bad rows are reported individually without aborting the import.
+
+BULK_CHUNK_SIZE = int(os.getenv("BULK_IMPORT_CHUNK_SIZE", "500"))
+MAX_REPORTED_ERRORS = 1000
+
+
+def split_tags(value) -> list[str]:
+    """Tags may be a JSON list or a ';' / '|' separated string (CSV)."""
+    if isinstance(value, list):
+        return [str(tag).strip() for tag in value if str(tag).strip()]
+    if not value:
+        return []
+    if not isinstance(value, str):
+        raise ValueError("tags: must be a list or a string")
+    for separator in (";", "|"):
+        if separator in value:
+            return [tag.strip() for tag in value.split(separator) if tag.strip()]
+    return [value.strip()]
+
+
+def iter_records(stream: Iterable[str], fmt: str) -> Iterator[tuple[int, object]]:
+    """Yields (row number, raw record) from a text stream; CSV and JSON errors are yielded as exceptions."""
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for number in count(1):
+            try:
+                record = next(reader)
+            except StopIteration:
+                return
+            except csv.Error as e:
+                # The reader carries on with the next line
+                record = e
+            yield number, record
+    elif fmt == "jsonl":
+        number = 0
+        for line in stream:
+            if not line.strip():
+                continue
+            number += 1
+            try:
+                yield number, json.loads(line)
+            except json.JSONDecodeError as e:
+                yield number, e
+    else:
+        raise ValueError(f"Unsupported format '{fmt}', expected csv or jsonl")
+
+
+def detect_format(filename: Optional[str]) -> str:
+    return "jsonl" if filename and filename.lower().endswith((".jsonl", ".ndjson", ".json")) else "csv"
+
+
+def parse_record(record) -> ListingCreate:
+    if isinstance(record, csv.Error):
+        raise ValueError(f"Invalid CSV row: {record}")
+    if isinstance(record, Exception):
+        raise ValueError(f"Invalid JSON: {record}")
+    if not isinstance(record, dict):
+        raise ValueError("Row must be an object")
+    if None in record:
+        # csv.DictReader keeps fields beyond the header under None
+        raise ValueError(f"Row has {len(record[None])} more field(s) than the header")
+    record = {key: value for key, value in record.items() if value not in ("", None)}
+    record["tags"] = split_tags(record.get("tags"))
+    return ListingCreate(**record)
+
+
+def describe_error(error: Exception) -> str:
+    if isinstance(error, ValidationError):
+        return "; ".join(f"{'.'.join(map(str, e['loc']))}: {e['msg']}" for e in error.errors())
+    return str(error)
+
+
+class ImportReport:
+    def __init__(self):
+        self.rows = 0
+        self.inserted = 0
+        self.failed = 0
+        self.errors: list[dict] = []
+        self.started = time.perf_counter()
+
+    def error(self, row: int, message: str):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row, "error": message})
+
+    def to_dict(self) -> dict:
+        seconds = time.perf_counter() - self.started
+        return {
+            "rows": self.rows,
+            "inserted": self.inserted,
+            "failed": self.failed,
+            "errors": self.errors,
+            "seconds": round(seconds, 3),
+            "rows_per_second": round(self.rows / seconds, 1) if seconds else None,
+        }
+
+
+async def _resolve_tag_ids(supabase, names: list[str], resolved: dict, tag_ids: dict):
+    """Resolves new tag names (similar -> existing tag) and looks up the ids of the results."""
+    new_names = [name for name in dict.fromkeys(names) if name not in resolved]
+    if not new_names:
+        return
+    resolved.update(await resolve_tags(new_names))
+    missing = [name for name in dict.fromkeys(resolved[n] for n in new_names) if name not in tag_ids]
+    if missing:
+        rows = (await supabase.table("tags").select("id, name").in_("name", missing).execute()).data
+        tag_ids.update({row["name"]: row["id"] for row in rows})
+
+
+async def _insert_chunk(supabase, chunk: list, report: ImportReport):
+    """One multi-row insert; if the database rejects it, retry row by row to find the bad rows."""
+    try:
+        inserted = (await supabase.table("listings").insert([row for _, row in chunk]).execute()).data
+    except Exception:
+        inserted = []
+        for number, row in chunk:
+            try:
+                inserted.extend((await supabase.table("listings").insert(row).execute()).data)
+            except Exception as e:
+                report.error(number, f"Insert failed: {e}")
+    for row in inserted:
+        listing_tag_index.add_listing(row)
+        listing_geo_index.add_listing(row)
+    report.inserted += len(inserted)
+
+
+async def import_listings(stream: Iterable[str], fmt: str = "csv", chunk_size: int = BULK_CHUNK_SIZE) -> dict:
+    """Imports listings from a CSV or JSONL text stream and returns a report."""
+    supabase = await get_async_supabase()
+    report = ImportReport()
+    resolved: dict[str, str] = {}
+    tag_ids: dict[str, int] = {}
+    records = iter_records(stream, fmt)
+
+    try:
+        while True:
+            batch = list(islice(records, chunk_size))
+            if not batch:
+                break
+            report.rows += len(batch)
+
+            parsed = []
+            for number, record in batch:
+                try:
+                    parsed.append((number, parse_record(record)))
+                except (ValueError, ValidationError) as e:
+                    report.error(number, describe_error(e))
+
+            await _resolve_tag_ids(supabase, [tag for _, listing in parsed for tag in listing.tags], resolved, tag_ids)
+
+            chunk = []
+            for number, listing in parsed:
+                row = listing.model_dump(exclude={"tags"})
+                row["tags"] = list(dict.fromkeys(
+                    tag_ids[resolved[name]] for name in listing.tags if resolved.get(name) in tag_ids
+                ))
+                chunk.append((number, row))
+            if chunk:
+                await _insert_chunk(supabase, chunk, report)
+    except UnicodeDecodeError as e:
+        # Nothing imported yet: the caller rejects the file (400 from the endpoint)
+        if not report.inserted:
+            raise
+        report.error(report.rows + 1, f"Import stopped here, the rest of the file was not imported: not valid UTF-8 ({e.reason})")
+    except ValueError as e:
+        report.error(report.rows, str(e))
+    finally:
+        catalog_cache.invalidate("listings")
+
+    return report.to_dict()
+
+
+async def import_upload(file, fmt: Optional[str] = None) -> dict:
+    """Imports from a FastAPI UploadFile without reading it all into memory."""
+    stream = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    try:
+        return await import_listings(stream, fmt or detect_format(file.filename))
+    finally:
+        stream.detach()
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+    load_dotenv(os.path.join(os.path.dirname(__file__), '..', '.env'))
+
+    parser = argparse.ArgumentParser(description="Bulk import listings from a CSV or JSONL file")
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=["csv", "jsonl"])
+    parser.add_argument("--chunk-size", type=int, default=BULK_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    with open(args.path, encoding="utf-8-sig", newline="") as f:
+        result = asyncio.run(import_listings(f, args.format or detect_format(args.path), args.chunk_size))
+    print(json.dumps(result, indent=2))
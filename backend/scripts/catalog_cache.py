@@ -0,0 +1,98 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable
+
+# In-process read-through cache for catalog tables (listings, tags, requests, users).
+# Entries are grouped by table so that a write to a table drops everything read from it.
+
+DEFAULT_TTL_SECONDS = float(os.getenv("CATALOG_CACHE_TTL", "30"))
+DEFAULT_MAX_ENTRIES = int(os.getenv("CATALOG_CACHE_MAX_ENTRIES", "1024"))
+
+
+class CatalogCache:
+    """
+    LRU cache with a per-entry TTL. Keys are (table, key) pairs; `get` loads and
+    stores the value on a miss, `invalidate` drops every entry for a table.
+    """
+
+    def __init__(self, ttl: float = DEFAULT_TTL_SECONDS, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict = OrderedDict()
+        self._generations: dict[str, int] = {}
+        self._listeners: list[Callable[[tuple], None]] = []
+        self._lock = threading.Lock()
+
+    def get(self, table: str, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """Returns the cached value for (table, key), calling `loader` on a miss or expiry."""
+        found, value, generation = self._lookup(table, key)
+        if found:
+            return value
+        value = loader()
+        self._store(table, key, value, generation)
+        return value
+
+    async def aget(self, table: str, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """Like `get`, for async loaders (e.g. queries on the async Supabase client)."""
+        found, value, generation = self._lookup(table, key)
+        if found:
+            return value
+        value = await loader()
+        self._store(table, key, value, generation)
+        return value
+
+    def _lookup(self, table: str, key: Hashable):
+        with self._lock:
+            entry = self._entries.get((table, key))
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end((table, key))
+                self.hits += 1
+                return True, entry[1], None
+            self.misses += 1
+            return False, None, self._generations.get(table, 0)
+
+    def _store(self, table: str, key: Hashable, value: Any, generation: int):
+        with self._lock:
+            # Don't store a result that was read before a concurrent write to the table
+            if self._generations.get(table, 0) == generation:
+                self._entries[(table, key)] = (time.monotonic() + self.ttl, value)
+                self._entries.move_to_end((table, key))
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+
+    def invalidate(self, *tables: str):
+        """Drops all cached entries for the given tables."""
+        with self._lock:
+            for table in tables:
+                self._generations[table] = self._generations.get(table, 0) + 1
+            for cache_key in [k for k in self._entries if k[0] in tables]:
+                del self._entries[cache_key]
+        self._notify(tables)
+
+    def clear(self):
+        with self._lock:
+            tables = tuple({k[0] for k in self._entries} | set(self._generations))
+            for table in tables:
+                self._generations[table] = self._generations.get(table, 0) + 1
+            self._entries.clear()
+        self._notify(tables)
+
+    def on_invalidate(self, listener: Callable[[tuple], None]):
+        """Calls `listener(tables)` whenever tables are invalidated, e.g. to drop derived data kept elsewhere."""
+        self._listeners.append(listener)
+
+    def _notify(self, tables: tuple):
+        for listener in self._listeners:
+            listener(tables)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+# Shared cache used by the API endpoints and tag verification
+catalog_cache = CatalogCache()
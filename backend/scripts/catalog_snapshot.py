@@ -0,0 +1,523 @@
+import asyncio
+import json
+import mmap
+import os
+import sys
+import time
+from bisect import bisect_right
+from datetime import date
+from typing import Optional
+
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import numpy as np
+
+from backend.scripts.availability import CALENDAR_HORIZON_DAYS, AvailabilityCalendar
+from backend.scripts.catalog_cache import catalog_cache
+from backend.scripts.listing_cards import SUPABASE_BUCKET_URL, ListingCard
+from backend.scripts.projections import LISTING_DETAIL_COLUMNS, RESERVATION_COLUMNS, TAG_COLUMNS
+
+# Columnar snapshot of the catalog (listings, tag names, reservations and the
+# availability calendar) in one file that every uvicorn worker memory-maps.
+# Columns are numpy arrays read straight from the mapping and strings are
+# UTF-8 blobs with offsets, so the data exists once in the page cache however
+# many workers there are, and Supabase is read by one refresher instead of by
+# every worker.
+#
+# A refresh writes a new file next to the old one and renames it into place.
+# Workers notice the new inode and map it; requests still holding the old
+# version keep reading it until they finish. One worker refreshes at a time
+# (an flock on <path>.lock); the others keep serving the current version.
+#
+# Opt in by setting CATALOG_SNAPSHOT_PATH (e.g. backend/.cache/catalog.snapshot);
+# main.py only imports this module (and numpy) when it is set.
+# Each table's columns carry the time they were fetched. A write in a worker
+# marks only that table stale there; until a snapshot with the table fetched
+# after the write is mapped, that worker reads that table from Supabase as
+# before and keeps using the snapshot for the others. A refresh refetches just
+# the stale tables and copies the rest over from the current file, and after
+# writes refreshes start at most once per CATALOG_SNAPSHOT_MIN_INTERVAL, so a
+# steady stream of writes costs one table fetch per interval.
+# `python -m backend.scripts.catalog_snapshot --every 30` runs a standalone refresher.
+
+CATALOG_SNAPSHOT_PATH = os.getenv("CATALOG_SNAPSHOT_PATH")
+CATALOG_SNAPSHOT_TTL_SECONDS = float(os.getenv("CATALOG_SNAPSHOT_TTL", "30"))
+CATALOG_SNAPSHOT_MIN_INTERVAL = float(os.getenv("CATALOG_SNAPSHOT_MIN_INTERVAL", "2"))  # seconds between refreshes
+CATALOG_SNAPSHOT_CHECK_SECONDS = 1.0  # how often workers look for a newer file
+SNAPSHOT_TABLES = ("listings", "tags", "requests")
+TABLE_COLUMNS = {"listings": LISTING_DETAIL_COLUMNS, "tags": TAG_COLUMNS, "requests": RESERVATION_COLUMNS}
+
+MAGIC = b"CATSNAP2"
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+ALIGN = 64
+
+# Nullable numeric columns keep their JSON type: 0 = null, 1 = int, 2 = float
+NULL, INT, FLOAT = 0, 1, 2
+NUMERIC_COLUMNS = ("price", "rating", "num_reviews", "user")
+STRING_COLUMNS = ("title", "description", "location", "picture")
+
+
+def _numeric_column(values: list) -> dict:
+    kinds = np.array([NULL if v is None else INT if isinstance(v, int) else FLOAT for v in values], dtype=np.int8)
+    return {"values": np.array([0.0 if v is None else v for v in values], dtype=np.float64), "kinds": kinds}
+
+
+def _string_column(values: list) -> dict:
+    encoded = [b"" if v is None else str(v).encode("utf-8") for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(b) for b in encoded])
+    return {
+        "offsets": offsets,
+        "data": np.frombuffer(b"".join(encoded), dtype=np.uint8),
+        "null": np.array([v is None for v in values], dtype=np.uint8),
+    }
+
+
+def _ragged(groups: list, dtype) -> tuple[np.ndarray, np.ndarray]:
+    """Offsets and flattened values for a list of lists (row i is values[offsets[i]:offsets[i+1]])."""
+    offsets = np.zeros(len(groups) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(g) for g in groups])
+    flat = np.fromiter((v for g in groups for v in g), dtype=dtype, count=int(offsets[-1]))
+    return offsets, flat
+
+
+def listing_arrays(listings: list) -> dict[str, np.ndarray]:
+    arrays = {}
+    listings = sorted(listings, key=lambda row: row["id"])
+    arrays["listing_id"] = np.array([row["id"] for row in listings], dtype=np.int64)
+    for column in NUMERIC_COLUMNS:
+        for part, array in _numeric_column([row.get(column) for row in listings]).items():
+            arrays[f"{column}_{part}"] = array
+    for column in STRING_COLUMNS:
+        for part, array in _string_column([row.get(column) for row in listings]).items():
+            arrays[f"{column}_{part}"] = array
+    arrays["listing_tags_offsets"], arrays["listing_tags"] = _ragged([row.get("tags") or [] for row in listings], np.int64)
+    return arrays
+
+
+def tag_arrays(tags: list) -> dict[str, np.ndarray]:
+    arrays = {}
+    tags = sorted(tags, key=lambda tag: tag["id"])
+    arrays["tag_id"] = np.array([tag["id"] for tag in tags], dtype=np.int64)
+    for part, array in _string_column([tag["name"] for tag in tags]).items():
+        arrays[f"tag_name_{part}"] = array
+    return arrays
+
+
+def _ordinals(values: list) -> np.ndarray:
+    """Date ordinals of 'YYYY-MM-DD' strings (or dates)."""
+    return np.array(values, dtype="datetime64[D]").astype(np.int64) + EPOCH_ORDINAL
+
+
+def _group_offsets(groups: np.ndarray, count: int) -> np.ndarray:
+    """Offsets for values sorted by group number (0 .. count-1)."""
+    offsets = np.zeros(count + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum(np.bincount(groups, minlength=count))
+    return offsets
+
+
+def reservation_arrays(requests: list, origin: date) -> dict[str, np.ndarray]:
+    # Reservations: merged blocked ranges for card availability, and approved
+    # bookings (as requested, in order) for the listing page. Days are ordinals.
+    # The same ranges ReservationIndex builds, computed with array operations
+    # since a partial refresh redoes this whenever reservations change.
+    arrays = {}
+    items = np.array([request["item"] for request in requests], dtype=np.int64)
+    starts = _ordinals([request["start_date"] for request in requests])
+    ends = _ordinals([request["end_date"] for request in requests])
+    approved = np.array([request.get("approve") == 1 for request in requests], dtype=bool)
+    reserved = np.unique(items)
+    arrays["reserved_id"] = reserved
+
+    # Every request blocks the day before through the day after. Sorted by
+    # listing and start, a range starts a new merged range unless it overlaps
+    # or touches the furthest end so far in its listing (the running maximum
+    # is offset by listing, so it never carries over from the previous one).
+    order = np.lexsort((starts, items))
+    group = np.searchsorted(reserved, items[order])
+    blocked_start, blocked_end = starts[order] - 1, ends[order] + 1
+    span = int(blocked_end.max()) + 2 if len(order) else 0
+    furthest = np.maximum.accumulate(blocked_end + group * span) - group * span if len(order) else blocked_end
+    new = np.ones(len(order), dtype=bool)
+    new[1:] = (group[1:] != group[:-1]) | (blocked_start[1:] > furthest[:-1] + 1)
+    first = np.flatnonzero(new)
+    last = np.append(first[1:] - 1, len(order) - 1) if len(first) else first
+    arrays["blocked_offsets"] = _group_offsets(group[first], len(reserved))
+    arrays["blocked_start"], arrays["blocked_end"] = blocked_start[first], furthest[last]
+
+    booked = np.flatnonzero(approved)
+    booked = booked[np.argsort(items[booked], kind="stable")]
+    arrays["approved_offsets"] = _group_offsets(np.searchsorted(reserved, items[booked]), len(reserved))
+    arrays["approved_start"], arrays["approved_end"] = starts[booked], ends[booked]
+
+    calendar = AvailabilityCalendar.from_requests(requests, origin)
+    arrays["calendar_listing_id"] = calendar.listing_ids
+    arrays["calendar_bits"] = calendar.bits
+    return arrays
+
+
+def table_arrays(table: str, rows: list, origin: date) -> dict[str, np.ndarray]:
+    """The snapshot columns built from one table's rows."""
+    if table == "listings":
+        return listing_arrays(rows)
+    if table == "tags":
+        return tag_arrays(rows)
+    return reservation_arrays(rows, origin)
+
+
+def build_arrays(listings: list, tags: list, requests: list, origin: date) -> dict[str, dict[str, np.ndarray]]:
+    """The snapshot columns for the given table rows, by table."""
+    return {table: table_arrays(table, rows, origin) for table, rows in zip(SNAPSHOT_TABLES, (listings, tags, requests))}
+
+
+def write_snapshot(path: str, tables: dict[str, dict[str, np.ndarray]], meta: dict):
+    """
+    Writes each table's arrays to a temporary file and atomically renames it
+    over `path`. meta["fetched_at"] maps each table to when its rows were read.
+    """
+    arrays, layout, offset = {}, {}, 0
+    for table_name, table in tables.items():
+        for name, array in table.items():
+            array = np.ascontiguousarray(array)
+            arrays[name] = array
+            layout[name] = [array.dtype.str, list(array.shape), offset, table_name]
+            offset += -(-array.nbytes // ALIGN) * ALIGN
+    header = json.dumps({**meta, "arrays": layout}).encode()
+    data_start = -(-(len(MAGIC) + 8 + len(header)) // ALIGN) * ALIGN
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC + len(header).to_bytes(8, "little") + header)
+        for name, array in arrays.items():
+            f.seek(data_start + layout[name][2])
+            f.write(array.tobytes())
+        f.truncate(data_start + offset)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class CatalogSnapshot:
+    """Read-only view over one mapped snapshot file."""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self.inode = os.fstat(f.fileno()).st_ino
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a catalog snapshot")
+        header_len = int.from_bytes(self._map[len(MAGIC):len(MAGIC) + 8], "little")
+        header = json.loads(self._map[len(MAGIC) + 8:len(MAGIC) + 8 + header_len])
+        data_start = -(-(len(MAGIC) + 8 + header_len) // ALIGN) * ALIGN
+        self.fetched_at: dict[str, float] = header["fetched_at"]
+        self.origin = date.fromisoformat(header["origin"])
+        self.calendar_days: int = header["calendar_days"]
+        self._view = memoryview(self._map)
+        self.arrays: dict[str, np.ndarray] = {}
+        self.tables: dict[str, dict[str, np.ndarray]] = {}  # the same arrays by table, for partial refreshes
+        self._string_base: dict[str, int] = {}
+        for name, (dtype, shape, offset, table) in header["arrays"].items():
+            count = int(np.prod(shape))
+            start = data_start + offset
+            self.arrays[name] = np.frombuffer(self._map, dtype=dtype, count=count, offset=start).reshape(shape) \
+                if count else np.empty(shape, dtype=dtype)
+            self.tables.setdefault(table, {})[name] = self.arrays[name]
+            if name.endswith("_data"):
+                self._string_base[name[:-len("_data")]] = start
+        self._tag_lookup: Optional[dict[int, str]] = None
+
+    def __len__(self) -> int:
+        return len(self.arrays["listing_id"])
+
+    def _strings(self, column: str, rows=None) -> list:
+        """Decoded values of a string column (all rows, or the given row numbers)."""
+        base, view = self._string_base.get(column, 0), self._view
+        offsets = self.arrays[f"{column}_offsets"].tolist()
+        nulls = self.arrays[f"{column}_null"].tolist()
+        rows = range(len(nulls)) if rows is None else rows
+        return [None if nulls[i] else str(view[base + offsets[i]:base + offsets[i + 1]], "utf-8") for i in rows]
+
+    def _string_at(self, column: str, row: int) -> Optional[str]:
+        if self.arrays[f"{column}_null"][row]:
+            return None
+        start, end = self.arrays[f"{column}_offsets"][row:row + 2].tolist()
+        base = self._string_base.get(column, 0)
+        return str(self._view[base + start:base + end], "utf-8")
+
+    def _numbers(self, column: str, rows=None) -> list:
+        values = self.arrays[f"{column}_values"].tolist()
+        kinds = self.arrays[f"{column}_kinds"].tolist()
+        rows = range(len(kinds)) if rows is None else rows
+        return [None if kinds[i] == NULL else int(values[i]) if kinds[i] == INT else values[i] for i in rows]
+
+    def _number_at(self, column: str, row: int):
+        kind, value = int(self.arrays[f"{column}_kinds"][row]), float(self.arrays[f"{column}_values"][row])
+        return None if kind == NULL else int(value) if kind == INT else value
+
+    def _row_of(self, ids: np.ndarray, listing_id: int) -> Optional[int]:
+        row = int(np.searchsorted(ids, listing_id))
+        return row if row < len(ids) and ids[row] == listing_id else None
+
+    def tag_lookup(self) -> dict[int, str]:
+        """Tag id -> name."""
+        if self._tag_lookup is None:
+            self._tag_lookup = dict(zip(self.arrays["tag_id"].tolist(), self._strings("tag_name")))
+        return self._tag_lookup
+
+    def listing_row(self, listing_id: int) -> Optional[dict]:
+        """The listing as the row Supabase returns for LISTING_DETAIL_COLUMNS, or None if it isn't in the snapshot."""
+        row = self._row_of(self.arrays["listing_id"], listing_id)
+        if row is None:
+            return None
+        start, end = self.arrays["listing_tags_offsets"][row:row + 2].tolist()
+        listing = {"id": listing_id, "tags": self.arrays["listing_tags"][start:end].tolist()}
+        for column in STRING_COLUMNS:
+            listing[column] = self._string_at(column, row)
+        for column in NUMERIC_COLUMNS:
+            listing[column] = self._number_at(column, row)
+        return listing
+
+    # Same interface as ReservationIndex, for the endpoints that take either
+
+    def next_available(self, listing_id: int, today: date) -> date:
+        row = self._row_of(self.arrays["reserved_id"], listing_id)
+        if row is not None:
+            start, end = self.arrays["blocked_offsets"][row:row + 2].tolist()
+            starts = self.arrays["blocked_start"][start:end].tolist()
+            i = bisect_right(starts, today.toordinal()) - 1
+            if i >= 0:
+                last = int(self.arrays["blocked_end"][start + i])
+                if last >= today.toordinal():
+                    return date.fromordinal(last + 1)
+        return today
+
+    def availability(self, listing_id: int, today: date) -> str:
+        return self.next_available(listing_id, today).strftime('%B %d')
+
+    def approved_ranges(self, listing_id: int) -> list[dict]:
+        row = self._row_of(self.arrays["reserved_id"], listing_id)
+        if row is None:
+            return []
+        start, end = self.arrays["approved_offsets"][row:row + 2].tolist()
+        return [
+            {"start": date.fromordinal(s).isoformat(), "end": date.fromordinal(e).isoformat()}
+            for s, e in zip(self.arrays["approved_start"][start:end].tolist(),
+                            self.arrays["approved_end"][start:end].tolist())
+        ]
+
+    def calendar(self) -> AvailabilityCalendar:
+        """The availability calendar, reading its bitmap from the mapping."""
+        calendar = AvailabilityCalendar(self.origin, self.calendar_days)
+        calendar.listing_ids = self.arrays["calendar_listing_id"]
+        calendar.bits = self.arrays["calendar_bits"]
+        return calendar
+
+    def listing_cards(self, today: date, exclude: set = frozenset(), reservations=None) -> list[ListingCard]:
+        """
+        Cards for every listing in id order, leaving out the ids in `exclude`.
+        Availability comes from `reservations` (a ReservationIndex) when given,
+        for a worker whose reservations are newer than the snapshot's.
+        """
+        ids = self.arrays["listing_id"]
+        if reservations is not None and reservations is not self:
+            return self._listing_cards(exclude, [reservations.availability(i, today) for i in ids.tolist()])
+
+        # Next available day of every listing: the end of the blocked range holding today, plus one
+        next_day = np.full(len(ids), today.toordinal(), dtype=np.int64)
+        owners = np.repeat(self.arrays["reserved_id"], np.diff(self.arrays["blocked_offsets"]))
+        ongoing = (self.arrays["blocked_start"] <= today.toordinal()) & (self.arrays["blocked_end"] >= today.toordinal())
+        owner_rows = np.searchsorted(ids, owners[ongoing])
+        found = owner_rows < len(ids)
+        found[found] = ids[owner_rows[found]] == owners[ongoing][found]
+        next_day[owner_rows[found]] = self.arrays["blocked_end"][ongoing][found] + 1
+        days, day_index = np.unique(next_day, return_inverse=True)
+        labels = [date.fromordinal(day).strftime('%B %d') for day in days.tolist()]
+        return self._listing_cards(exclude, [labels[i] for i in day_index.tolist()])
+
+    def _listing_cards(self, exclude: set, availability: list) -> list[ListingCard]:
+        ids = self.arrays["listing_id"]
+        tag_lookup = self.tag_lookup()
+        tag_names = [tag_lookup.get(tag_id, "Unknown") for tag_id in self.arrays["listing_tags"].tolist()]
+        tag_offsets = self.arrays["listing_tags_offsets"].tolist()
+
+        id_list = ids.tolist()
+        rows = [i for i, listing_id in enumerate(id_list) if listing_id not in exclude] if exclude else range(len(id_list))
+        columns = zip(
+            rows,
+            self._strings("title", rows), self._strings("description", rows), self._numbers("price", rows),
+            self._strings("location", rows), self._strings("picture", rows),
+            self._numbers("rating", rows), self._numbers("num_reviews", rows),
+        )
+        return [
+            ListingCard(id_list[i], title, description, price, location, tag_names[tag_offsets[i]:tag_offsets[i + 1]],
+                        f"{SUPABASE_BUCKET_URL}{picture}", availability[i], rating, num_reviews)
+            for i, title, description, price, location, picture, rating, num_reviews in columns
+        ]
+
+
+class SnapshotManager:
+    """Keeps the newest snapshot mapped and refreshes the tables that are stale."""
+
+    def __init__(self, path: Optional[str] = CATALOG_SNAPSHOT_PATH, ttl: float = CATALOG_SNAPSHOT_TTL_SECONDS,
+                 min_interval: float = CATALOG_SNAPSHOT_MIN_INTERVAL):
+        self.path = path
+        self.ttl = ttl
+        self.min_interval = min_interval
+        self.refreshes = 0
+        self.tables_fetched = {table: 0 for table in SNAPSHOT_TABLES}
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._checked_at = 0.0
+        self._dirty_at = {table: 0.0 for table in SNAPSHOT_TABLES}
+        self._refreshing = False
+        self._refresh_started = float("-inf")
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path)
+
+    def mark_stale(self, tables: tuple = SNAPSHOT_TABLES):
+        """Called when this worker writes to the catalog: stop serving those tables from snapshots fetched before now."""
+        now = time.time()
+        for table in tables:
+            if table in self._dirty_at:
+                self._dirty_at[table] = now
+
+    def is_current(self, snapshot: Optional[CatalogSnapshot], table: str) -> bool:
+        """True if the snapshot's copy of `table` was fetched after this worker last wrote to it."""
+        return snapshot is not None and snapshot.fetched_at[table] > self._dirty_at[table]
+
+    def stale_tables(self, snapshot: Optional[CatalogSnapshot] = None) -> list[str]:
+        """Tables to refetch: written since the snapshot, older than the TTL, or (reservations) of an earlier day."""
+        snapshot = snapshot or self._snapshot
+        if snapshot is None:
+            return list(SNAPSHOT_TABLES)
+        now = time.time()
+        return [
+            table for table in SNAPSHOT_TABLES
+            if not self.is_current(snapshot, table) or now - snapshot.fetched_at[table] > self.ttl
+            or (table == "requests" and snapshot.origin != date.today())  # the calendar starts today
+        ]
+
+    def _open_latest(self, force: bool = False):
+        now = time.monotonic()
+        if not force and now - self._checked_at < CATALOG_SNAPSHOT_CHECK_SECONDS:
+            return
+        self._checked_at = now
+        try:
+            inode = os.stat(self.path).st_ino
+            if self._snapshot is None or self._snapshot.inode != inode:
+                self._snapshot = CatalogSnapshot(self.path)
+        except (OSError, ValueError, KeyError) as e:
+            if not isinstance(e, FileNotFoundError):
+                print(f"Could not map catalog snapshot {self.path}: {e}")
+
+    async def aget(self, tables: tuple = SNAPSHOT_TABLES) -> Optional[CatalogSnapshot]:
+        """
+        The current snapshot if its copy of each of `tables` is usable in this
+        worker, or None (then read them from Supabase).
+        """
+        if not self.path:
+            return None
+        self._open_latest()
+        snapshot = self._snapshot
+        if (not self._refreshing and time.monotonic() - self._refresh_started >= self.min_interval
+                and self.stale_tables(snapshot)):
+            self._refreshing = True
+            self._refresh_started = time.monotonic()
+            asyncio.ensure_future(self._refresh_in_background())
+        return snapshot if all(self.is_current(snapshot, table) for table in tables) else None
+
+    async def _refresh_in_background(self):
+        try:
+            await self.refresh()
+        except Exception as e:
+            print(f"Catalog snapshot refresh failed: {e}")
+        finally:
+            self._refreshing = False
+
+    async def refresh(self, tables: Optional[list] = None) -> bool:
+        """
+        Refetches the stale tables (or `tables`) and writes a new snapshot, the
+        other tables' columns copied from the current file, unless another
+        process is already refreshing.
+        """
+        import fcntl
+        from backend.scripts.async_db import fetch, get_async_supabase
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(f"{self.path}.lock", "w") as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return False
+            # Another process may have written a newer file while we waited for the lock
+            self._open_latest(force=True)
+            current = self._snapshot
+            tables = list(SNAPSHOT_TABLES) if current is None else tables or self.stale_tables(current)
+            if not tables:
+                return True
+            # Rows fetched after this moment include every write made before it
+            fetched_at = time.time()
+            db = await get_async_supabase()
+            rows = await asyncio.gather(*(fetch(db.table(table).select(TABLE_COLUMNS[table])) for table in tables))
+            await asyncio.to_thread(self._write, current, dict(zip(tables, rows)), fetched_at)
+        self.refreshes += 1
+        for table in tables:
+            self.tables_fetched[table] += 1
+        self._open_latest(force=True)
+        return True
+
+    def _write(self, current: Optional[CatalogSnapshot], fetched: dict[str, list], fetched_at: float):
+        origin = date.today()
+        tables, times = {}, {}
+        for table in SNAPSHOT_TABLES:
+            if table in fetched:
+                tables[table], times[table] = table_arrays(table, fetched[table], origin), fetched_at
+            else:
+                # Unchanged: copied from the mapping of the current file
+                tables[table], times[table] = current.tables[table], current.fetched_at[table]
+        meta = {"fetched_at": times, "origin": origin.isoformat(), "calendar_days": CALENDAR_HORIZON_DAYS}
+        write_snapshot(self.path, tables, meta)
+
+    def stats(self) -> dict:
+        snapshot = self._snapshot
+        return {
+            "enabled": self.enabled,
+            "listings": len(snapshot) if snapshot else 0,
+            "bytes": len(snapshot._map) if snapshot else 0,
+            "age_seconds": {
+                table: round(time.time() - fetched_at, 1) for table, fetched_at in snapshot.fetched_at.items()
+            } if snapshot else None,
+            "stale": [table for table in SNAPSHOT_TABLES if not self.is_current(snapshot, table)],
+            "refreshes": self.refreshes,
+            "tables_fetched": self.tables_fetched,
+        }
+
+
+# Shared snapshot used by read_root, get_listing_by_id and tag name lookups
+catalog_snapshot = SnapshotManager()
+catalog_cache.on_invalidate(catalog_snapshot.mark_stale)
+
+
+if __name__ == "__main__":
+    import argparse
+    from dotenv import load_dotenv
+    load_dotenv(os.path.join(os.path.dirname(__file__), '..', '.env'))
+
+    parser = argparse.ArgumentParser(description="Write the catalog snapshot shared by the API workers")
+    parser.add_argument("--path", default=CATALOG_SNAPSHOT_PATH, required=CATALOG_SNAPSHOT_PATH is None)
+    parser.add_argument("--every", type=float, help="keep refreshing every N seconds")
+    args = parser.parse_args()
+
+    async def main():
+        manager = SnapshotManager(args.path)
+        while True:
+            written = await manager.refresh(list(SNAPSHOT_TABLES))
+            print(f"Snapshot {'written' if written else 'skipped (another refresh is running)'}: {manager.stats()}")
+            if not args.every:
+                break
+            await asyncio.sleep(args.every)
+
+    asyncio.run(main())
@@ -0,0 +1,355 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Optional
+
+from backend.scripts.async_db import get_async_supabase
+from backend.scripts.image_preprocess import prepare_for_vision
+from backend.scripts.photo_tags import generate_details_from_image_bytes
+from backend.scripts.tag_verification import verify_and_add_tags
+from backend.scripts.upload_dedup import upload_dedup
+
+# Listing detail generation (vision analysis, tag verification, storage upload)
+# as a pipeline that can run inline or as a background job. The storage upload
+# runs concurrently with the analysis stages. Background jobs live in SQLite so
+# every uvicorn worker sees them; see DetailJobStore.
+
+DETAIL_JOB_WORKERS = int(os.getenv("DETAIL_JOB_WORKERS", "4"))  # jobs run at once per process
+DETAIL_JOB_QUEUE_BYTES = int(os.getenv("DETAIL_JOB_QUEUE_BYTES", str(200 * 2**20)))  # queued upload bytes, all workers
+DETAIL_JOB_TIMEOUT_SECONDS = float(os.getenv("DETAIL_JOB_TIMEOUT", "120"))
+DETAIL_JOB_POLL_SECONDS = 0.5  # how often an idle process looks for jobs posted to other workers
+STALE_JOB_GRACE_SECONDS = 60  # a job still "running" this long past the timeout lost its worker
+FINISHED_JOBS_KEPT = 1000
+BUCKET_NAME = "listings"
+
+
+class StageTimings:
+    """Running count / total / max duration per pipeline stage."""
+
+    def __init__(self):
+        self.count = defaultdict(int)
+        self.total = defaultdict(float)
+        self.max = defaultdict(float)
+
+    def record(self, stage: str, seconds: float):
+        self.count[stage] += 1
+        self.total[stage] += seconds
+        self.max[stage] = max(self.max[stage], seconds)
+
+    def summary(self) -> dict:
+        return {
+            stage: {
+                "count": self.count[stage],
+                "avg_ms": round(1000 * self.total[stage] / self.count[stage], 1),
+                "max_ms": round(1000 * self.max[stage], 1),
+            }
+            for stage in self.count
+        }
+
+
+stage_timings = StageTimings()
+
+
+async def _timed(stage: str, timings: dict, coro):
+    start = time.perf_counter()
+    try:
+        return await coro
+    finally:
+        elapsed = time.perf_counter() - start
+        timings[stage] = round(1000 * elapsed, 1)
+        stage_timings.record(stage, elapsed)
+
+
+async def _analyze(image_bytes: bytes, content_type: str, timings: dict):
+    prepared = await _timed("prepare", timings, asyncio.to_thread(prepare_for_vision, image_bytes, content_type))
+    details = await _timed("vision", timings, generate_details_from_image_bytes(prepared.data, prepared.content_type))
+    verified_tags = await _timed("verify_tags", timings, verify_and_add_tags(details.get("tags", [])))
+    return prepared, details, verified_tags
+
+
+async def _upload(image_bytes: bytes, filename: str, content_type: str, timings: dict):
+    supabase = await get_async_supabase()
+    # Sanitize filename to prevent path traversal issues, although UUID is safer
+    safe_filename = (filename or "upload").replace("..", "").replace("/", "")
+    image_path = f"public/{uuid.uuid4()}-{safe_filename}"
+    bucket = supabase.storage.from_(BUCKET_NAME)
+    await _timed("upload", timings, bucket.upload(
+        file=image_bytes,
+        path=image_path,
+        file_options={"content-type": content_type}
+    ))
+    return image_path, await bucket.get_public_url(image_path)
+
+
+async def generate_listing_details(image_bytes: bytes, filename: str, content_type: str,
+                                   digest: str, timings: Optional[dict] = None) -> dict:
+    """
+    Runs the whole pipeline for one image and records the result under its
+    content hash. `timings` is filled with per-stage durations in ms.
+    """
+    timings = {} if timings is None else timings
+    start = time.perf_counter()
+    (prepared, details, verified_tags), (image_path, image_url) = await asyncio.gather(
+        _analyze(image_bytes, content_type, timings),
+        _upload(image_bytes, filename, content_type, timings),
+    )
+    total = time.perf_counter() - start
+    timings["total"] = round(1000 * total, 1)
+    stage_timings.record("total", total)
+
+    result = {
+        "title": details.get("title", "Generated Item"),
+        "description": details.get("description", "No description generated."),
+        "tags": verified_tags,
+        "photo_url": image_url,  # For frontend display
+        "photo_path": image_path,  # For frontend to send back when creating listing
+        "image_bytes": {"original": prepared.original_bytes, "vision": prepared.processed_bytes}
+    }
+    # A failed analysis is returned but not remembered, so a retry of the same photo asks the model again
+    if not details.get("analysis_failed"):
+        upload_dedup.store(digest, result)
+    return result
+
+
+@dataclass
+class DetailJob:
+    id: str
+    status: str = "queued"  # queued -> running -> done | failed
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    result: Optional[dict] = None
+    error: Optional[str] = None
+    timings: dict = field(default_factory=dict)
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "result": self.result,
+            "error": self.error,
+            "queued_ms": round(1000 * ((self.started_at or time.time()) - self.created_at), 1),
+            "timings": self.timings,
+        }
+
+
+class QueueFull(Exception):
+    pass
+
+
+class DetailJobStore:
+    """
+    Detail jobs in an SQLite table (the upload dedup database by default),
+    shared by every uvicorn worker: any of them can report a job's status,
+    and queued jobs, upload bytes included, survive a restart. The bytes are
+    dropped once the job finishes.
+    """
+
+    def __init__(self, db_path: Optional[str] = None, max_queued_bytes: int = DETAIL_JOB_QUEUE_BYTES):
+        self.db_path = db_path or upload_dedup.db_path
+        self.max_queued_bytes = max_queued_bytes
+        self._db = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._db is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+            # Autocommit, with explicit BEGIN IMMEDIATE where a read decides a write
+            self._db = sqlite3.connect(self.db_path, timeout=10, isolation_level=None, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS detail_jobs ("
+                "id TEXT PRIMARY KEY, status TEXT NOT NULL, filename TEXT, content_type TEXT, digest TEXT NOT NULL, "
+                "image BLOB, size INTEGER NOT NULL, created_at REAL NOT NULL, started_at REAL, finished_at REAL, "
+                "result TEXT, error TEXT, timings TEXT)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS detail_jobs_status ON detail_jobs (status, created_at)")
+        return self._db
+
+    def submit(self, image_bytes: bytes, filename: str, content_type: str, digest: str) -> DetailJob:
+        """Queues a job; raises QueueFull if the queued uploads would exceed max_queued_bytes."""
+        job = DetailJob(uuid.uuid4().hex)
+        with self._lock:
+            db = self._connect()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                queued = db.execute("SELECT COALESCE(SUM(size), 0) FROM detail_jobs WHERE status = 'queued'").fetchone()[0]
+                if queued + len(image_bytes) > self.max_queued_bytes:
+                    raise QueueFull(f"{queued / 2**20:.1f} MB of images are already queued")
+                db.execute(
+                    "INSERT INTO detail_jobs (id, status, filename, content_type, digest, image, size, created_at) "
+                    "VALUES (?, 'queued', ?, ?, ?, ?, ?, ?)",
+                    (job.id, filename, content_type, digest, image_bytes, len(image_bytes), job.created_at),
+                )
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+        return job
+
+    def claim(self) -> Optional[tuple]:
+        """
+        Marks the oldest queued job as running and returns (job, image bytes,
+        filename, content type, digest), or None if nothing is queued. Jobs left
+        running by a worker that died are failed first.
+        """
+        now = time.time()
+        with self._lock:
+            db = self._connect()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                db.execute(
+                    "UPDATE detail_jobs SET status = 'failed', error = 'Interrupted by a worker restart', "
+                    "image = NULL, finished_at = ? WHERE status = 'running' AND started_at < ?",
+                    (now, now - DETAIL_JOB_TIMEOUT_SECONDS - STALE_JOB_GRACE_SECONDS),
+                )
+                row = db.execute(
+                    "SELECT id, created_at, image, filename, content_type, digest FROM detail_jobs "
+                    "WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+                ).fetchone()
+                if row is not None:
+                    db.execute("UPDATE detail_jobs SET status = 'running', started_at = ? WHERE id = ?", (now, row[0]))
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+        if row is None:
+            return None
+        job_id, created_at, image_bytes, filename, content_type, digest = row
+        return DetailJob(job_id, "running", created_at, now), image_bytes, filename, content_type, digest
+
+    def finish(self, job: DetailJob):
+        """Records a job's outcome and forgets the oldest finished jobs past FINISHED_JOBS_KEPT."""
+        with self._lock:
+            db = self._connect()
+            db.execute(
+                "UPDATE detail_jobs SET status = ?, result = ?, error = ?, timings = ?, image = NULL, finished_at = ? "
+                "WHERE id = ?",
+                (job.status, json.dumps(job.result), job.error, json.dumps(job.timings), time.time(), job.id),
+            )
+            db.execute(
+                "DELETE FROM detail_jobs WHERE id IN (SELECT id FROM detail_jobs WHERE finished_at IS NOT NULL "
+                "ORDER BY finished_at DESC LIMIT -1 OFFSET ?)",
+                (FINISHED_JOBS_KEPT,),
+            )
+
+    def get(self, job_id: str) -> Optional[DetailJob]:
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT id, status, created_at, started_at, result, error, timings FROM detail_jobs WHERE id = ?",
+                (job_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        job_id, status, created_at, started_at, result, error, timings = row
+        return DetailJob(job_id, status, created_at, started_at,
+                         json.loads(result) if result else None, error, json.loads(timings) if timings else {})
+
+    def counts(self) -> dict:
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT status, COUNT(*), COALESCE(SUM(size), 0) FROM detail_jobs "
+                "WHERE status IN ('queued', 'running') GROUP BY status"
+            ).fetchall()
+        counts = {status: (count, size) for status, count, size in rows}
+        return {
+            "queue_depth": counts.get("queued", (0, 0))[0],
+            "queued_bytes": counts.get("queued", (0, 0))[1],
+            "running_all_workers": counts.get("running", (0, 0))[0],
+        }
+
+
+class DetailJobQueue:
+    """
+    Runs detail jobs from the shared store with at most `workers` at a time in
+    this process. Each process takes the oldest queued job when it has a free
+    slot, so a job may run in a different worker than the one it was posted to.
+    """
+
+    def __init__(self, store: Optional[DetailJobStore] = None, workers: int = DETAIL_JOB_WORKERS):
+        self.store = store or DetailJobStore()
+        self.worker_count = workers
+        self.completed = 0
+        self.failed = 0
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._tasks: set[asyncio.Task] = set()
+        self._running = 0
+
+    def _start(self):
+        """Starts taking jobs in this process (on its first submit or status poll)."""
+        if self._dispatcher is None or self._dispatcher.done():
+            self._wake = asyncio.Event()
+            self._dispatcher = asyncio.create_task(self._dispatch())
+
+    async def submit(self, image_bytes: bytes, filename: str, content_type: str, digest: str) -> DetailJob:
+        """Queues a job and returns it immediately; raises QueueFull if the queue is at capacity."""
+        job = await asyncio.to_thread(self.store.submit, image_bytes, filename, content_type, digest)
+        self._start()
+        self._wake.set()
+        return job
+
+    async def get(self, job_id: str) -> Optional[DetailJob]:
+        self._start()  # e.g. after a restart, jobs still queued get picked up again
+        return await asyncio.to_thread(self.store.get, job_id)
+
+    async def _dispatch(self):
+        while True:
+            while self._running < self.worker_count:
+                try:
+                    claimed = await asyncio.to_thread(self.store.claim)
+                except sqlite3.Error as e:
+                    print(f"Could not take a detail job: {e}")
+                    claimed = None
+                if claimed is None:
+                    break
+                self._running += 1
+                task = asyncio.create_task(self._run(*claimed))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+            self._wake.clear()
+            try:
+                # Woken by a local submit or a finished job; otherwise look for jobs posted to other workers
+                await asyncio.wait_for(self._wake.wait(), DETAIL_JOB_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _run(self, job: DetailJob, image_bytes: bytes, filename: str, content_type: str, digest: str):
+        try:
+            job.result = await asyncio.wait_for(
+                generate_listing_details(image_bytes, filename, content_type, digest, job.timings),
+                DETAIL_JOB_TIMEOUT_SECONDS,
+            )
+            job.status = "done"
+            self.completed += 1
+        except Exception as e:
+            job.status = "failed"
+            job.error = f"Failed to process image: {str(e) or type(e).__name__}"
+            self.failed += 1
+        finally:
+            self._running -= 1
+            self._wake.set()
+        try:
+            await asyncio.to_thread(self.store.finish, job)
+        except sqlite3.Error as e:
+            print(f"Could not record detail job {job.id}: {e}")
+
+    async def stats(self) -> dict:
+        return {
+            **await asyncio.to_thread(self.store.counts),
+            "max_queued_bytes": self.store.max_queued_bytes,
+            "running": self._running,
+            "workers": self.worker_count,
+            "completed": self.completed,
+            "failed": self.failed,
+            "stage_timings": stage_timings.summary(),
+        }
+
+
+# Shared queue for /listings/generate-details?background=true
+detail_jobs = DetailJobQueue()
@@ -0,0 +1,115 @@
+import asyncio
+import os
+import time
+from bisect import bisect_left
+from collections import deque
+
+from backend.scripts.openai_client import create_embeddings
+
+# Micro-batching for embedding calls. Every text embedded through
+# get_embedding or get_embeddings (search queries, tag verification, listing
+# indexing) is queued here. Texts requested by concurrent callers are collected
+# for up to EMBED_BATCH_WINDOW_MS (or until EMBED_BATCH_MAX texts are waiting)
+# and sent as one embeddings.create call; each caller gets back its own vector.
+# EMBED_BATCH_WINDOW_MS=0 only batches texts queued together, such as those of
+# one get_embeddings call. EMBED_BATCH_MAX=1 sends every text on its own.
+
+EMBED_BATCH_WINDOW_MS = float(os.getenv("EMBED_BATCH_WINDOW_MS", "5"))
+EMBED_BATCH_MAX = int(os.getenv("EMBED_BATCH_MAX", "256"))
+DELAY_SAMPLES_KEPT = 10_000
+
+# Upper bounds of the batch size buckets reported by stats()
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 2048)
+
+
+def _percentile(sorted_samples: list, q: float) -> float:
+    return sorted_samples[min(len(sorted_samples) - 1, int(q / 100 * len(sorted_samples)))]
+
+
+class EmbeddingBatcher:
+    def __init__(self, window_ms: float = EMBED_BATCH_WINDOW_MS, max_batch: int = EMBED_BATCH_MAX):
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self._pending: dict[str, list] = {}  # model -> [(text, future, enqueued_at)]
+        self._timers: dict[str, asyncio.TimerHandle] = {}
+        self._sending: set[asyncio.Task] = set()  # batches in flight, kept so they aren't garbage collected
+        self.batches = 0
+        self.texts = 0  # distinct texts sent; identical concurrent texts go out once
+        self.size_counts = [0] * len(BATCH_SIZE_BUCKETS)
+        self.delays: deque = deque(maxlen=DELAY_SAMPLES_KEPT)  # seconds each text waited before its batch was sent
+
+    async def embed(self, text: str, model: str) -> list[float]:
+        """The embedding of `text`, fetched in a batch with whatever other texts are requested meanwhile."""
+        if self.max_batch <= 1:
+            self._record(1, [0.0])
+            return (await create_embeddings([text], model)).data[0].embedding
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        pending = self._pending.setdefault(model, [])
+        pending.append((text, future, time.perf_counter()))
+        if len(pending) >= self.max_batch:
+            self._flush(model)
+        elif len(pending) == 1:
+            self._timers[model] = loop.call_later(self.window, self._flush, model)
+        return await future
+
+    def _flush(self, model: str):
+        timer = self._timers.pop(model, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._pending.pop(model, None)
+        if batch:
+            task = asyncio.ensure_future(self._send(model, batch))
+            self._sending.add(task)
+            task.add_done_callback(self._sending.discard)
+
+    async def drain(self):
+        """Sends the texts still waiting for their window and waits for every batch in flight (on shutdown)."""
+        for model in list(self._pending):
+            self._flush(model)
+        if self._sending:
+            await asyncio.gather(*self._sending, return_exceptions=True)
+
+    async def _send(self, model: str, batch: list):
+        sent_at = time.perf_counter()
+        texts = list(dict.fromkeys(text for text, _, _ in batch))
+        self._record(len(texts), [sent_at - enqueued_at for _, _, enqueued_at in batch])
+
+        try:
+            response = await create_embeddings(texts, model)
+        except Exception as e:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        vectors = {texts[item.index]: item.embedding for item in response.data}
+        for text, future, _ in batch:
+            if not future.done():  # the caller may have been cancelled meanwhile
+                future.set_result(vectors[text])
+
+    def _record(self, size: int, delays: list):
+        self.batches += 1
+        self.texts += size
+        self.size_counts[min(bisect_left(BATCH_SIZE_BUCKETS, size), len(BATCH_SIZE_BUCKETS) - 1)] += 1
+        self.delays.extend(delays)
+
+    def stats(self) -> dict:
+        delays = sorted(self.delays)
+        return {
+            "window_ms": self.window * 1000,
+            "max_batch": self.max_batch,
+            "batches": self.batches,
+            "texts": self.texts,
+            "mean_batch_size": round(self.texts / self.batches, 2) if self.batches else 0,
+            "batch_sizes": {f"<={bound}": count for bound, count in zip(BATCH_SIZE_BUCKETS, self.size_counts) if count},
+            "queue_delay_ms": {
+                "p50": round(1000 * _percentile(delays, 50), 2),
+                "p95": round(1000 * _percentile(delays, 95), 2),
+                "max": round(1000 * delays[-1], 2),
+            } if delays else {},
+        }
+
+
+# Shared batcher used by get_embedding and get_embeddings
+embedding_batcher = EmbeddingBatcher()
@@ -0,0 +1,84 @@
+import csv
+import os
+import re
+from typing import NamedTuple, Optional
+
+# Offline geocoding of free-text listing locations ("Barrie", "Toronto, ON",
+# "downtown Kingston") against the place list bundled in backend/data. The
+# longest place name found among the words of the location wins; a province
+# mentioned alongside it breaks ties between places with the same name.
+
+GAZETTEER_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "gazetteer.csv")
+
+REGION_NAMES = {
+    "ontario": "on", "quebec": "qc", "british columbia": "bc", "alberta": "ab", "manitoba": "mb",
+    "saskatchewan": "sk", "nova scotia": "ns", "new brunswick": "nb", "prince edward island": "pe",
+    "newfoundland": "nl", "yukon": "yt", "northwest territories": "nt", "nunavut": "nu",
+}
+
+
+class Place(NamedTuple):
+    name: str
+    region: str
+    latitude: float
+    longitude: float
+
+
+def normalize_words(text: str) -> list[str]:
+    """Lowercased words with punctuation removed, so 'St. John's' and 'st johns' compare equal."""
+    text = text.casefold().replace("'", "").replace(".", "")
+    return re.split(r"[^\w]+", text, flags=re.UNICODE) if text else []
+
+
+class Gazetteer:
+    def __init__(self, path: str = GAZETTEER_PATH):
+        self.path = path
+        self._by_name: Optional[dict[str, list[Place]]] = None
+        self._max_words = 1
+        self._cache: dict[str, Optional[Place]] = {}
+
+    def _load(self) -> dict[str, list[Place]]:
+        if self._by_name is None:
+            by_name: dict[str, list[Place]] = {}
+            with open(self.path, newline="", encoding="utf-8") as f:
+                for row in csv.DictReader(f):
+                    place = Place(row["name"], row["region"], float(row["latitude"]), float(row["longitude"]))
+                    words = [w for w in normalize_words(place.name) if w]
+                    by_name.setdefault(" ".join(words), []).append(place)
+                    self._max_words = max(self._max_words, len(words))
+            self._by_name = by_name
+        return self._by_name
+
+    def __len__(self) -> int:
+        return sum(len(places) for places in self._load().values())
+
+    def geocode(self, location: Optional[str]) -> Optional[Place]:
+        """The place a location string refers to, or None if no known place is mentioned."""
+        if not location:
+            return None
+        if location not in self._cache:
+            if len(self._cache) > 10_000:
+                self._cache.clear()
+            self._cache[location] = self._geocode(location)
+        return self._cache[location]
+
+    def _geocode(self, location: str) -> Optional[Place]:
+        found = self.match([w for w in normalize_words(location) if w])
+        return found[0] if found else None
+
+    def match(self, words: list[str]) -> Optional[tuple[Place, int, int]]:
+        """The place named in a list of normalized words, with the start and length of its name."""
+        by_name = self._load()
+        text = " ".join(words)
+        regions = {code for name, code in REGION_NAMES.items() if name in text} | set(words)
+
+        for size in range(min(len(words), self._max_words), 0, -1):
+            for start in range(len(words) - size + 1):
+                places = by_name.get(" ".join(words[start:start + size]))
+                if places:
+                    return next((p for p in places if p.region.casefold() in regions), places[0]), start, size
+        return None
+
+
+# Shared gazetteer used when listings are indexed and for location queries
+gazetteer = Gazetteer()
@@ -0,0 +1,126 @@
+import math
+import os
+import time
+from collections import defaultdict
+from typing import Optional
+
+from backend.scripts.gazetteer import Gazetteer, gazetteer as default_gazetteer
+
+# Spatial index over listing coordinates. Listings are geocoded from their
+# location text when they are written (create_listing, bulk import) or when the
+# index is rebuilt, and bucketed into a fixed lat/lng grid. Radius and
+# bounding-box queries only look at the grid cells overlapping the query, and
+# listings geocoded to the same place share one point, so distances are
+# computed once per place rather than once per listing.
+
+GEO_CELL_DEGREES = float(os.getenv("GEO_CELL_DEGREES", "0.25"))  # ~28 km of latitude
+GEO_INDEX_TTL_SECONDS = float(os.getenv("GEO_INDEX_TTL", "300"))
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LAT = 111.32
+
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Great-circle distance between two points in kilometres."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+class ListingGeoIndex:
+    def __init__(self, cell_degrees: float = GEO_CELL_DEGREES, places: Optional[Gazetteer] = None):
+        self.cell_degrees = cell_degrees
+        self.places = places or default_gazetteer
+        self.coords: dict[int, tuple[float, float]] = {}
+        self.cells: defaultdict[tuple[int, int], dict[tuple[float, float], set[int]]] = defaultdict(dict)
+        self.rows: dict[int, dict] = {}
+        self.built_at: Optional[float] = None
+
+    def __len__(self) -> int:
+        return len(self.coords)
+
+    def _cell(self, lat: float, lng: float) -> tuple[int, int]:
+        return math.floor(lat / self.cell_degrees), math.floor(lng / self.cell_degrees)
+
+    def rebuild(self, listings: list):
+        """Replaces the index contents with the given listing rows."""
+        index = ListingGeoIndex(self.cell_degrees, self.places)
+        for row in listings:
+            index.add_listing(row)
+        # Swap whole structures so concurrent readers see either the old or new index
+        self.coords, self.cells, self.rows = index.coords, index.cells, index.rows
+        self.built_at = time.monotonic()
+
+    def is_stale(self, ttl: float = GEO_INDEX_TTL_SECONDS) -> bool:
+        return self.built_at is None or time.monotonic() - self.built_at > ttl
+
+    def add_listing(self, row: dict) -> Optional[tuple[float, float]]:
+        """Geocodes and indexes a listing row. Returns its coordinates, or None if the location is unknown."""
+        listing_id = row["id"]
+        self.remove_listing(listing_id)
+        place = self.places.geocode(row.get("location"))
+        if place is None:
+            return None
+        point = (place.latitude, place.longitude)
+        self.coords[listing_id] = point
+        self.rows[listing_id] = row
+        self.cells[self._cell(*point)].setdefault(point, set()).add(listing_id)
+        return point
+
+    def remove_listing(self, listing_id: int):
+        point = self.coords.pop(listing_id, None)
+        self.rows.pop(listing_id, None)
+        if point is None:
+            return
+        cell = self._cell(*point)
+        ids = self.cells[cell].get(point)
+        if ids is not None:
+            ids.discard(listing_id)
+            if not ids:
+                del self.cells[cell][point]
+        if not self.cells[cell]:
+            del self.cells[cell]
+
+    def _points_in_box(self, min_lat: float, min_lng: float, max_lat: float, max_lng: float):
+        """(point, listing ids) for every indexed point inside the box, via the overlapping grid cells."""
+        lat_lo, lng_lo = self._cell(min_lat, min_lng)
+        lat_hi, lng_hi = self._cell(max_lat, max_lng)
+        cells = self.cells
+        if (lat_hi - lat_lo + 1) * (lng_hi - lng_lo + 1) > len(cells):
+            # Huge box over a sparse grid: walking the occupied cells is cheaper
+            candidates = ((key, cells[key]) for key in list(cells)
+                          if lat_lo <= key[0] <= lat_hi and lng_lo <= key[1] <= lng_hi)
+        else:
+            candidates = (((i, j), cells[(i, j)]) for i in range(lat_lo, lat_hi + 1)
+                          for j in range(lng_lo, lng_hi + 1) if (i, j) in cells)
+        for _, points in candidates:
+            for point, ids in list(points.items()):
+                if min_lat <= point[0] <= max_lat and min_lng <= point[1] <= max_lng:
+                    yield point, ids
+
+    def within_radius(self, lat: float, lng: float, radius_km: float) -> list[tuple[int, float]]:
+        """(listing id, distance in km) for listings within `radius_km` of the point, nearest first."""
+        dlat = radius_km / KM_PER_DEGREE_LAT
+        dlng = radius_km / (KM_PER_DEGREE_LAT * max(math.cos(math.radians(lat)), 0.01))
+        found = []
+        for point, ids in self._points_in_box(lat - dlat, lng - dlng, lat + dlat, lng + dlng):
+            distance = haversine_km(lat, lng, *point)
+            if distance <= radius_km:
+                found.extend((listing_id, distance) for listing_id in ids)
+        found.sort(key=lambda hit: (hit[1], hit[0]))
+        return found
+
+    def within_bbox(self, min_lat: float, min_lng: float, max_lat: float, max_lng: float) -> list[tuple[int, float]]:
+        """(listing id, distance in km from the box centre) for listings inside the box, nearest first."""
+        lat, lng = (min_lat + max_lat) / 2, (min_lng + max_lng) / 2
+        found = []
+        for point, ids in self._points_in_box(min_lat, min_lng, max_lat, max_lng):
+            distance = haversine_km(lat, lng, *point)
+            found.extend((listing_id, distance) for listing_id in ids)
+        found.sort(key=lambda hit: (hit[1], hit[0]))
+        return found
+
+
+# Shared index used by /listings/nearby, /listings/within and radius filtering
+listing_geo_index = ListingGeoIndex()
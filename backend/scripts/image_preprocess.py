@@ -0,0 +1,75 @@
+import io
+import os
+from dataclasses import dataclass
+
+# Upload reading and image preparation for the vision call. Phone photos are
+# several MB; the model doesn't need more than ~1024px on the long side, so the
+# image is downscaled and re-encoded before it is base64-encoded into the request.
+
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(15 * 1024 * 1024)))
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+VISION_MAX_SIDE = int(os.getenv("VISION_MAX_SIDE", "1024"))
+VISION_JPEG_QUALITY = int(os.getenv("VISION_JPEG_QUALITY", "85"))
+# Guard against decompression bombs (a small file that decodes to a huge bitmap)
+MAX_IMAGE_PIXELS = 50_000_000
+
+
+class UploadTooLarge(ValueError):
+    pass
+
+
+@dataclass
+class PreparedImage:
+    data: bytes
+    content_type: str
+    original_bytes: int
+    processed_bytes: int
+    width: int = 0
+    height: int = 0
+
+
+async def read_upload_limited(file, max_bytes: int = MAX_UPLOAD_BYTES) -> bytes:
+    """Reads an UploadFile in chunks, raising UploadTooLarge as soon as it exceeds max_bytes."""
+    if file.size is not None and file.size > max_bytes:
+        raise UploadTooLarge(f"Upload is {file.size} bytes; the limit is {max_bytes} bytes")
+    buffer = bytearray()
+    while True:
+        chunk = await file.read(UPLOAD_CHUNK_BYTES)
+        if not chunk:
+            break
+        buffer.extend(chunk)
+        if len(buffer) > max_bytes:
+            raise UploadTooLarge(f"Upload exceeds the limit of {max_bytes} bytes")
+    return bytes(buffer)
+
+
+def prepare_for_vision(image_bytes: bytes, content_type: str = "image/jpeg", max_side: int = VISION_MAX_SIDE,
+                       quality: int = VISION_JPEG_QUALITY) -> PreparedImage:
+    """
+    Decodes the image, applies its EXIF rotation, downscales it so the long side
+    is at most `max_side` and re-encodes it as JPEG. The original bytes are kept
+    if the image can't be decoded or re-encoding wouldn't make it smaller; their
+    content type is the decoded format's, or the uploaded `content_type`.
+    """
+    from PIL import Image, ImageOps, UnidentifiedImageError  # imported on first upload to keep startup fast
+    Image.MAX_IMAGE_PIXELS = MAX_IMAGE_PIXELS
+
+    original = PreparedImage(image_bytes, content_type or "image/jpeg", len(image_bytes), len(image_bytes))
+    try:
+        with Image.open(io.BytesIO(image_bytes)) as image:
+            original.content_type = Image.MIME.get(image.format, original.content_type)
+            image = ImageOps.exif_transpose(image)
+            image.thumbnail((max_side, max_side), Image.LANCZOS)
+            if image.mode != "RGB":
+                image = image.convert("RGB")
+            out = io.BytesIO()
+            image.save(out, format="JPEG", quality=quality, optimize=True)
+            width, height = image.size
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError) as e:
+        print(f"Could not preprocess image, sending it unchanged: {e}")
+        return original
+
+    data = out.getvalue()
+    if len(data) >= len(image_bytes):
+        return original
+    return PreparedImage(data, "image/jpeg", len(image_bytes), len(data), width, height)
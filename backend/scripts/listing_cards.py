@@ -0,0 +1,103 @@
+from dataclasses import dataclass, field
+from typing import Optional, Union
+
+# Shapes listing rows into the responses the frontend renders: cards for the
+# home page, feed, filter and search, the listing page, and the profile page.
+# The response rows are slotted dataclasses, which orjson serializes directly
+# (see ORJSONResponse in main.py) without going through jsonable_encoder.
+
+SUPABASE_BUCKET_URL = "https://ftwuonnxcfpinajqnacp.supabase.co/storage/v1/object/public/listings//"
+
+
+@dataclass(slots=True)
+class ListingCard:
+    id: int
+    title: str
+    description: str
+    price: float
+    location: str
+    tags: list[str]
+    image_url: str
+    availability: str
+    rating: Optional[float]
+    num_reviews: Optional[int]
+
+
+@dataclass(slots=True)
+class ScoredListingCard(ListingCard):
+    score: float = 0.0
+
+
+@dataclass(slots=True)
+class NearbyListingCard(ListingCard):
+    distance_km: float = 0.0
+
+
+@dataclass(slots=True)
+class ListingDetail(ListingCard):
+    user: str = ""
+    unavailable_dates: list[dict] = field(default_factory=list)
+
+
+def build_listing_card(row: dict, tag_lookup: dict, availability: str,
+                       card_type: type = ListingCard, **extra) -> ListingCard:
+    """
+    Builds the card for one listing row, resolving tag ids to names. Search and
+    location results pass their card subclass and its extra fields (`score`, `distance_km`).
+    """
+    values = (
+        row["id"],
+        row["title"],
+        row["description"],
+        row["price"],
+        row["location"],
+        [tag_lookup.get(tag_id, "Unknown") for tag_id in row["tags"]],
+        f"{SUPABASE_BUCKET_URL}{row['picture']}",
+        availability,
+        row.get("rating", 0),
+        row.get("num_reviews", 0),
+    )
+    return card_type(*values, **extra)
+
+
+@dataclass(slots=True)
+class Rental:
+    id: int
+    item: str
+    start_date: str
+    end_date: str
+    renter: str
+    price: float
+    status: str
+
+
+@dataclass(slots=True)
+class ListedItem:
+    id: int
+    name: str
+    category: str
+    price: float
+    status: str
+    views: int
+    bookings: int
+
+
+@dataclass(slots=True)
+class RequestCard:
+    id: int
+    image: str
+    title: str
+    user: Union[int, str]  # the owner's id in your_requests, the requester's name in pending_requests
+    start_date: str
+    end_date: str
+    message: Optional[str]
+
+
+@dataclass(slots=True)
+class Profile:
+    name: str
+    upcoming_rentals: list[Rental]
+    past_rentals: list[Rental]
+    listed_items: list[ListedItem]
+    your_requests: list[RequestCard]
+    pending_requests: list[RequestCard]
@@ -0,0 +1,197 @@
+import asyncio
+import os
+import threading
+import numpy as np
+from typing import Optional
+
+from backend.scripts.tag_embeddings import EMBEDDING_DIM
+from backend.scripts.tag_matcher import normalize_rows
+from backend.scripts.tag_verification import get_embeddings
+
+# Vector index over listing titles and descriptions for semantic search.
+# Rows are unit-normalized embeddings kept in one float32 matrix alongside an
+# array of listing ids, so a top-k query is one matrix-vector product.
+
+DEFAULT_INDEX_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "listing_embeddings.npz"
+)
+EMBED_BATCH_SIZE = 256  # listings per embeddings.create call
+# Saves rewrite the whole file, so additions within this many seconds share one save
+LISTING_INDEX_SAVE_DELAY = float(os.getenv("LISTING_INDEX_SAVE_DELAY", "5"))
+
+
+def listing_text(row: dict) -> str:
+    """The text embedded for a listing."""
+    return f"{row['title']}. {row.get('description') or ''}".strip()
+
+
+class ListingVectorIndex:
+    def __init__(self, path: Optional[str] = None, dim: int = EMBEDDING_DIM):
+        self.path = path if path is not None else os.getenv("LISTING_INDEX_PATH", DEFAULT_INDEX_PATH)
+        self.dim = dim
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._matrix = np.zeros((0, dim), dtype=np.float32)
+        self._size = 0
+        self.rows: dict[int, int] = {}
+        self._loaded = False
+        self._lock = threading.RLock()
+        self._save_handle: Optional[asyncio.TimerHandle] = None
+        self._saving: Optional[asyncio.Future] = None
+
+    def __len__(self) -> int:
+        self.load()
+        return self._size
+
+    def __contains__(self, listing_id: int) -> bool:
+        self.load()
+        return listing_id in self.rows
+
+    @property
+    def ids(self) -> np.ndarray:
+        self.load()
+        return self._ids[:self._size]
+
+    @property
+    def matrix(self) -> np.ndarray:
+        self.load()
+        return self._matrix[:self._size]
+
+    def load(self):
+        """Loads the saved index from disk the first time it is needed."""
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            if self.path and os.path.exists(self.path):
+                with np.load(self.path) as data:
+                    ids = data["ids"].astype(np.int64)
+                    matrix = np.ascontiguousarray(data["vectors"], dtype=np.float32)
+                if matrix.ndim == 2 and matrix.shape[1] == self.dim and len(ids) == len(matrix):
+                    self._ids, self._matrix, self._size = ids, matrix, len(ids)
+                    self.rows = {int(listing_id): i for i, listing_id in enumerate(ids)}
+            self._loaded = True
+
+    def add(self, listing_ids: list[int], vectors, persist: bool = True):
+        """Adds or replaces listing vectors. New rows are appended to the matrix."""
+        self.load()
+        vectors = normalize_rows(np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim))
+        with self._lock:
+            # Later duplicates win, like a sequence of upserts
+            latest = {listing_id: i for i, listing_id in enumerate(listing_ids)}
+            existing = [(self.rows[listing_id], i) for listing_id, i in latest.items() if listing_id in self.rows]
+            new = [(listing_id, i) for listing_id, i in latest.items() if listing_id not in self.rows]
+            needed = self._size + len(new)
+            if needed > len(self._matrix):
+                capacity = max(needed, 2 * len(self._matrix), 256)
+                matrix = np.zeros((capacity, self.dim), dtype=np.float32)
+                matrix[:self._size] = self._matrix[:self._size]
+                ids = np.zeros(capacity, dtype=np.int64)
+                ids[:self._size] = self._ids[:self._size]
+                self._matrix, self._ids = matrix, ids
+            if existing:
+                rows, positions = zip(*existing)
+                self._matrix[list(rows)] = vectors[list(positions)]
+            if new:
+                new_ids, positions = zip(*new)
+                end = self._size + len(new)
+                self._matrix[self._size:end] = vectors[list(positions)]
+                self._ids[self._size:end] = new_ids
+                self.rows.update((listing_id, row) for row, listing_id in enumerate(new_ids, start=self._size))
+                self._size = end
+            if persist:
+                self.save()
+
+    def query(self, vector, k: int = 20, allowed_ids=None) -> list[tuple[int, float]]:
+        """
+        Returns up to k (listing_id, cosine score) pairs, best first. `allowed_ids`
+        restricts results to listings that currently exist.
+        """
+        self.load()
+        with self._lock:
+            ids, matrix = self._ids[:self._size], self._matrix[:self._size]
+        if not len(ids):
+            return []
+        query = np.asarray(vector, dtype=np.float32)
+        scores = matrix @ (query / (np.linalg.norm(query) or 1.0))
+        if allowed_ids is not None:
+            scores = np.where(np.isin(ids, np.fromiter(allowed_ids, dtype=np.int64)), scores, -np.inf)
+        k = min(k, len(ids))
+        top = np.argpartition(-scores, k - 1)[:k] if k < len(ids) else np.arange(len(ids))
+        top = top[np.argsort(-scores[top])]
+        return [(int(ids[i]), float(scores[i])) for i in top if np.isfinite(scores[i])]
+
+    def save(self):
+        if not self.path:
+            return
+        with self._lock:
+            # Copied so rows replaced while the file is written can't tear it
+            ids, vectors = self._ids[:self._size].copy(), self._matrix[:self._size].copy()
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, ids=ids, vectors=vectors)
+        os.replace(tmp_path, self.path)
+
+    def schedule_save(self, delay: float = LISTING_INDEX_SAVE_DELAY):
+        """Saves the index in a thread after `delay` seconds, unless a save is already scheduled."""
+        if self.path and self._save_handle is None:
+            self._save_handle = asyncio.get_running_loop().call_later(delay, self._start_save)
+
+    def _start_save(self):
+        self._save_handle = None
+        self._saving = asyncio.ensure_future(asyncio.to_thread(self.save))
+        self._saving.add_done_callback(_log_save_error)
+
+    async def flush(self):
+        """Runs a scheduled save now and waits for any save in progress."""
+        if self._save_handle is not None:
+            self._save_handle.cancel()
+            self._start_save()
+        if self._saving is not None:
+            await asyncio.wait([self._saving])
+
+
+def _log_save_error(future: asyncio.Future):
+    if not future.cancelled() and future.exception() is not None:
+        print(f"Failed to save the listing index: {future.exception()}")
+
+
+# Shared index used by /search/listings
+listing_index = ListingVectorIndex()
+
+
+_catch_up: Optional[asyncio.Task] = None
+
+
+async def index_listings(rows: list, index: ListingVectorIndex = listing_index):
+    """Embeds any listings not in the index yet, in batches, and schedules a save of the index."""
+    rows = [row for row in rows if row["id"] not in index]
+    for start in range(0, len(rows), EMBED_BATCH_SIZE):
+        batch = rows[start:start + EMBED_BATCH_SIZE]
+        vectors = await get_embeddings([listing_text(row) for row in batch])
+        index.add([row["id"] for row in batch], vectors, persist=False)
+    if rows:
+        index.schedule_save()
+
+
+async def _index_logged(rows: list, index: ListingVectorIndex):
+    try:
+        await index_listings(rows, index)
+    except Exception as e:
+        # The next search starts another catch-up
+        print(f"Failed to index {len(rows)} listings for search: {e}")
+
+
+def index_in_background(rows: list, index: ListingVectorIndex = listing_index) -> int:
+    """
+    Starts embedding the listings missing from the index (a cold index, or
+    listings added by bulk import), unless a catch-up is already running.
+    Returns how many are missing; searches meanwhile only see indexed listings.
+    """
+    global _catch_up
+    missing = [row for row in rows if row["id"] not in index]
+    if missing and (_catch_up is None or _catch_up.done()):
+        print(f"Indexing {len(missing)} listings for search in the background")
+        _catch_up = asyncio.create_task(_index_logged(missing, index))
+    return len(missing)
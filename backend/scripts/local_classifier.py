@@ -0,0 +1,160 @@
+import os
+import time
+from typing import Optional
+
+from backend.scripts.gazetteer import Gazetteer, gazetteer as default_gazetteer, normalize_words
+from backend.scripts.tag_verification import SIMILARITY_THRESHOLD
+
+# Fast path for /search/analyze. Short prompts that are mostly tag names and
+# a place ("kayak", "tent rental in Barrie") are answered locally: words and
+# word n-grams are matched against the tag vocabulary (exactly, as a plural,
+# or through an embedding already in the tag store), and the location comes
+# from the gazetteer. The confidence is the share of meaningful words that
+# were matched; below LOCAL_CLASSIFIER_MIN_CONFIDENCE the prompt goes to the
+# LLM. A value above 1 sends everything to the LLM.
+
+LOCAL_CLASSIFIER_MIN_CONFIDENCE = float(os.getenv("LOCAL_CLASSIFIER_MIN_CONFIDENCE", "0.75"))
+LOCAL_CLASSIFIER_MAX_WORDS = int(os.getenv("LOCAL_CLASSIFIER_MAX_WORDS", "8"))  # longer prompts need the LLM
+
+# Words that carry no item or place information in a rental search
+STOPWORDS = frozenset("""
+a an and any are at be can could do for from get go going have i im in is it looking me my near need
+needs of on or our please rent rental rentals renting borrow hire some something the this to want we
+with around find
+""".split())
+
+
+def _singulars(phrase: str) -> list[str]:
+    """Candidate singular forms of a phrase, by its last word: 'ski boots' -> ['ski boot']."""
+    if phrase.endswith("es"):
+        return [phrase[:-1], phrase[:-2]]
+    if phrase.endswith("s"):
+        return [phrase[:-1]]
+    return []
+
+
+class LocalSearchClassifier:
+    def __init__(self, min_confidence: float = LOCAL_CLASSIFIER_MIN_CONFIDENCE,
+                 max_words: int = LOCAL_CLASSIFIER_MAX_WORDS, places: Optional[Gazetteer] = None):
+        self.min_confidence = min_confidence
+        self.max_words = max_words
+        self.places = places or default_gazetteer
+        self._vocabulary: list[str] = []
+        self._by_phrase: dict[str, str] = {}
+        self._max_tag_words = 1
+        self._matcher = None
+        self.hits = 0
+        self.misses = 0
+        self.local_seconds = 0.0
+        self.fallbacks = 0
+        self.fallback_seconds = 0.0
+
+    def _use_vocabulary(self, vocabulary: list[str]):
+        """Indexes the tag names by their normalized words, when the vocabulary has changed."""
+        if vocabulary == self._vocabulary:
+            return
+        by_phrase = {}
+        for name in vocabulary:
+            words = [w for w in normalize_words(name) if w]
+            if words:
+                by_phrase.setdefault(" ".join(words), name)
+        self._by_phrase = by_phrase
+        self._max_tag_words = max((phrase.count(" ") + 1 for phrase in by_phrase), default=1)
+        self._vocabulary = list(vocabulary)
+        self._matcher = None
+
+    def _tag_for(self, phrase: str) -> Optional[str]:
+        tag = self._by_phrase.get(phrase)
+        if tag is None:
+            tag = next((self._by_phrase[p] for p in _singulars(phrase) if p in self._by_phrase), None)
+        return tag
+
+    def _embedded_tag_for(self, phrase: str) -> Optional[str]:
+        """The vocabulary tag closest to `phrase`, if the tag store already holds an embedding for it."""
+        from backend.scripts.tag_embeddings import tag_store  # numpy, loaded on first use
+        vector = tag_store.get(phrase)
+        if vector is None:
+            return None
+        if self._matcher is None:
+            from backend.scripts.tag_matcher import NearestTagMatcher
+            self._matcher = NearestTagMatcher.from_store(
+                tag_store, [name for name in self._vocabulary if name in tag_store], SIMILARITY_THRESHOLD
+            )
+        match = self._matcher.best_match(vector)
+        return match.name if match else None
+
+    def classify(self, prompt: str, vocabulary: list[str]) -> Optional[dict]:
+        """A search analysis (tags, description, location) for `prompt`, or None if the LLM should decide."""
+        start = time.perf_counter()
+        try:
+            result = self._classify(prompt, vocabulary)
+        finally:
+            self.local_seconds += time.perf_counter() - start
+        if result is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return result
+
+    def _classify(self, prompt: str, vocabulary: list[str]) -> Optional[dict]:
+        words = [w for w in normalize_words(prompt) if w]
+        content = [i for i, word in enumerate(words) if word not in STOPWORDS]
+        if not content or len(content) > self.max_words:
+            return None
+        self._use_vocabulary(vocabulary)
+        covered = set()
+
+        location = "unknown"
+        place = self.places.match(words)
+        if place is not None:
+            location = place[0].name
+            covered.update(range(place[1], place[1] + place[2]))
+
+        # Longest tag names first, each word used by at most one tag
+        tags, used = [], set()
+        for size in range(min(len(words), self._max_tag_words), 0, -1):
+            for start in range(len(words) - size + 1):
+                span = range(start, start + size)
+                if used.intersection(span) or all(words[i] in STOPWORDS for i in span):
+                    continue
+                tag = self._tag_for(" ".join(words[start:start + size]))
+                if tag is not None:
+                    used.update(span)
+                    if tag not in tags:
+                        tags.append(tag)
+        # Leftover words may still be known through an embedding computed earlier
+        for i in content:
+            if i not in used and i not in covered:
+                tag = self._embedded_tag_for(words[i])
+                if tag is not None:
+                    used.add(i)
+                    if tag not in tags:
+                        tags.append(tag)
+
+        covered |= used
+        confidence = sum(1 for i in content if i in covered) / len(content)
+        if not tags or confidence < self.min_confidence:
+            return None
+        description = f"Looking for {', '.join(tags)}" + (f" in {location}." if place is not None else ".")
+        return {"tags": tags, "description": description, "location": location}
+
+    def record_fallback(self, seconds: float):
+        """Time an LLM classification took after the fast path declined, for the savings estimate."""
+        self.fallbacks += 1
+        self.fallback_seconds += seconds
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        llm_avg = self.fallback_seconds / self.fallbacks if self.fallbacks else 0.0
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "avg_local_ms": round(1000 * self.local_seconds / lookups, 3) if lookups else 0.0,
+            "avg_llm_ms": round(1000 * llm_avg, 1),
+            "estimated_saved_seconds": round(self.hits * llm_avg, 1),
+        }
+
+
+# Shared classifier used by /search/analyze and /search/listings
+local_classifier = LocalSearchClassifier()
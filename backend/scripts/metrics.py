@@ -0,0 +1,219 @@
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+# Request timing. Every Supabase query and OpenAI call is recorded as a span
+# (upstream, target) where target is the table name or OpenAI operation. Spans
+# are summed per request, for the Server-Timing header, and into process-wide
+# histograms served in Prometheus text format from /metrics.
+#
+# METRICS_ENABLED=false turns everything off: no middleware is installed and
+# the Supabase clients are returned unwrapped. SERVER_TIMING=true adds the
+# Server-Timing header. Each worker process keeps its own metrics.
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING", "false").lower() in ("1", "true", "yes")
+
+# Seconds; covers a cached lookup (~1ms) up to a slow vision call
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Histogram:
+    __slots__ = ("counts", "count", "sum")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds: float):
+        self.counts[bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+
+class MetricsRegistry:
+    """Histograms keyed by label values, for requests and upstream calls."""
+
+    def __init__(self):
+        self.requests: dict[tuple, Histogram] = {}
+        self.upstream: dict[tuple, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def observe_request(self, method: str, route: str, status: int, seconds: float):
+        key = (method, route, str(status))
+        with self._lock:
+            histogram = self.requests.get(key) or self.requests.setdefault(key, Histogram())
+            histogram.observe(seconds)
+
+    def observe_upstream(self, upstream: str, target: str, seconds: float):
+        key = (upstream, target)
+        with self._lock:
+            histogram = self.upstream.get(key) or self.upstream.setdefault(key, Histogram())
+            histogram.observe(seconds)
+
+    def render(self) -> str:
+        """Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            _render_histogram(lines, "http_request_duration_seconds", "Time spent handling requests",
+                              ("method", "route", "status"), self.requests)
+            _render_histogram(lines, "upstream_call_duration_seconds", "Time spent in Supabase and OpenAI calls",
+                              ("upstream", "target"), self.upstream)
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _render_histogram(lines: list, name: str, help_text: str, label_names: tuple, histograms: dict):
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} histogram")
+    for key, histogram in sorted(histograms.items()):
+        labels = ",".join(f'{label}="{_escape(value)}"' for label, value in zip(label_names, key))
+        cumulative = 0
+        for bound, count in zip(BUCKETS + (float("inf"),), histogram.counts):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            lines.append(f'{name}_bucket{{{labels},le="{le}"}} {cumulative}')
+        lines.append(f"{name}_sum{{{labels}}} {histogram.sum}")
+        lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+
+
+metrics = MetricsRegistry()
+
+# Spans of the request being handled: (upstream, target) -> [count, seconds]
+_request_spans: ContextVar[Optional[dict]] = ContextVar("request_spans", default=None)
+
+
+def record(upstream: str, target: str, seconds: float):
+    metrics.observe_upstream(upstream, target, seconds)
+    spans = _request_spans.get()
+    if spans is not None:
+        span = spans.get((upstream, target))
+        if span is None:
+            spans[(upstream, target)] = [1, seconds]
+        else:
+            span[0] += 1
+            span[1] += seconds
+
+
+@contextmanager
+def span(upstream: str, target: str):
+    """Times the enclosed block as one call to `upstream`."""
+    if not METRICS_ENABLED:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(upstream, target, time.perf_counter() - start)
+
+
+def server_timing(spans: dict, total: float) -> str:
+    """Server-Timing value: one entry per upstream target plus the total."""
+    entries = [
+        f'{upstream}-{target.replace(" ", "_")};desc="{count} calls";dur={1000 * seconds:.1f}'
+        for (upstream, target), (count, seconds) in spans.items()
+    ]
+    entries.append(f"total;dur={1000 * total:.1f}")
+    return ", ".join(entries)
+
+
+class TimingMiddleware:
+    """ASGI middleware recording request durations and, optionally, a Server-Timing header."""
+
+    def __init__(self, app, server_timing_header: bool = SERVER_TIMING_ENABLED):
+        self.app = app
+        self.server_timing_header = server_timing_header
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        spans = {}
+        token = _request_spans.set(spans)
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if self.server_timing_header:
+                    header = server_timing(spans, time.perf_counter() - start)
+                    message["headers"] = list(message.get("headers", [])) + [(b"server-timing", header.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_spans.reset(token)
+            route = scope.get("route")
+            metrics.observe_request(scope["method"], getattr(route, "path", "unmatched"), status,
+                                    time.perf_counter() - start)
+
+
+class _TimedQuery:
+    """Wraps a postgrest query builder so execute() is recorded as a Supabase span for its table."""
+
+    __slots__ = ("_builder", "_table")
+
+    def __init__(self, builder, table: str):
+        self._builder = builder
+        self._table = table
+
+    def __getattr__(self, name):
+        attr = getattr(self._builder, name)
+        if not callable(attr):
+            return attr
+
+        def chained(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            return type(self)(result, self._table) if hasattr(result, "execute") else result
+        return chained
+
+    def execute(self):
+        start = time.perf_counter()
+        try:
+            return self._builder.execute()
+        finally:
+            record("supabase", self._table, time.perf_counter() - start)
+
+
+class _AsyncTimedQuery(_TimedQuery):
+    __slots__ = ()
+
+    async def execute(self):
+        start = time.perf_counter()
+        try:
+            return await self._builder.execute()
+        finally:
+            record("supabase", self._table, time.perf_counter() - start)
+
+
+class _TimedClient:
+    """Forwards everything to the Supabase client, wrapping the builders returned by table()."""
+
+    def __init__(self, client, query_type):
+        self._client = client
+        self._query_type = query_type
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+    def table(self, name: str):
+        return self._query_type(self._client.table(name), name)
+
+
+def instrument_supabase(client, is_async: bool):
+    """Returns the client with query timing, or unchanged when metrics are disabled."""
+    if not METRICS_ENABLED:
+        return client
+    return _TimedClient(client, _AsyncTimedQuery if is_async else _TimedQuery)
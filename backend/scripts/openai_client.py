@@ -0,0 +1,108 @@
+import asyncio
+import os
+import random
+from typing import TYPE_CHECKING, Optional
+
+from backend.scripts.metrics import span
+
+if TYPE_CHECKING:
+    import openai
+
+# Shared async OpenAI client used by photo_tags, search_tags and tag_verification.
+# One client per worker keeps its HTTP connections alive between calls; a
+# semaphore caps how many OpenAI calls run at once, every attempt has a
+# timeout, and rate-limit / transient errors are retried with backoff.
+# The openai package takes ~0.2s to import, so it is only imported when the
+# first call is made; most requests never need it.
+
+OPENAI_MAX_CONCURRENCY = int(os.getenv("OPENAI_MAX_CONCURRENCY", "8"))
+OPENAI_TIMEOUT_SECONDS = float(os.getenv("OPENAI_TIMEOUT", "30"))
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "3"))
+OPENAI_BACKOFF_SECONDS = float(os.getenv("OPENAI_BACKOFF", "0.5"))
+OPENAI_MAX_BACKOFF_SECONDS = float(os.getenv("OPENAI_MAX_BACKOFF", "10"))  # longest wait before a retry
+
+_client: Optional["openai.AsyncOpenAI"] = None
+_semaphore: Optional[asyncio.Semaphore] = None
+
+
+def retryable_errors() -> tuple:
+    import openai
+    return (
+        openai.RateLimitError,
+        openai.APITimeoutError,
+        openai.APIConnectionError,
+        openai.InternalServerError,
+        asyncio.TimeoutError,
+    )
+
+
+def get_openai_client() -> "openai.AsyncOpenAI":
+    """Returns the shared async OpenAI client, creating it on first use."""
+    global _client
+    if _client is None:
+        api_key = os.getenv("OPENAI_API_KEY")
+        if not api_key:
+            raise ValueError("OPENAI_API_KEY not found in .env file")
+        import openai
+        # Retries are handled in call_openai so they respect the concurrency limit
+        _client = openai.AsyncOpenAI(api_key=api_key, timeout=OPENAI_TIMEOUT_SECONDS, max_retries=0)
+    return _client
+
+
+def _get_semaphore() -> asyncio.Semaphore:
+    global _semaphore
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(OPENAI_MAX_CONCURRENCY)
+    return _semaphore
+
+
+def _retry_delay(error: Exception, attempt: int) -> Optional[float]:
+    """
+    Exponential backoff with jitter, or the server's Retry-After if it sent one,
+    at most OPENAI_MAX_BACKOFF_SECONDS. None if Retry-After asks for longer
+    than that, since retrying any sooner would only be rejected again.
+    """
+    response = getattr(error, "response", None)
+    retry_after = response.headers.get("retry-after") if response is not None else None
+    if retry_after:
+        try:
+            delay = float(retry_after)
+        except ValueError:
+            pass
+        else:
+            return max(delay, 0.0) if delay <= OPENAI_MAX_BACKOFF_SECONDS else None
+    return min(OPENAI_BACKOFF_SECONDS * (2 ** attempt) * (1 + random.random()), OPENAI_MAX_BACKOFF_SECONDS)
+
+
+async def call_openai(make_request, timeout: Optional[float] = None):
+    """
+    Runs `make_request()` (a coroutine factory using the shared client) under the
+    concurrency limit and a per-attempt timeout, retrying retryable errors.
+    The semaphore is released while waiting to retry.
+    """
+    timeout = timeout or OPENAI_TIMEOUT_SECONDS
+    retryable = retryable_errors()
+    for attempt in range(OPENAI_MAX_RETRIES + 1):
+        try:
+            async with _get_semaphore():
+                return await asyncio.wait_for(make_request(), timeout)
+        except retryable as e:
+            delay = _retry_delay(e, attempt)
+            if attempt == OPENAI_MAX_RETRIES or delay is None:
+                raise
+            print(f"OpenAI call failed ({type(e).__name__}), retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+
+async def chat_completion(timeout: Optional[float] = None, **kwargs):
+    """chat.completions.create on the shared client."""
+    client = get_openai_client()
+    with span("openai", "chat.completions"):
+        return await call_openai(lambda: client.chat.completions.create(**kwargs), timeout)
+
+
+async def create_embeddings(texts: list[str], model: str, timeout: Optional[float] = None):
+    """embeddings.create on the shared client."""
+    client = get_openai_client()
+    with span("openai", "embeddings"):
+        return await call_openai(lambda: client.embeddings.create(input=texts, model=model), timeout)
@@ -1,19 +1,27 @@
-import openai
 import os
 import sys
 import json
 import base64
+import asyncio
+
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from backend.scripts.openai_client import chat_completion
+from backend.scripts.single_flight import single_flight
 
 # The .env file is now loaded by main.py, so we don't need to do it here.
 
-def generate_details_from_image_bytes(image_bytes: bytes) -> dict:
+# The same photo uploaded concurrently (e.g. a double submit) is analyzed once
+@single_flight("generate_details_from_image_bytes")
+async def generate_details_from_image_bytes(image_bytes: bytes, content_type: str = "image/jpeg") -> dict:
     """
-    Uses OpenAI's vision model to generate a description and tags from image bytes.
+    Uses OpenAI's vision model to generate a description and tags from image bytes
+    of the given MIME type.
     """
-    client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
     base64_image = base64.b64encode(image_bytes).decode('utf-8')
 
-    response = client.chat.completions.create(
+    response = await chat_completion(
         model="gpt-4o",
         messages=[
             {
@@ -31,7 +39,7 @@ def generate_details_from_image_bytes(image_bytes: bytes) -> dict:
                     },
                     {
                         "type": "image_url", 
-                        "image_url": {"url": f"data:image/jpeg;base64,{base64_image}"}
+                        "image_url": {"url": f"data:{content_type};base64,{base64_image}"}
                     },
                 ],
             }
@@ -47,11 +55,11 @@ def generate_details_from_image_bytes(image_bytes: bytes) -> dict:
         if result_text.startswith("json"):
             result_text = result_text[len("json"):].strip()
 
-    # Parse JSON safely
+    # Parse JSON safely; the fallback is flagged so callers don't keep it as the photo's analysis
     try:
         return json.loads(result_text)
     except (json.JSONDecodeError, IndexError):
-        return {"description": "Could not generate description.", "tags": []}
+        return {"description": "Could not generate description.", "tags": [], "analysis_failed": True}
 
 if __name__ == "__main__":
     if len(sys.argv) != 2:
@@ -62,7 +70,7 @@ if __name__ == "__main__":
     try:
         with open(image_path, "rb") as image_file:
             image_bytes = image_file.read()
-            result = generate_details_from_image_bytes(image_bytes)
+            result = asyncio.run(generate_details_from_image_bytes(image_bytes))
             print(json.dumps(result, indent=2))
     except FileNotFoundError:
         print(f"Error: Image file not found at {image_path}")
@@ -0,0 +1,18 @@
+# Column lists for the Supabase selects, so each endpoint fetches only the
+# fields it uses instead of select("*"). Cached results are keyed by the
+# projection, so endpoints share an entry only when they ask for the same columns.
+
+TAG_COLUMNS = "id, name"
+USER_COLUMNS = "id, fname, lname"
+
+# Home page, feed, filter and search cards; also what the tag index and the
+# search embedding text need
+LISTING_CARD_COLUMNS = "id, title, description, price, location, tags, picture, rating, num_reviews"
+LISTING_DETAIL_COLUMNS = LISTING_CARD_COLUMNS + ", user"
+
+# The profile page shows a title, price and image per listing and the first tag as its category
+PROFILE_LISTING_COLUMNS = "id, title, price, picture, user, tags"
+PROFILE_REQUEST_COLUMNS = "id, item, requested_user, start_date, end_date, message, approve"
+
+# All the reservation index needs
+RESERVATION_COLUMNS = "item, start_date, end_date, approve"
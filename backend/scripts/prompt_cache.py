@@ -0,0 +1,129 @@
+import asyncio
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Optional
+
+# Cache of search prompt analyses keyed on a normalized prompt, so repeated
+# phrasings ("Going to the beach!", "going to the beach") skip the LLM call.
+# Entries live in an in-memory LRU and, optionally, in a SQLite file that
+# survives restarts. The SQLite tier is best effort: if the file can't be read
+# or written (e.g. another worker holds the lock) the cache carries on in memory.
+
+SEARCH_CACHE_TTL_SECONDS = float(os.getenv("SEARCH_CACHE_TTL", str(24 * 60 * 60)))
+SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "1000"))
+SEARCH_CACHE_DB = os.getenv("SEARCH_CACHE_DB")  # e.g. backend/.cache/search_cache.sqlite3
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Folds case, punctuation and whitespace: ' Ski  trip?! ' -> 'ski trip'."""
+    prompt = unicodedata.normalize("NFKC", prompt).casefold()
+    prompt = "".join(" " if unicodedata.category(ch).startswith("P") else ch for ch in prompt)
+    return re.sub(r"\s+", " ", prompt).strip()
+
+
+class PromptCache:
+    """LRU + TTL cache of JSON-serializable results, with an optional SQLite tier."""
+
+    def __init__(self, max_entries: int = SEARCH_CACHE_MAX_ENTRIES, ttl: float = SEARCH_CACHE_TTL_SECONDS,
+                 db_path: Optional[str] = SEARCH_CACHE_DB):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._db = None
+        if db_path:
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS prompt_cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._db.execute("DELETE FROM prompt_cache WHERE expires_at <= ?", (time.time(),))
+            self._db.commit()
+
+    def get(self, prompt: str) -> Optional[dict]:
+        key = normalize_prompt(prompt)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.time():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if self._db is not None:
+                try:
+                    with self._db_lock:
+                        row = self._db.execute(
+                            "SELECT value, expires_at FROM prompt_cache WHERE key = ? AND expires_at > ?",
+                            (key, time.time()),
+                        ).fetchone()
+                except sqlite3.Error as e:
+                    print(f"Could not read the search cache: {e}")
+                    row = None
+                if row is not None:
+                    value = json.loads(row[0])
+                    self._remember(key, value, row[1])
+                    self.disk_hits += 1
+                    return value
+            self.misses += 1
+            return None
+
+    def set(self, prompt: str, value: dict):
+        key, expires_at = self._set_in_memory(prompt, value)
+        self._write(key, value, expires_at)
+
+    async def aset(self, prompt: str, value: dict):
+        """Like set, with the SQLite write in a thread so it doesn't block the event loop."""
+        key, expires_at = self._set_in_memory(prompt, value)
+        if self._db is not None:
+            await asyncio.to_thread(self._write, key, value, expires_at)
+
+    def _set_in_memory(self, prompt: str, value: dict) -> tuple[str, float]:
+        key = normalize_prompt(prompt)
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            self._remember(key, value, expires_at)
+        return key, expires_at
+
+    def _write(self, key: str, value: dict, expires_at: float):
+        if self._db is None:
+            return
+        try:
+            with self._db_lock:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO prompt_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(value), expires_at),
+                )
+                self._db.commit()
+        except sqlite3.Error as e:
+            # The result is still cached in memory; losing the disk copy only costs a future LLM call
+            print(f"Could not write the search cache: {e}")
+
+    def _remember(self, key: str, value: dict, expires_at: float):
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            }
+
+
+# Shared cache for /search/analyze
+search_cache = PromptCache()
@@ -0,0 +1,107 @@
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import Optional
+
+# Per-listing index of reservation date ranges. Dates are parsed once when the
+# index is built; lookups are bisects over sorted, merged intervals.
+
+ONE_DAY = timedelta(days=1)
+
+
+def parse_date(value) -> date:
+    """Parses a 'YYYY-MM-DD' string (or passes a date through)."""
+    return value if isinstance(value, date) else date.fromisoformat(value)
+
+
+class IntervalSet:
+    """
+    Sorted, disjoint set of inclusive date ranges. Adding a range merges it with
+    any ranges it overlaps or touches, so each day belongs to at most one range.
+    """
+
+    def __init__(self):
+        self.starts: list[date] = []
+        self.ends: list[date] = []
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def add(self, start: date, end: date):
+        # Ranges [i, j) overlap or touch the new one and get merged into it
+        i = bisect_left(self.ends, start - ONE_DAY)
+        j = bisect_right(self.starts, end + ONE_DAY)
+        if i < j:
+            start = min(start, self.starts[i])
+            end = max(end, self.ends[j - 1])
+        self.starts[i:j] = [start]
+        self.ends[i:j] = [end]
+
+    def containing(self, day: date) -> Optional[tuple[date, date]]:
+        """Returns the range that contains `day`, if any."""
+        i = bisect_right(self.starts, day) - 1
+        if i >= 0 and self.ends[i] >= day:
+            return self.starts[i], self.ends[i]
+        return None
+
+    def overlaps(self, start: date, end: date) -> bool:
+        """True if any stored range shares at least one day with [start, end]."""
+        i = bisect_left(self.ends, start)
+        return i < len(self.starts) and self.starts[i] <= end
+
+
+class ListingReservations:
+    def __init__(self):
+        # Every request blocks the day before it starts through the day after it
+        # ends (turnaround), which is what the availability shown on cards uses
+        self.blocked = IntervalSet()
+        # Approved bookings only, without the buffer, for conflict checks
+        self.approved = IntervalSet()
+        self.approved_ranges: list[dict] = []
+
+
+class ReservationIndex:
+    """Reservation intervals for every listing, built from `requests` rows."""
+
+    def __init__(self):
+        self._listings: defaultdict[int, ListingReservations] = defaultdict(ListingReservations)
+
+    @classmethod
+    def from_requests(cls, requests: list) -> "ReservationIndex":
+        index = cls()
+        for request in requests:
+            index.add_request(request)
+        return index
+
+    def add_request(self, request: dict):
+        start = parse_date(request["start_date"])
+        end = parse_date(request["end_date"])
+        listing = self._listings[request["item"]]
+        listing.blocked.add(start - ONE_DAY, end + ONE_DAY)
+        if request.get("approve") == 1:
+            listing.approved.add(start, end)
+            listing.approved_ranges.append({"start": request["start_date"], "end": request["end_date"]})
+
+    def items(self):
+        """(listing id, ListingReservations) for every listing with requests."""
+        return self._listings.items()
+
+    def next_available(self, listing_id: int, today: date) -> date:
+        """First day on or after `today` that isn't blocked by a request."""
+        listing = self._listings.get(listing_id)
+        found = listing.blocked.containing(today) if listing else None
+        return found[1] + ONE_DAY if found else today
+
+    def availability(self, listing_id: int, today: date) -> str:
+        """Next available day formatted for listing cards (e.g. 'June 10')."""
+        return self.next_available(listing_id, today).strftime('%B %d')
+
+    def conflicts(self, listing_id: int, start: date, end: date) -> bool:
+        """True if [start, end] overlaps an approved booking of the listing."""
+        listing = self._listings.get(listing_id)
+        return bool(listing) and listing.approved.overlaps(start, end)
+
+    def approved_ranges(self, listing_id: int) -> list[dict]:
+        """Approved bookings as {'start', 'end'} date strings, in insertion order."""
+        listing = self._listings.get(listing_id)
+        return list(listing.approved_ranges) if listing else []
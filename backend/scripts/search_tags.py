@@ -1,15 +1,20 @@
-import openai
 import os
 import sys
 import json
-from dotenv import load_dotenv
+import asyncio
 
-load_dotenv()
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
 
-def classify_search_prompt(prompt: str) -> dict:
-    client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+from backend.scripts.openai_client import chat_completion
+from backend.scripts.prompt_cache import normalize_prompt
+from backend.scripts.single_flight import single_flight
 
-    response = client.chat.completions.create(
+# Concurrent requests for the same prompt (same as far as the prompt cache is
+# concerned) share one gpt-4o call
+@single_flight("classify_search_prompt", key=normalize_prompt)
+async def classify_search_prompt(prompt: str) -> dict:
+    response = await chat_completion(
         model="gpt-4o",
         messages=[
             {
@@ -40,10 +45,13 @@ def classify_search_prompt(prompt: str) -> dict:
 
 
 if __name__ == "__main__":
+    from dotenv import load_dotenv
+    load_dotenv(os.path.join(os.path.dirname(__file__), '..', '.env'))
+
     if len(sys.argv) != 2:
         print("Usage: python searchTags.py \"<search prompt>\"")
         sys.exit(1)
 
     prompt = sys.argv[1]
-    result = classify_search_prompt(prompt)
+    result = asyncio.run(classify_search_prompt(prompt))
     print(json.dumps(result, indent=2))
\ No newline at end of file
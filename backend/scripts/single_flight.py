@@ -0,0 +1,66 @@
+import asyncio
+import functools
+from typing import Any, Awaitable, Callable, Hashable, Optional
+
+# Coalesces concurrent identical calls: while a call for a key is in flight,
+# further callers with the same key wait for it and get its result (or its
+# exception) instead of starting another upstream request. Nothing is kept
+# after the call finishes; caching results is left to the callers.
+#
+# The shared call runs as its own task, so a caller that goes away (e.g. a
+# client disconnect cancelling its request) doesn't cancel it for the others.
+
+
+class SingleFlight:
+    def __init__(self, name: str):
+        self.name = name
+        self.calls = 0  # upstream calls started
+        self.coalesced = 0  # callers that joined a call already in flight
+        self._in_flight: dict[Hashable, asyncio.Task] = {}
+
+    async def do(self, key: Hashable, call: Callable[[], Awaitable[Any]]) -> Any:
+        """Returns the result of `call()`, shared with any concurrent callers using the same key."""
+        task = self._in_flight.get(key)
+        if task is None or task.get_loop() is not asyncio.get_running_loop():
+            task = asyncio.ensure_future(call())
+            self._in_flight[key] = task
+            task.add_done_callback(functools.partial(self._finished, key))
+            self.calls += 1
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _finished(self, key: Hashable, task: asyncio.Task):
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        if not task.cancelled():
+            task.exception()  # retrieved here so an unawaited failure isn't logged as "never retrieved"
+
+    def stats(self) -> dict:
+        return {"calls": self.calls, "coalesced": self.coalesced, "in_flight": len(self._in_flight)}
+
+
+# Every single-flight group, by name, for the stats endpoint
+groups: dict[str, SingleFlight] = {}
+
+
+def single_flight(name: str, key: Optional[Callable[..., Hashable]] = None):
+    """
+    Decorator for async functions: concurrent calls with equal keys share one
+    execution. The key defaults to the call's arguments; pass `key` to derive it
+    (e.g. a normalized prompt) from the same arguments.
+    """
+    group = groups.setdefault(name, SingleFlight(name))
+
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            call_key = key(*args, **kwargs) if key is not None else (args, tuple(sorted(kwargs.items())))
+            return await group.do(call_key, lambda: fn(*args, **kwargs))
+        wrapper.single_flight = group
+        return wrapper
+    return decorator
+
+
+def stats() -> dict:
+    return {name: group.stats() for name, group in groups.items()}
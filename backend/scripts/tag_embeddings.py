@@ -0,0 +1,197 @@
+import fcntl
+import os
+import struct
+import threading
+import numpy as np
+from contextlib import contextmanager
+from typing import Optional
+
+# Persistent store of tag embeddings so verification only has to embed the
+# new candidate tags instead of the whole tag vocabulary on every call.
+#
+# On disk it is a .npz snapshot plus an append-only log next to it
+# (<path>.log). Adding tags appends their rows to the log, so the cost is the
+# size of the new rows, not of the whole store; save() folds the log back into
+# the snapshot. Each log record is a 2-byte name length, the UTF-8 name and
+# the float32 vector.
+#
+# Workers share the files through a flock on <path>.lock: loading takes it
+# shared, appending and saving take it exclusive. Only a writer ever cuts the
+# log; a reader just skips a partial last record.
+
+EMBEDDING_DIM = 1536  # text-embedding-3-small
+NAME_LENGTH = struct.Struct("<H")
+DEFAULT_STORE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "tag_embeddings.npz"
+)
+
+
+class TagEmbeddingStore:
+    """
+    Keeps tag names and their embeddings in one contiguous float32 matrix.
+    The matrix is loaded from disk once and grown in place as tags are added,
+    so row i of `matrix` is always the embedding of `names[i]`.
+    """
+
+    def __init__(self, path: Optional[str] = None, dim: int = EMBEDDING_DIM):
+        self.path = path or os.getenv("TAG_EMBEDDINGS_PATH", DEFAULT_STORE_PATH)
+        self.log_path = f"{self.path}.log"
+        self.lock_path = f"{self.path}.lock"
+        self.dim = dim
+        self.names: list[str] = []
+        self.index: dict[str, int] = {}
+        self._buffer = np.zeros((0, dim), dtype=np.float32)
+        self._size = 0
+        self._loaded = False
+        self._lock = threading.RLock()
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """All stored embeddings, one row per tag (a view, not a copy)."""
+        self.load()
+        return self._buffer[:self._size]
+
+    def __len__(self) -> int:
+        self.load()
+        return self._size
+
+    def __contains__(self, name: str) -> bool:
+        self.load()
+        return name in self.index
+
+    @contextmanager
+    def _file_lock(self, operation: int):
+        """Holds the flock other processes using the same files take (LOCK_SH or LOCK_EX)."""
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.lock_path, "w") as lock:
+            fcntl.flock(lock, operation)
+            yield
+
+    def load(self):
+        """Loads the store from disk the first time it is needed."""
+        if self._loaded:
+            return
+        with self._lock, self._file_lock(fcntl.LOCK_SH):
+            if self._loaded:
+                return
+            if os.path.exists(self.path):
+                with np.load(self.path) as data:
+                    names = [str(name) for name in data["names"]]
+                    vectors = np.ascontiguousarray(data["vectors"], dtype=np.float32)
+                if vectors.ndim == 2 and vectors.shape[1] == self.dim and len(names) == len(vectors):
+                    self.names = names
+                    self.index = {name: i for i, name in enumerate(names)}
+                    self._buffer = vectors
+                    self._size = len(names)
+                else:
+                    print(f"Ignoring tag embedding store at {self.path}: shape does not match.")
+            self._loaded = True
+            names, vectors, _ = self._read_log()
+            if names:
+                self.add(names, vectors, persist=False)
+
+    def _read_log(self) -> tuple[list[str], list[np.ndarray], int]:
+        """
+        Rows appended since the last save, and the length of the log up to the
+        end of the last complete record. A partly written last record (from a
+        worker that died mid-write) is skipped, not removed.
+        """
+        names, vectors = [], []
+        if not os.path.exists(self.log_path):
+            return names, vectors, 0
+        with open(self.log_path, "rb") as f:
+            data = f.read()
+        row_bytes = 4 * self.dim
+        offset = 0
+        while offset + NAME_LENGTH.size <= len(data):
+            (length,) = NAME_LENGTH.unpack_from(data, offset)
+            end = offset + NAME_LENGTH.size + length + row_bytes
+            if end > len(data):
+                break
+            names.append(data[offset + NAME_LENGTH.size:end - row_bytes].decode("utf-8"))
+            vectors.append(np.frombuffer(data, dtype=np.float32, count=self.dim, offset=end - row_bytes))
+            offset = end
+        return names, vectors, offset
+
+    def _append_log(self, rows: dict[str, np.ndarray]):
+        records = []
+        for name, vec in rows.items():
+            encoded = name.encode("utf-8")
+            records += [NAME_LENGTH.pack(len(encoded)), encoded, np.ascontiguousarray(vec, dtype="<f4").tobytes()]
+        with self._file_lock(fcntl.LOCK_EX):
+            # With the exclusive lock no other append is in progress, so a partial
+            # last record is left over from a crash; cut it before writing after it
+            _, _, valid = self._read_log()
+            if os.path.exists(self.log_path) and os.path.getsize(self.log_path) > valid:
+                print(f"Truncating a partial record from {self.log_path}")
+                with open(self.log_path, "r+b") as f:
+                    f.truncate(valid)
+            with open(self.log_path, "ab") as f:
+                f.write(b"".join(records))
+
+    def get(self, name: str) -> Optional[np.ndarray]:
+        """Returns the stored embedding for a tag, or None if it is unknown."""
+        self.load()
+        i = self.index.get(name)
+        return None if i is None else self._buffer[i]
+
+    def missing(self, names: list[str]) -> list[str]:
+        """Returns the names (deduplicated, in order) that have no stored embedding."""
+        self.load()
+        return list(dict.fromkeys(name for name in names if name not in self.index))
+
+    def add(self, names: list[str], vectors, persist: bool = True):
+        """
+        Appends embeddings for new tags. Names already in the store are skipped.
+        The underlying buffer grows geometrically so repeated appends stay cheap,
+        and with `persist` only the new rows are written, to the log.
+        """
+        self.load()
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+        with self._lock:
+            rows = {}
+            for name, vec in zip(names, vectors):
+                if name not in self.index and name not in rows:
+                    rows[name] = vec
+            if not rows:
+                return
+            needed = self._size + len(rows)
+            if needed > len(self._buffer):
+                grown = np.zeros((max(needed, 2 * len(self._buffer), 64), self.dim), dtype=np.float32)
+                grown[:self._size] = self._buffer[:self._size]
+                self._buffer = grown
+            for name, vec in rows.items():
+                self._buffer[self._size] = vec
+                self.index[name] = self._size
+                self.names.append(name)
+                self._size += 1
+            if persist:
+                self._append_log(rows)
+
+    def save(self):
+        """
+        Writes the whole store as a new snapshot (temp file + rename) and empties
+        the log. Rewrites everything, so it is for compaction, not per append.
+        Rows other processes appended since this one loaded are read back first.
+        """
+        self.load()
+        with self._lock, self._file_lock(fcntl.LOCK_EX):
+            names, vectors, _ = self._read_log()
+            if names:
+                self.add(names, vectors, persist=False)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                np.savez(f, names=np.array(self.names, dtype=str), vectors=self._buffer[:self._size])
+            os.replace(tmp_path, self.path)
+            if os.path.exists(self.log_path):
+                os.remove(self.log_path)
+
+
+# Shared store used by tag verification
+tag_store = TagEmbeddingStore()
+
+
+if __name__ == "__main__":
+    # Folds the append log into the snapshot: python -m backend.scripts.tag_embeddings
+    tag_store.save()
+    print(f"Saved {len(tag_store)} tag embeddings to {tag_store.path}")
@@ -0,0 +1,88 @@
+import os
+import time
+from bisect import insort
+from collections import defaultdict
+from typing import Optional
+
+# In-memory inverted index over listings: tag id -> sorted listing ids, plus the
+# same for normalized locations, so tag/location filtering is a set
+# intersection instead of a table scan.
+
+TAG_INDEX_TTL_SECONDS = float(os.getenv("TAG_INDEX_TTL", "300"))
+
+
+def normalize_location(location: str) -> str:
+    return " ".join(location.casefold().split())
+
+
+def location_keys(location: Optional[str]) -> set[str]:
+    """Keys a listing location is indexed under: the whole string and each comma-separated part."""
+    if not location:
+        return set()
+    keys = {normalize_location(location)}
+    keys.update(normalize_location(part) for part in location.split(","))
+    keys.discard("")
+    return keys
+
+
+def _add_posting(postings: list, listing_id: int):
+    if not postings or postings[-1] < listing_id:
+        postings.append(listing_id)  # ids usually arrive in increasing order
+    elif listing_id not in postings:
+        insort(postings, listing_id)
+
+
+class ListingTagIndex:
+    def __init__(self):
+        self.by_tag: defaultdict[int, list] = defaultdict(list)
+        self.by_location: defaultdict[str, list] = defaultdict(list)
+        self.rows: dict[int, dict] = {}
+        self.built_at: Optional[float] = None
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def rebuild(self, listings: list):
+        """Replaces the index contents with the given listing rows."""
+        index = ListingTagIndex()
+        for row in sorted(listings, key=lambda row: row["id"]):
+            index.add_listing(row)
+        # Swap whole structures so concurrent readers see either the old or new index
+        self.by_tag, self.by_location, self.rows = index.by_tag, index.by_location, index.rows
+        self.built_at = time.monotonic()
+
+    def is_stale(self, ttl: float = TAG_INDEX_TTL_SECONDS) -> bool:
+        return self.built_at is None or time.monotonic() - self.built_at > ttl
+
+    def add_listing(self, row: dict):
+        listing_id = row["id"]
+        self.rows[listing_id] = row
+        for tag_id in row.get("tags") or []:
+            _add_posting(self.by_tag[tag_id], listing_id)
+        for key in location_keys(row.get("location")):
+            _add_posting(self.by_location[key], listing_id)
+
+    def lookup(self, tag_ids: list[int], mode: str = "or", location: Optional[str] = None) -> list[int]:
+        """
+        Listing ids (ascending) having all (`mode="and"`) or any (`mode="or"`) of
+        the tags, narrowed to `location` if given. No tags means every listing.
+        """
+        if tag_ids:
+            postings = sorted((self.by_tag.get(tag_id, []) for tag_id in tag_ids), key=len)
+            if mode == "and":
+                # Start from the shortest posting list so the intersection stays small
+                ids = set(postings[0]).intersection(*postings[1:])
+            else:
+                ids = set().union(*postings)
+        else:
+            ids = None
+        if location:
+            located = self.by_location.get(normalize_location(location), [])
+            ids = set(located) if ids is None else ids.intersection(located)
+        if ids is None:
+            return sorted(self.rows)
+        return sorted(ids)
+
+
+# Shared index used by /listings/filter
+listing_tag_index = ListingTagIndex()
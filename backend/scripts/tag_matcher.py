@@ -0,0 +1,107 @@
+import numpy as np
+from typing import NamedTuple
+
+# Nearest-tag lookup over the whole tag vocabulary with a single matrix product.
+
+DEFAULT_SIMILARITY_THRESHOLD = 0.8
+
+
+class TagMatch(NamedTuple):
+    name: str
+    score: float
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """Returns a float32 copy of `matrix` with every row scaled to unit length."""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return np.ascontiguousarray(matrix / norms)
+
+
+class NearestTagMatcher:
+    """
+    Holds the vocabulary as a pre-normalized matrix so that cosine similarity
+    for a whole batch of query vectors is one matrix product.
+    """
+
+    def __init__(self, names: list[str], matrix, threshold: float = DEFAULT_SIMILARITY_THRESHOLD):
+        names = list(names)
+        self.index = {name: i for i, name in enumerate(names)}
+        self.threshold = threshold
+        matrix = np.asarray(matrix, dtype=np.float32)
+        # Names and matrix are swapped together so concurrent readers never see them out of step
+        self._state = (names, normalize_rows(matrix.reshape(len(names), -1)) if names else matrix.reshape(0, 0))
+
+    @property
+    def names(self) -> list[str]:
+        return self._state[0]
+
+    @property
+    def matrix(self) -> np.ndarray:
+        return self._state[1]
+
+    @classmethod
+    def from_store(cls, store, names: list[str], threshold: float = DEFAULT_SIMILARITY_THRESHOLD):
+        """Builds a matcher over `names` using the vectors held in a TagEmbeddingStore."""
+        rows = [store.index[name] for name in names]
+        return cls(names, store.matrix[rows], threshold)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def covers(self, names: list[str]) -> bool:
+        """True if the matcher's vocabulary is exactly the given set of names."""
+        return len(names) == len(self.names) and all(name in self.index for name in names)
+
+    def add(self, names: list[str], vectors):
+        """Appends new tags to the vocabulary, normalizing only the new rows."""
+        rows = {}
+        for name, vec in zip(names, vectors):
+            if name not in self.index and name not in rows:
+                rows[name] = vec
+        if not rows:
+            return
+        names, matrix = self._state
+        new_rows = normalize_rows(np.asarray(list(rows.values()), dtype=np.float32))
+        new_names = names + list(rows)
+        for i, name in enumerate(rows, start=len(names)):
+            self.index[name] = i
+        self._state = (new_names, new_rows if not names else np.vstack([matrix, new_rows]))
+
+    def similarities(self, query_vectors) -> np.ndarray:
+        """Cosine similarity of every query (rows) against every tag (columns)."""
+        queries = normalize_rows(np.atleast_2d(np.asarray(query_vectors, dtype=np.float32)))
+        return queries @ self.matrix.T
+
+    def query(self, query_vectors, k: int = 1) -> list[list[TagMatch]]:
+        """Returns the top-k most similar tags (best first) for each query vector."""
+        names, matrix = self._state
+        if len(query_vectors) == 0 or not names:
+            return [[] for _ in range(len(query_vectors))]
+        queries = normalize_rows(np.atleast_2d(np.asarray(query_vectors, dtype=np.float32)))
+        scores = queries @ matrix.T
+        k = min(k, len(names))
+        if k < len(names):
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        else:
+            top = np.broadcast_to(np.arange(len(names)), scores.shape)
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+        return [
+            [TagMatch(names[j], float(score)) for j, score in zip(row, row_scores)]
+            for row, row_scores in zip(top, top_scores)
+        ]
+
+    def is_match(self, score: float) -> bool:
+        """The threshold decision: is a tag this similar close enough to reuse?"""
+        return score >= self.threshold
+
+    def best_match(self, query_vector):
+        """Returns the closest tag if it clears the threshold, otherwise None."""
+        matches = self.query([query_vector], k=1)[0]
+        if matches and self.is_match(matches[0].score):
+            return matches[0]
+        return None
@@ -1,81 +1,124 @@
 import os
-import numpy as np
-from openai import OpenAI
-from supabase import create_client, Client
+import sys
+import asyncio
+from typing import TYPE_CHECKING
 
-# The .env file is now loaded by main.py, so we don't need to do it here.
+if __name__ == '__main__':
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from backend.scripts.catalog_cache import catalog_cache
+from backend.scripts.embedding_batcher import embedding_batcher
+from backend.scripts.async_db import get_async_supabase
+from backend.scripts.single_flight import single_flight
 
-# Initialize OpenAI client
-openai_api_key = os.getenv("OPENAI_API_KEY")
-if not openai_api_key:
-    raise ValueError("OPENAI_API_KEY not found in .env file")
-client = OpenAI(api_key=openai_api_key)
+if TYPE_CHECKING:
+    from backend.scripts.tag_matcher import NearestTagMatcher
 
-# Initialize Supabase client
-supabase_url = os.getenv("SUPABASE_URL")
-supabase_key = os.getenv("SUPABASE_KEY")
-if not supabase_url or not supabase_key:
-    raise ValueError("Supabase URL or Key not found in .env file")
-supabase: Client = create_client(supabase_url, supabase_key)
+# tag_embeddings and tag_matcher pull in numpy; they are imported inside the
+# functions that need them so importing this module (and main.py) stays fast.
+
+# The .env file is now loaded by main.py, so we don't need to do it here.
 
 SIMILARITY_THRESHOLD = 0.8  # Adjust this value based on desired similarity strictness
 
-def get_embedding(text, model="text-embedding-3-small"):
-    """Generates an embedding for a given text using OpenAI."""
-    text = text.replace("\n", " ")
-    return client.embeddings.create(input=[text], model=model).data[0].embedding
+@single_flight("get_embedding")
+async def get_embedding(text, model="text-embedding-3-small"):
+    """Generates an embedding for a given text using OpenAI, batched with concurrent callers' texts."""
+    return await embedding_batcher.embed(text.replace("\n", " "), model)
+
+async def get_embeddings(texts, model="text-embedding-3-small"):
+    """
+    Generates embeddings for several texts. Each text goes through get_embedding,
+    so a text already being embedded for a concurrent caller (e.g. the same tag
+    from two uploads) is shared, and the rest go out together in one batch.
+    """
+    if not texts:
+        return []
+    return list(await asyncio.gather(*(get_embedding(text, model) for text in texts)))
 
 def cosine_similarity(v1, v2):
     """Calculates the cosine similarity between two vectors."""
+    import numpy as np
     return np.dot(v1, v2) / (np.linalg.norm(v1) * np.linalg.norm(v2))
 
-def verify_and_add_tags(new_tags: list[str]) -> list[str]:
+async def store_tag_embeddings(tags: list[str]):
+    """Embeds any of the given tags that are not in the embedding store yet and saves them."""
+    from backend.scripts.tag_embeddings import tag_store
+    missing = tag_store.missing(tags)
+    if missing:
+        tag_store.add(missing, await get_embeddings(missing))
+
+# Matcher over the current tag vocabulary, rebuilt only when the vocabulary changes
+_tag_matcher = None
+
+async def get_tag_matcher(existing_tags: list[str]) -> "NearestTagMatcher":
+    """Returns a nearest-tag matcher covering exactly the given existing tags."""
+    from backend.scripts.tag_embeddings import tag_store
+    from backend.scripts.tag_matcher import NearestTagMatcher
+    global _tag_matcher
+    if _tag_matcher is None or not _tag_matcher.covers(existing_tags):
+        await store_tag_embeddings(existing_tags)
+        _tag_matcher = NearestTagMatcher.from_store(tag_store, existing_tags, SIMILARITY_THRESHOLD)
+    return _tag_matcher
+
+async def verify_and_add_tags(new_tags: list[str]) -> list[str]:
     """
     Verifies a list of new tags against existing tags in the database.
     If a new tag is not similar to any existing tag, it's added to the DB.
     Returns a cleaned list of tags, preferring existing tags over similar new ones.
     """
-    # 1. Fetch existing tags and their embeddings from the database
-    response = supabase.table('tags').select('name').execute()
+    resolved = await resolve_tags(new_tags)
+    return list(dict.fromkeys(resolved.values()))
+
+async def resolve_tags(new_tags: list[str]) -> dict[str, str]:
+    """
+    Like verify_and_add_tags, but returns which tag each input resolved to:
+    itself (existing or newly added) or the most similar existing tag.
+    """
+    supabase = await get_async_supabase()
+
+    # 1. Fetch existing tags from the database
+    response = await supabase.table('tags').select('name').execute()
     existing_tags = [item['name'] for item in response.data] if response.data else []
     
     if not existing_tags:
         print("No existing tags found. Adding all new tags.")
         if new_tags:
             tags_to_add = [{'name': tag} for tag in new_tags]
-            supabase.table('tags').insert(tags_to_add).execute()
-        return new_tags
+            await supabase.table('tags').insert(tags_to_add).execute()
+            catalog_cache.invalidate('tags')
+            await store_tag_embeddings(new_tags)
+        return {tag: tag for tag in new_tags}
 
-    existing_tags_embeddings = {tag: get_embedding(tag) for tag in existing_tags}
+    # Existing tags are embedded once and kept in the persistent store, so
+    # normally only the new candidate tags need embedding here.
+    matcher = await get_tag_matcher(existing_tags)
     
-    verified_tags = set()
+    resolved = {}
     tags_to_add_to_db = []
 
-    # 2. Compare each new tag with all existing tags
+    # 2. Embed all candidate tags in one call and match them against every
+    # existing tag with a single matrix product
+    candidates = list(dict.fromkeys(tag for tag in new_tags if tag not in matcher.index))
+    candidate_embeddings = dict(zip(candidates, await get_embeddings(candidates)))
+    best_matches = dict(zip(candidates, matcher.query(list(candidate_embeddings.values()), k=1)))
+
     for new_tag in new_tags:
-        if new_tag in existing_tags:
-            verified_tags.add(new_tag)
+        if new_tag in matcher.index:
+            resolved[new_tag] = new_tag
             continue
 
-        max_similarity = 0
-        most_similar_tag = None
-
-        new_tag_embedding = get_embedding(new_tag)
-
-        for existing_tag, existing_tag_embedding in existing_tags_embeddings.items():
-            similarity = cosine_similarity(new_tag_embedding, existing_tag_embedding)
-            if similarity > max_similarity:
-                max_similarity = similarity
-                most_similar_tag = existing_tag
+        matches = best_matches[new_tag]
+        most_similar_tag, max_similarity = matches[0] if matches else (None, 0)
         
         # 3. Decide whether to use an existing tag or add the new one
-        if max_similarity >= SIMILARITY_THRESHOLD:
+        if matcher.is_match(max_similarity):
             # New tag is very similar to an existing one, use the existing tag
-            verified_tags.add(most_similar_tag)
+            resolved[new_tag] = most_similar_tag
             print(f"New tag '{new_tag}' is similar to '{most_similar_tag}'. Using existing tag.")
         else:
             # New tag is unique, add it to the list for DB insertion and results
-            verified_tags.add(new_tag)
+            resolved[new_tag] = new_tag
             if new_tag not in tags_to_add_to_db:
                  tags_to_add_to_db.append(new_tag)
             print(f"'{new_tag}' is not similar to any existing tags. Adding to DB.")
@@ -83,14 +126,27 @@ def verify_and_add_tags(new_tags: list[str]) -> list[str]:
     # 4. Add all new unique tags to the database in a single batch
     if tags_to_add_to_db:
         new_tag_records = [{'name': tag} for tag in tags_to_add_to_db]
-        supabase.table('tags').insert(new_tag_records).execute()
+        await supabase.table('tags').insert(new_tag_records).execute()
+        catalog_cache.invalidate('tags')
+        # Save the embeddings we already computed so the next call doesn't redo them
+        new_vectors = [candidate_embeddings[tag] for tag in tags_to_add_to_db]
+        from backend.scripts.tag_embeddings import tag_store
+        tag_store.add(tags_to_add_to_db, new_vectors)
+        matcher.add(tags_to_add_to_db, new_vectors)
         print(f"Added new tags to DB: {tags_to_add_to_db}")
 
-    return list(verified_tags)
+    # Also keep the vectors of candidates that resolved to an existing tag, so
+    # the local search classifier can map those words to their tag offline
+    merged = [tag for tag in candidates if resolved[tag] != tag]
+    if merged:
+        from backend.scripts.tag_embeddings import tag_store
+        tag_store.add(merged, [candidate_embeddings[tag] for tag in merged])
+
+    return resolved
 
 if __name__ == '__main__':
     # Example usage
     sample_tags = ["outdoors", "skiing", "winter sports", "mountain", "snowboarding gear"]
     print(f"Verifying sample tags: {sample_tags}")
-    verified_tags = verify_and_add_tags(sample_tags)
+    verified_tags = asyncio.run(verify_and_add_tags(sample_tags))
     print(f"Verified tags: {verified_tags}")
\ No newline at end of file
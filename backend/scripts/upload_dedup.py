@@ -0,0 +1,82 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+# Content-hash table of processed uploads. When the same photo is uploaded
+# again (a retry, a relist) the earlier details, verified tags and storage
+# path are reused instead of re-running the vision call and the upload.
+
+DEFAULT_DB_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "upload_dedup.sqlite3"
+)
+UPLOAD_DEDUP_MAX_ENTRIES = int(os.getenv("UPLOAD_DEDUP_MAX_ENTRIES", "10000"))
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+class UploadDedupStore:
+    """SQLite table of content hash -> upload result, evicting least recently used rows."""
+
+    def __init__(self, db_path: Optional[str] = None, max_entries: int = UPLOAD_DEDUP_MAX_ENTRIES):
+        self.db_path = db_path or os.getenv("UPLOAD_DEDUP_DB", DEFAULT_DB_PATH)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._db = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._db is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+            self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS uploads ("
+                "hash TEXT PRIMARY KEY, result TEXT NOT NULL, created_at REAL NOT NULL, last_used REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS uploads_last_used ON uploads (last_used)")
+            self._db.commit()
+        return self._db
+
+    def lookup(self, digest: str) -> Optional[dict]:
+        """Returns the stored result for a content hash and marks it as recently used."""
+        with self._lock:
+            db = self._connect()
+            row = db.execute("SELECT result FROM uploads WHERE hash = ?", (digest,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            db.execute("UPDATE uploads SET last_used = ? WHERE hash = ?", (time.time(), digest))
+            db.commit()
+            self.hits += 1
+            return json.loads(row[0])
+
+    def store(self, digest: str, result: dict):
+        """Saves the result for a content hash, evicting the oldest rows past max_entries."""
+        now = time.time()
+        with self._lock:
+            db = self._connect()
+            db.execute(
+                "INSERT OR REPLACE INTO uploads (hash, result, created_at, last_used) VALUES (?, ?, ?, ?)",
+                (digest, json.dumps(result), now, now),
+            )
+            db.execute(
+                "DELETE FROM uploads WHERE hash IN ("
+                "SELECT hash FROM uploads ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            db.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = self._connect().execute("SELECT COUNT(*) FROM uploads").fetchone()[0]
+            return {"entries": entries, "hits": self.hits, "misses": self.misses}
+
+
+# Shared store used by /listings/generate-details
+upload_dedup = UploadDedupStore()